@@ -0,0 +1,149 @@
+"""
+Async serving path for the hottest read endpoints.
+
+GET requests are answered with Django's async ORM. This does not free
+threads: on Django 5.1 aget(), afirst() and aprefetch_related_objects()
+are sync_to_async() wrappers, so each query holds a thread for as long as
+it runs, like in the synchronous view. Only the code between queries runs
+on the event loop. Compare against a synchronous deployment with
+benchmarks/serving.py before relying on this path. Every other method,
+and cursor-paginated listings, fall through to the synchronous DRF view
+being wrapped, which also supplies authentication, permissions, content
+negotiation and error handling for the async path.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.paginator import InvalidPage
+from django.db.models import Prefetch, aprefetch_related_objects
+from django.http import Http404
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+
+from . import fast_serializers, views
+from .models import Workout, WorkoutMovement
+from .pagination import HistoryPagination
+from .serializers import WorkoutWithLatestLogsSerializer
+
+_LATEST_LOG_MOVEMENTS_PREFETCH = Prefetch(
+    'workout_movements',
+    queryset=(
+        WorkoutMovement.objects
+        .select_related('movement', 'movement__last_log', 'template', 'movement_log')
+        .order_by('order')
+    ),
+)
+
+
+async def apaginate_queryset(pagination, queryset, request):
+    """Async equivalent of PageNumberPagination.paginate_queryset()."""
+    page_size = pagination.get_page_size(request)
+    paginator = pagination.django_paginator_class(queryset, page_size)
+    paginator.count = await queryset.acount()
+    page_number = pagination.get_page_number(request, paginator)
+    try:
+        page = paginator.page(page_number)
+    except InvalidPage as exc:
+        raise NotFound(pagination.invalid_page_message.format(page_number=page_number, message=str(exc)))
+    page.object_list = [obj async for obj in page.object_list]
+    pagination.page = page
+    pagination.request = request
+    return page.object_list
+
+
+class AsyncReadView(View):
+    """
+    Serves GET for drf_view_class on the async path. Subclasses implement
+    aget(drf_view, request) and may override serves_async() to hand
+    particular GET requests back to the synchronous view.
+    """
+    drf_view_class = None
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # Session-authenticated writes are CSRF-checked by DRF itself, as
+        # they are for the synchronous views.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    def serves_async(self, drf_view, request):
+        return True
+
+    async def fall_through(self, request, *args, **kwargs):
+        return await sync_to_async(self.drf_view_class.as_view())(request, *args, **kwargs)
+
+    async def get(self, request, *args, **kwargs):
+        drf_view = self.drf_view_class()
+        drf_view.args = args
+        drf_view.kwargs = kwargs
+        drf_request = drf_view.initialize_request(request, *args, **kwargs)
+        drf_view.request = drf_request
+        drf_view.headers = drf_view.default_response_headers
+
+        if not self.serves_async(drf_view, drf_request):
+            return await self.fall_through(request, *args, **kwargs)
+
+        try:
+            # Authentication may hit the database on a token cache miss.
+            await sync_to_async(drf_view.initial)(drf_request, *args, **kwargs)
+            response = await self.aget(drf_view, drf_request)
+        except Exception as exc:
+            response = drf_view.handle_exception(exc)
+        return drf_view.finalize_response(drf_request, response, *args, **kwargs)
+
+    post = put = patch = delete = fall_through
+
+
+class AsyncListView(AsyncReadView):
+    """Page-number listing of drf_view_class's queryset and serializer."""
+
+    def serves_async(self, drf_view, request):
+        pagination = drf_view.paginator
+        return not (isinstance(pagination, HistoryPagination) and pagination.use_cursor(request))
+
+    async def aget(self, drf_view, request):
+        queryset = drf_view.filter_queryset(drf_view.get_queryset())
+        pagination = drf_view.paginator
+        page_number_pagination = getattr(pagination, 'page_number_paginator', pagination)
+        page = await apaginate_queryset(page_number_pagination, queryset, request)
+        serializer = drf_view.get_serializer(page, many=True)
+        # Fast read serializers fetch nested rows themselves.
+        data = await serializer.adata() if hasattr(serializer, 'adata') else serializer.data
+        return pagination.get_paginated_response(data)
+
+
+class AsyncMovementList(AsyncListView):
+    drf_view_class = views.MovementList
+
+
+class AsyncWorkoutList(AsyncListView):
+    drf_view_class = views.WorkoutList
+
+    async def aget(self, drf_view, request):
+        return await drf_view.acached_response(request, functools.partial(super().aget, drf_view, request))
+
+
+class AsyncWorkoutCurrent(AsyncReadView):
+    drf_view_class = views.WorkoutCurrent
+
+    async def aget(self, drf_view, request):
+        if settings.FAST_READ_SERIALIZERS:
+            data = await fast_serializers.acurrent_workout(request.user)
+            if data is None:
+                raise Http404("Current workout does not exist.")
+            return Response(data)
+
+        workout = await (
+            Workout.objects
+            .filter(user=request.user, end_timestamp__isnull=True)
+            .order_by("-start_timestamp")
+            .afirst()
+        )
+        if workout is None:
+            raise Http404("Current workout does not exist.")
+
+        await aprefetch_related_objects([workout], _LATEST_LOG_MOVEMENTS_PREFETCH)
+        return Response(WorkoutWithLatestLogsSerializer(workout).data)
@@ -0,0 +1,118 @@
+"""
+Multiplexed requests: POST /api/batch/ runs an ordered list of sub-requests
+against the other api routes in-process, through their own views and in one
+database transaction, and responds with all of their responses together.
+
+The batch is authenticated once and every sub-request runs as its user.
+In atomic mode, the default, the first sub-request to fail (with a 4xx or
+5xx status) rolls the whole batch back and the ones after it are not run.
+In best_effort mode each sub-request runs in its own savepoint, so a failed
+one is rolled back alone. settings.BATCH_MAX_REQUESTS caps the number of
+sub-requests.
+
+A sub-request is a method, a path (query string included) and an optional
+JSON body; headers of the batch request such as If-None-Match do not apply
+to it. Routes served on the async path are run through the synchronous DRF
+view they wrap, so the whole batch shares one connection and transaction.
+"""
+import io
+import json
+from urllib.parse import urlsplit
+
+from django.db import DatabaseError, transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+BATCH_MODES = ('atomic', 'best_effort')
+BATCH_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+
+# Routes that read or write something other than JSON, and batches themselves.
+UNBATCHABLE_ROUTES = frozenset({'batch', 'history-export', 'history-import'})
+
+
+def _batchable_routes():
+    from . import urls
+    return {pattern.name for pattern in urls.urlpatterns} - UNBATCHABLE_ROUTES
+
+
+class SubRequest(HttpRequest):
+    """A JSON request made in-process on behalf of the user of request."""
+    in_batch = True
+
+    def __init__(self, request, method, path, body):
+        super().__init__()
+        url = urlsplit(path)
+        payload = b'' if body is None else json.dumps(body).encode()
+        self.method = method
+        self.path = self.path_info = url.path
+        self.META = {
+            key: value for key, value in request.META.items()
+            if not key.startswith(('HTTP_IF_', 'CONTENT_'))
+        }
+        self.META.update({
+            'REQUEST_METHOD': method,
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(payload)),
+        })
+        self.GET = QueryDict(url.query)
+        self._stream = io.BytesIO(payload)
+        self._read_started = False
+        self._scheme = request.scheme
+        # rest_framework.request.Request uses these instead of authenticating.
+        self._force_auth_user = request.user
+        self._force_auth_token = request.auth
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+def _error(status_code, detail):
+    return {'status': status_code, 'body': {'detail': detail}}
+
+
+def _dispatch(request, item):
+    path = urlsplit(item['path']).path
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return _error(404, "Not found.")
+    if match.url_name not in _batchable_routes():
+        return _error(400, "This route cannot be used in a batch.")
+
+    view = match.func
+    drf_view_class = getattr(getattr(view, 'view_class', None), 'drf_view_class', None)
+    if drf_view_class is not None:
+        view = drf_view_class.as_view()
+    response = view(SubRequest(request, item['method'], item['path'], item.get('body')), *match.args, **match.kwargs)
+    return {'status': response.status_code, 'body': getattr(response, 'data', None)}
+
+
+def run_batch(request, items, mode='atomic'):
+    """
+    Run the validated sub-requests items on behalf of the DRF request and
+    return {'committed': bool, 'responses': [{'status', 'body'}, ...]} with
+    one response per item, in order.
+    """
+    responses = []
+    failed = False
+    with transaction.atomic():
+        for item in items:
+            try:
+                with transaction.atomic():
+                    result = _dispatch(request, item)
+                    if result['status'] >= 400:
+                        transaction.set_rollback(True)
+            except DatabaseError:
+                result = _error(500, "A server error occurred.")
+            responses.append(result)
+            if result['status'] >= 400 and mode == 'atomic':
+                failed = True
+                transaction.set_rollback(True)
+                break
+    responses.extend(
+        _error(424, "Not run: an earlier request in the batch failed.")
+        for _ in range(len(items) - len(responses))
+    )
+    return {'committed': not failed, 'responses': responses}
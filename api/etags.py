@@ -0,0 +1,68 @@
+"""
+Conditional GET driven by the per-user data version (UserDataVersion).
+
+The weak ETag of a view is the requesting user's current data version. It is
+read after authentication and before the handler runs, so a matching
+If-None-Match is answered with 304 before any queryset or serializer work.
+Reading it first also means a write racing the request can only make the
+ETag older than the body, never newer, which costs one extra full response
+rather than a stale 304.
+"""
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import UserDataVersion
+
+
+class NotModified(Exception):
+    pass
+
+
+def data_version_etag(user_id, version):
+    return f'W/"{user_id}.{version}"'
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    # Weak comparison, as If-None-Match requires.
+    return etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in parse_etags(header)}
+
+
+class DataVersionETagMixin:
+    """
+    Adds the data version ETag to GET responses of an APIView and answers
+    matching conditional GETs with 304. Also applies to the async serving
+    path, which runs initial(), handle_exception() and finalize_response()
+    of the wrapped view.
+    """
+    etag = None
+    data_version = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        if request.method in ('GET', 'HEAD'):
+            self.data_version = UserDataVersion.current(request.user.pk)
+            self.etag = data_version_etag(request.user.pk, self.data_version)
+            if etag_matches(request, self.etag):
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.etag is not None and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = self.etag
+            if not response.has_header('Cache-Control'):
+                # Clients keep the body but must revalidate before reusing it.
+                patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,162 @@
+"""
+Streaming export of a user's full training history.
+
+Every workout, workout movement and movement log of a user is read in one
+LEFT JOINed query through a server-side cursor and encoded as the rows
+arrive, so memory stays flat however long the history is.
+
+CSV has one row per workout movement (or per workout without movements),
+with the movement log's sets as a JSON column. NDJSON has one line per
+workout with its movements and logs nested.
+"""
+import csv
+import io
+import itertools
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import SET_COLUMNS, Workout, unpack_sets
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+# (CSV column, Workout lookup); sets is assembled from the set columns.
+_COLUMNS = [
+    ('workout_id', 'id'),
+    ('workout_start', 'start_timestamp'),
+    ('workout_end', 'end_timestamp'),
+    ('workout_movement_id', 'workout_movements__id'),
+    ('order', 'workout_movements__order'),
+    ('movement_id', 'workout_movements__movement_id'),
+    ('movement_name', 'workout_movements__movement__name'),
+    ('body_part', 'workout_movements__movement__body_part'),
+    ('resistance_type', 'workout_movements__movement__resistance_type'),
+    ('template_name', 'workout_movements__template__name'),
+    ('movement_log_id', 'workout_movements__movement_log__id'),
+    ('logged_at', 'workout_movements__movement_log__timestamp'),
+    ('notes', 'workout_movements__movement_log__notes'),
+    ('sets', None),
+]
+_SET_LOOKUPS = [f'workout_movements__movement_log__{column}' for column in SET_COLUMNS]
+
+# Encoded output is handed on in pieces of roughly this many bytes.
+_FLUSH_SIZE = 64 * 1024
+
+
+def history_rows(user, chunk_size=2000):
+    """
+    Yield one tuple of _COLUMNS values per workout movement of user, oldest
+    workout first. Workouts without movements yield a single row with the
+    workout movement columns set to None.
+    """
+    rows = (
+        Workout.objects
+        .filter(user=user)
+        .order_by('start_timestamp', 'id', 'workout_movements__order', 'workout_movements__id')
+        .values_list(*(lookup for _, lookup in _COLUMNS if lookup is not None), *_SET_LOOKUPS)
+    )
+    for *values, reps, loads, types, rest_times in rows.iterator(chunk_size=chunk_size):
+        yield (*values, None if reps is None else unpack_sets(reps, loads, types, rest_times))
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return json.dumps(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(column for column, _ in _COLUMNS)
+    for row in rows:
+        writer.writerow(_csv_value(value) for value in row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def encode_ndjson(rows):
+    encoder = DjangoJSONEncoder()
+    for (workout_id, start, end), group in itertools.groupby(rows, key=lambda row: row[:3]):
+        movements = []
+        for row in group:
+            (_, _, _, wm_id, order, movement_id, name, body_part, resistance_type,
+             template_name, log_id, logged_at, notes, sets) = row
+            if wm_id is None:
+                continue
+            movements.append({
+                'workout_movement_id': wm_id,
+                'order': order,
+                'movement': {
+                    'id': movement_id,
+                    'name': name,
+                    'body_part': body_part,
+                    'resistance_type': resistance_type,
+                },
+                'template_name': template_name,
+                'log': None if log_id is None else {
+                    'id': log_id,
+                    'timestamp': logged_at,
+                    'notes': notes,
+                    'sets': sets,
+                },
+            })
+        yield encoder.encode({
+            'id': workout_id,
+            'start_timestamp': start,
+            'end_timestamp': end,
+            'movements': movements,
+        }) + '\n'
+
+
+def export_chunks(user, export_format='csv', compress=False, chunk_size=2000):
+    """
+    Yield the history of user encoded as export_format, in bytes chunks of
+    about _FLUSH_SIZE, gzipped when compress is true.
+    """
+    encode = encode_ndjson if export_format == 'ndjson' else encode_csv
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    pending, pending_size = [], 0
+    for text in encode(history_rows(user, chunk_size=chunk_size)):
+        pending.append(text)
+        pending_size += len(text)
+        if pending_size < _FLUSH_SIZE:
+            continue
+        data = ''.join(pending).encode()
+        pending, pending_size = [], 0
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    data = ''.join(pending).encode()
+    if compressor is not None:
+        data = compressor.compress(data) + compressor.flush()
+    if data:
+        yield data
+
+
+async def aiter_chunks(chunks):
+    """
+    Async iterator over a synchronous chunk iterator, for StreamingHttpResponse
+    under ASGI, which would otherwise consume a sync iterator in full before
+    sending anything. Chunks are pulled on the thread that owns the database
+    connection holding the server-side cursor.
+    """
+    chunks = iter(chunks)
+    pull = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await pull(chunks, None)
+        if chunk is None:
+            return
+        yield chunk
@@ -0,0 +1,277 @@
+"""
+Model-free fast read path for the nested list serializers.
+
+Builds the JSON shapes of WorkoutWithRecordedLogsSerializer,
+WorkoutWithLatestLogsSerializer and WorkoutTemplateSerializer from values()
+rows: no model instances are created and no serializer is instantiated per
+row. Views opt in with settings.FAST_READ_SERIALIZERS. The equivalence tests
+in api.tests hold the rendered output byte-for-byte to the DRF serializers,
+so a field added to one of those must be added here as well.
+
+The *FastSerializer classes stand in for the DRF serializers with many=True
+on GET: they take a page of values() rows and fetch the nested rows in one
+more query, through .data on the sync path or adata() on the async one.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .models import SET_COLUMNS, Workout, WorkoutMovement, WorkoutTemplateMovement, unpack_sets
+
+WORKOUT_VALUES = ('id', 'user', 'start_timestamp', 'end_timestamp')
+WORKOUT_TEMPLATE_VALUES = ('id', 'author', 'name', 'created_timestamp', 'updated_timestamp')
+
+_MOVEMENT_VALUES = (
+    'id', 'author', 'name', 'notes', 'resistance_type', 'body_part', 'created_timestamp', 'updated_timestamp',
+)
+_MOVEMENT_LOG_TEMPLATE_VALUES = ('id', 'author', 'name', 'movement', 'sets', 'updated_timestamp')
+_LOG_VALUES = ('id', *SET_COLUMNS, 'notes', 'timestamp')
+
+
+def _prefixed(prefix, names):
+    return tuple(f'{prefix}__{name}' for name in names)
+
+
+class DateTimeFormatter:
+    """DateTimeField.to_representation() with the time zone looked up once."""
+    def __init__(self):
+        self.tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def __call__(self, value):
+        if not value:
+            return None
+        if self.tz is not None and timezone.is_aware(value):
+            value = value.astimezone(self.tz)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+
+def _movement(row, prefix, dt):
+    return {
+        'id': row[prefix + 'id'],
+        'author': row[prefix + 'author'],
+        'name': row[prefix + 'name'],
+        'notes': row[prefix + 'notes'],
+        'resistance_type': row[prefix + 'resistance_type'],
+        'body_part': row[prefix + 'body_part'],
+        'created_timestamp': dt(row[prefix + 'created_timestamp']),
+        'updated_timestamp': dt(row[prefix + 'updated_timestamp']),
+    }
+
+
+def _template_set(s):
+    # TemplateSetSerializer fills missing nullable keys with None.
+    reps, rest_time = s.get('reps'), s.get('rest_time')
+    return {
+        'reps': None if reps is None else str(reps),
+        'type': s['type'],
+        'rest_time': None if rest_time is None else int(rest_time),
+    }
+
+
+def _movement_log_template(row, prefix, dt):
+    if row[prefix + 'id'] is None:
+        return None
+    return {
+        'id': row[prefix + 'id'],
+        'author': row[prefix + 'author'],
+        'name': row[prefix + 'name'],
+        'movement': row[prefix + 'movement'],
+        'sets': [_template_set(s) for s in row[prefix + 'sets']],
+        'updated_timestamp': dt(row[prefix + 'updated_timestamp']),
+    }
+
+
+def _log(row, prefix, dt):
+    return {
+        'id': row[prefix + 'id'],
+        'sets': unpack_sets(*(row[prefix + column] for column in SET_COLUMNS)),
+        'notes': row[prefix + 'notes'],
+        'timestamp': dt(row[prefix + 'timestamp']),
+    }
+
+
+def _group_by(rows, key):
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[key], []).append(row)
+    return groups
+
+
+# Recorded logs (WorkoutList, WorkoutDetail)
+
+def recorded_movement_rows(workout_ids):
+    return (
+        WorkoutMovement.objects
+        .filter(workout_id__in=workout_ids)
+        .order_by('workout_id', 'order')
+        .values(
+            'id', 'workout_id',
+            *_prefixed('movement', _MOVEMENT_VALUES),
+            *_prefixed('movement_log', _LOG_VALUES),
+        )
+    )
+
+
+def recorded_workouts(workouts, movement_rows):
+    """Equivalent of WorkoutWithRecordedLogsSerializer(workouts, many=True).data."""
+    dt = DateTimeFormatter()
+    movements_by_workout = _group_by(movement_rows, 'workout_id')
+    return [
+        {
+            'id': workout['id'],
+            'user': workout['user'],
+            'movements_details': [
+                {
+                    'workout_movement_id': row['id'],
+                    **_movement(row, 'movement__', dt),
+                    'recorded_log': (
+                        _log(row, 'movement_log__', dt) if row['movement_log__id'] is not None else None
+                    ),
+                }
+                for row in movements_by_workout.get(workout['id'], [])
+            ],
+            'start_timestamp': dt(workout['start_timestamp']),
+            'end_timestamp': dt(workout['end_timestamp']),
+        }
+        for workout in workouts
+    ]
+
+
+class RecordedWorkoutsFastSerializer:
+    """Read-only stand-in for WorkoutWithRecordedLogsSerializer(many=True)."""
+    def __init__(self, instance, many=True, **kwargs):
+        self.workouts = list(instance)
+
+    @property
+    def data(self):
+        rows = recorded_movement_rows([workout['id'] for workout in self.workouts])
+        return recorded_workouts(self.workouts, rows)
+
+    async def adata(self):
+        rows = recorded_movement_rows([workout['id'] for workout in self.workouts])
+        return recorded_workouts(self.workouts, [row async for row in rows])
+
+
+# Latest logs (WorkoutCurrent)
+
+def latest_movement_rows(workout_id):
+    return (
+        WorkoutMovement.objects
+        .filter(workout_id=workout_id)
+        .order_by('order')
+        .values(
+            'id',
+            *_prefixed('movement', _MOVEMENT_VALUES),
+            *_prefixed('template', _MOVEMENT_LOG_TEMPLATE_VALUES),
+            *_prefixed('movement_log', _LOG_VALUES),
+            *_prefixed('movement__last_log', _LOG_VALUES),
+        )
+    )
+
+
+def _latest_log(row, dt):
+    if row['movement_log__id'] is not None:
+        return {**_log(row, 'movement_log__', dt), 'for_current_workout': True}
+    if row['movement__last_log__id'] is not None:
+        return {**_log(row, 'movement__last_log__', dt), 'for_current_workout': False}
+    return None
+
+
+def workout_with_latest_logs(workout, movement_rows):
+    """Equivalent of WorkoutWithLatestLogsSerializer(workout).data."""
+    dt = DateTimeFormatter()
+    return {
+        'id': workout['id'],
+        'user': workout['user'],
+        'movements_details': [
+            {
+                'workout_movement_id': row['id'],
+                'template': _movement_log_template(row, 'template__', dt),
+                **_movement(row, 'movement__', dt),
+                'latest_log': _latest_log(row, dt),
+            }
+            for row in movement_rows
+        ],
+        'start_timestamp': dt(workout['start_timestamp']),
+        'end_timestamp': dt(workout['end_timestamp']),
+    }
+
+
+def current_workout(user):
+    workout = (
+        Workout.objects
+        .filter(user=user, end_timestamp__isnull=True)
+        .order_by("-start_timestamp")
+        .values(*WORKOUT_VALUES)
+        .first()
+    )
+    if workout is None:
+        return None
+    return workout_with_latest_logs(workout, latest_movement_rows(workout['id']))
+
+
+async def acurrent_workout(user):
+    workout = await (
+        Workout.objects
+        .filter(user=user, end_timestamp__isnull=True)
+        .order_by("-start_timestamp")
+        .values(*WORKOUT_VALUES)
+        .afirst()
+    )
+    if workout is None:
+        return None
+    return workout_with_latest_logs(workout, [row async for row in latest_movement_rows(workout['id'])])
+
+
+# Workout templates (WorkoutTemplateList)
+
+def template_movement_rows(template_ids):
+    return (
+        WorkoutTemplateMovement.objects
+        .filter(template_id__in=template_ids)
+        .order_by('template_id', 'order')
+        .values(
+            'id', 'template_id', 'order',
+            *_prefixed('movement', _MOVEMENT_VALUES),
+            *_prefixed('movement_log_template', _MOVEMENT_LOG_TEMPLATE_VALUES),
+        )
+    )
+
+
+def workout_templates(templates, movement_rows):
+    """Equivalent of WorkoutTemplateSerializer(templates, many=True).data."""
+    dt = DateTimeFormatter()
+    movements_by_template = _group_by(movement_rows, 'template_id')
+    return [
+        {
+            'id': template['id'],
+            'author': template['author'],
+            'name': template['name'],
+            'movements_details': [
+                {
+                    'id': row['id'],
+                    'movement': row['movement__id'],
+                    'movement_detail': _movement(row, 'movement__', dt),
+                    'movement_log_template': row['movement_log_template__id'],
+                    'movement_log_template_detail': _movement_log_template(row, 'movement_log_template__', dt),
+                    'order': row['order'],
+                }
+                for row in movements_by_template.get(template['id'], [])
+            ],
+            'created_timestamp': dt(template['created_timestamp']),
+            'updated_timestamp': dt(template['updated_timestamp']),
+        }
+        for template in templates
+    ]
+
+
+class WorkoutTemplatesFastSerializer:
+    """Read-only stand-in for WorkoutTemplateSerializer(many=True)."""
+    def __init__(self, instance, many=True, **kwargs):
+        self.templates = list(instance)
+
+    @property
+    def data(self):
+        return workout_templates(self.templates, template_movement_rows([t['id'] for t in self.templates]))
@@ -0,0 +1,247 @@
+"""
+Bulk import of training history exported from other tracking apps.
+
+The CSV has one row per set:
+
+    workout_start, workout_end, movement, reps, load, set_type, rest_time, notes
+
+Only workout_start, movement and reps are required and headers are matched
+case-insensitively. Naive timestamps are read in the user's time zone. Rows
+sharing a workout_start must be contiguous and make up one workout; rows
+that return to a workout after other workouts' rows are rejected. Within a
+workout, the sets of each movement become one MovementLog. Movements are matched
+to the user's existing ones by name, ignoring case, or created.
+
+The file is parsed as a stream and written with bulk_create in chunks of
+workouts, each chunk in its own transaction. Workouts whose start already
+exists for the user are skipped, so an interrupted import can be re-run.
+MovementLog.save() is bypassed, so last log pointers, personal records and
+weekly volume are recomputed once at the end.
+"""
+import csv
+import datetime
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import (
+    Movement, MovementLog, PersonalRecord, UserDataVersion, WeeklyVolume, Workout, WorkoutMovement,
+    SET_INT_MAX, SET_TYPE_CHOICES,
+)
+
+REQUIRED_COLUMNS = ('workout_start', 'movement', 'reps')
+
+# Rejected rows beyond this many are counted but not listed.
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportFormatError(ValueError):
+    """The upload as a whole cannot be read."""
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.workouts = 0
+        self.skipped_workouts = 0
+        self.movement_logs = 0
+        self.movements_created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'workouts': self.workouts,
+            'skipped_workouts': self.skipped_workouts,
+            'movement_logs': self.movement_logs,
+            'movements_created': self.movements_created,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def _parse_int(row, column, minimum):
+    value = (row.get(column) or '').strip()
+    if not value:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{column} must be a whole number, not {value!r}.")
+    if number < minimum:
+        raise ValueError(f"{column} must be at least {minimum}.")
+    if number > SET_INT_MAX:
+        raise ValueError(f"{column} must be at most {SET_INT_MAX}.")
+    return number
+
+
+def parse_set(row):
+    """Return the set described by a CSV row in MovementLog.sets form."""
+    reps = _parse_int(row, 'reps', 1)
+    if reps is None:
+        raise ValueError("reps is required.")
+    load = (row.get('load') or '').strip()
+    try:
+        load = float(load) if load else None
+    except ValueError:
+        raise ValueError(f"load must be a number, not {load!r}.")
+    set_type = (row.get('set_type') or '').strip().lower() or 'working'
+    if set_type not in SET_TYPE_CHOICES:
+        raise ValueError(f"set_type must be one of {', '.join(SET_TYPE_CHOICES)}, not {set_type!r}.")
+    return {'reps': reps, 'load': load, 'type': set_type, 'rest_time': _parse_int(row, 'rest_time', 0)}
+
+
+def parse_timestamp(value, tz):
+    """Parse an ISO date or date and time, making naive values aware in tz."""
+    value = (value or '').strip()
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            parsed = datetime.datetime.combine(day, datetime.time()) if day else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError(f"{value!r} is not a valid date or date and time.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, tz)
+    return parsed
+
+
+class HistoryImporter:
+    """
+    Imports a CSV text stream into the history of user. progress, if given,
+    is called with the ImportReport after every committed chunk.
+    """
+    def __init__(self, user, chunk_size=500, progress=None):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.report = ImportReport()
+        self.movement_ids = None
+        self.touched_movement_ids = set()
+
+    def run(self, stream):
+        reader = csv.DictReader(stream)
+        try:
+            fieldnames = reader.fieldnames
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ImportFormatError(f"Could not read the CSV header: {exc}")
+        if not fieldnames:
+            raise ImportFormatError("The file is empty.")
+        reader.fieldnames = [name.strip().lower() for name in fieldnames]
+        missing = [column for column in REQUIRED_COLUMNS if column not in reader.fieldnames]
+        if missing:
+            raise ImportFormatError(f"Missing required columns: {', '.join(missing)}.")
+
+        self.movement_ids = {
+            name.casefold(): movement_id
+            for movement_id, name in Movement.objects.filter(author=self.user).values_list('id', 'name')
+        }
+        try:
+            chunk = []
+            for workout in self._workouts(reader):
+                chunk.append(workout)
+                if len(chunk) >= self.chunk_size:
+                    self._write(chunk)
+                    chunk = []
+            if chunk:
+                self._write(chunk)
+        except (csv.Error, UnicodeDecodeError) as exc:
+            raise ImportFormatError(f"Could not read line {reader.line_num}: {exc}")
+        finally:
+            self._refresh_derived()
+        return self.report
+
+    def _workouts(self, reader):
+        tz = self.user.tzinfo
+        workout = None
+        finished_starts = set()
+        for row in reader:
+            self.report.rows += 1
+            try:
+                start = parse_timestamp(row.get('workout_start'), tz)
+                end = parse_timestamp(row['workout_end'], tz) if (row.get('workout_end') or '').strip() else None
+                name = (row.get('movement') or '').strip()
+                if not name:
+                    raise ValueError("movement is required.")
+                if len(name) > Movement._meta.get_field('name').max_length:
+                    raise ValueError("movement name is too long.")
+                parsed_set = parse_set(row)
+            except ValueError as exc:
+                self.report.add_error(reader.line_num, str(exc))
+                continue
+
+            if workout is None or workout['start'] != start:
+                if start in finished_starts:
+                    self.report.add_error(
+                        reader.line_num, f"Rows of the workout starting at {start.isoformat()} must be contiguous.")
+                    continue
+                if workout is not None:
+                    finished_starts.add(workout['start'])
+                    yield workout
+                workout = {'start': start, 'end': None, 'movements': {}}
+            workout['end'] = workout['end'] or end
+            movement = workout['movements'].setdefault(name.casefold(), {'name': name, 'sets': [], 'notes': ''})
+            movement['sets'].append(parsed_set)
+            movement['notes'] = movement['notes'] or (row.get('notes') or '').strip()
+        if workout is not None:
+            yield workout
+
+    def _write(self, chunk):
+        with transaction.atomic():
+            seen = set(
+                Workout.objects
+                .filter(user=self.user, start_timestamp__in=[workout['start'] for workout in chunk])
+                .values_list('start_timestamp', flat=True)
+            )
+            new_movements = {}
+            workouts, workout_movements, logs = [], [], []
+            for data in chunk:
+                if data['start'] in seen:
+                    self.report.skipped_workouts += 1
+                    continue
+                workout = Workout(user=self.user, start_timestamp=data['start'], end_timestamp=data['end'])
+                workouts.append(workout)
+                for order, (key, movement) in enumerate(data['movements'].items()):
+                    if key not in self.movement_ids and key not in new_movements:
+                        new_movements[key] = Movement(author=self.user, name=movement['name'])
+                    movement_id = self.movement_ids[key] if key in self.movement_ids else new_movements[key].pk
+                    workout_movement = WorkoutMovement(workout=workout, movement_id=movement_id, order=order)
+                    workout_movements.append(workout_movement)
+                    logs.append(MovementLog(
+                        workout_movement=workout_movement, user=self.user, movement_id=movement_id,
+                        sets=movement['sets'], notes=movement['notes'], timestamp=data['start'],
+                    ))
+
+            if workouts:
+                UserDataVersion.stamp(self.user.pk, [*new_movements.values(), *workouts, *workout_movements, *logs])
+            Movement.objects.bulk_create(new_movements.values(), batch_size=1000)
+            Workout.objects.bulk_create(workouts, batch_size=1000)
+            WorkoutMovement.objects.bulk_create(workout_movements, batch_size=1000)
+            MovementLog.objects.bulk_create(logs, batch_size=1000)
+
+        # Only once the chunk has committed, so a failed chunk leaves no ids
+        # of rows that were never written behind.
+        self.movement_ids.update((key, movement.pk) for key, movement in new_movements.items())
+        self.touched_movement_ids.update(log.movement_id for log in logs)
+        self.report.movements_created += len(new_movements)
+        self.report.workouts += len(workouts)
+        self.report.movement_logs += len(logs)
+        if self.progress is not None:
+            self.progress(self.report)
+
+    def _refresh_derived(self):
+        if not self.touched_movement_ids:
+            return
+        with transaction.atomic():
+            Movement.refresh_last_logs(self.touched_movement_ids)
+            PersonalRecord.refresh(self.touched_movement_ids)
+            WeeklyVolume.refresh_users([self.user.pk])
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import EXPORT_FORMATS, export_chunks
+from authn.models import User
+
+
+class Command(BaseCommand):
+    help = "Export every workout, workout movement and movement log of a user as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('email')
+        parser.add_argument('--format', dest='export_format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('--output', help="File to write to. Defaults to stdout.")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist.")
+        if options['gzip'] and not options['output']:
+            raise CommandError("--gzip requires --output.")
+
+        chunks = export_chunks(
+            user, options['export_format'], compress=options['gzip'], chunk_size=options['chunk_size'],
+        )
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importer import HistoryImporter, ImportFormatError
+from authn.models import User
+
+
+class Command(BaseCommand):
+    help = "Import training history of a user from a CSV with one row per set. See api.importer for the columns."
+
+    def add_arguments(self, parser):
+        parser.add_argument('email')
+        parser.add_argument('path')
+        parser.add_argument('--chunk-size', type=int, default=500, help="Workouts written per transaction.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(email=options['email'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['email']} does not exist.")
+
+        def progress(report):
+            self.stdout.write(f"Read {report.rows} rows, imported {report.workouts} workouts.")
+
+        importer = HistoryImporter(user, chunk_size=options['chunk_size'], progress=progress)
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                report = importer.run(stream)
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+
+        for error in report.errors:
+            self.stderr.write(f"Line {error['line']}: {error['error']}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f"... and {report.error_count - len(report.errors)} more rejected rows.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report.workouts} workouts and {report.movement_logs} movement logs, "
+            f"created {report.movements_created} movements, skipped {report.skipped_workouts} existing workouts."
+        ))
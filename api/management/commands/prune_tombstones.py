@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Tombstone
+from api.sync import tombstone_retention
+
+
+class Command(BaseCommand):
+    help = "Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        expired = Tombstone.objects.filter(deleted_timestamp__lt=timezone.now() - tombstone_retention())
+        pruned = 0
+        while True:
+            batch = list(expired.values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            Tombstone.objects.filter(pk__in=batch).delete()
+            pruned += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Pruned {pruned} tombstones."))
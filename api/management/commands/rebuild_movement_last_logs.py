@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Movement
+
+
+class Command(BaseCommand):
+    help = "Rebuild Movement.last_log and Movement.last_logged_at from existing log history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        movement_ids = Movement.objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = 0
+        rebuilt = 0
+        while True:
+            batch = list(movement_ids.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                Movement.refresh_last_logs(batch)
+            rebuilt += len(batch)
+            last_pk = batch[-1]
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt last log pointers for {rebuilt} movements."))
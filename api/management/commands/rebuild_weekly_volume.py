@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import WeeklyVolume
+from authn.models import User
+
+
+class Command(BaseCommand):
+    help = "Rebuild weekly volume rollups of every user from existing log history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        last_pk = None
+        rebuilt = 0
+        while True:
+            batch = user_ids if last_pk is None else user_ids.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                WeeklyVolume.refresh_users(batch)
+            rebuilt += len(batch)
+            last_pk = batch[-1]
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt weekly volume for {rebuilt} users."))
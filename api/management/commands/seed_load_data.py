@@ -0,0 +1,142 @@
+import datetime
+import json
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.authtoken.models import Token
+
+from api.models import (
+    BodyPart, Movement, MovementLog, PersonalRecord, ResistanceType, UserDataVersion, WeeklyVolume,
+    Workout, WorkoutMovement,
+)
+from authn.models import User
+
+# (name, resistance type, body part, typical working load in kg or None)
+MOVEMENTS = [
+    ("Back Squat", ResistanceType.BARBELL, BodyPart.QUADS, 100.0),
+    ("Bench Press", ResistanceType.BARBELL, BodyPart.CHEST, 80.0),
+    ("Deadlift", ResistanceType.BARBELL, BodyPart.BACK, 140.0),
+    ("Overhead Press", ResistanceType.BARBELL, BodyPart.SHOULDERS, 50.0),
+    ("Barbell Row", ResistanceType.BARBELL, BodyPart.BACK, 70.0),
+    ("Romanian Deadlift", ResistanceType.BARBELL, BodyPart.HAMSTRINGS, 100.0),
+    ("Hip Thrust", ResistanceType.BARBELL, BodyPart.GLUTES, 120.0),
+    ("Leg Press", ResistanceType.MACHINE, BodyPart.QUADS, 180.0),
+    ("Lat Pulldown", ResistanceType.CABLE, BodyPart.LATS, 60.0),
+    ("Seated Cable Row", ResistanceType.CABLE, BodyPart.BACK, 60.0),
+    ("Triceps Pushdown", ResistanceType.CABLE, BodyPart.ARMS, 30.0),
+    ("Dumbbell Curl", ResistanceType.DUMBBELL, BodyPart.ARMS, 14.0),
+    ("Lateral Raise", ResistanceType.DUMBBELL, BodyPart.SIDE_DELTS, 10.0),
+    ("Incline Dumbbell Press", ResistanceType.DUMBBELL, BodyPart.UPPER_CHEST, 30.0),
+    ("Calf Raise", ResistanceType.MACHINE, BodyPart.CALVES, 80.0),
+    ("Pull-up", ResistanceType.BODYWEIGHT, BodyPart.LATS, None),
+    ("Dip", ResistanceType.BODYWEIGHT, BodyPart.CHEST, None),
+    ("Hanging Leg Raise", ResistanceType.BODYWEIGHT, BodyPart.CORE, None),
+]
+
+
+def _round_load(load):
+    return round(load / 2.5) * 2.5
+
+
+def synthetic_sets(rng, base_load):
+    """Warmups ramping up to three to five working sets, now and then a finisher."""
+    working_reps = rng.choice([3, 5, 6, 8, 10, 12])
+    sets = []
+    if base_load is not None:
+        for fraction in rng.choice([(), (0.5,), (0.5, 0.75)]):
+            sets.append({'reps': rng.choice([5, 8, 10]), 'load': _round_load(base_load * fraction), 'type': 'warmup'})
+    for _ in range(rng.randint(3, 5)):
+        load = None if base_load is None else _round_load(base_load * rng.uniform(0.95, 1.05))
+        sets.append({'reps': max(1, working_reps + rng.randint(-2, 1)), 'load': load, 'type': 'working'})
+    if rng.random() < 0.15:
+        load = None if base_load is None else _round_load(base_load * 0.7)
+        sets.append({'reps': working_reps + rng.randint(2, 6), 'load': load, 'type': rng.choice(['dropset', 'failure'])})
+    for s in sets:
+        s['rest_time'] = None if rng.random() < 0.1 else rng.randrange(60, 241, 15)
+    return sets
+
+
+class Command(BaseCommand):
+    help = (
+        "Create synthetic users with movements and workout history for load testing. The data depends only "
+        "on the options, so runs with the same options produce the same history; existing users with the "
+        "generated emails are replaced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--workouts', type=int, default=100, help="Finished workouts per user.")
+        parser.add_argument('--logs', type=int, default=5, help="Movement logs per workout.")
+        parser.add_argument('--movements', type=int, default=len(MOVEMENTS), help="Movements per user.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--end-date', type=datetime.date.fromisoformat, default=None,
+                            help="Day after the last workout, YYYY-MM-DD. Defaults to today.")
+        parser.add_argument('--email-prefix', default='load-user-')
+        parser.add_argument('--password', default='password')
+        parser.add_argument('--tokens-file', help="Write the users' emails and API tokens here as JSON.")
+
+    def handle(self, *args, **options):
+        if not 1 <= options['movements'] <= len(MOVEMENTS):
+            raise CommandError(f"--movements must be between 1 and {len(MOVEMENTS)}.")
+        if options['logs'] > options['movements']:
+            raise CommandError("--logs cannot exceed --movements.")
+        end_date = options['end_date'] or datetime.date.today()
+        end = datetime.datetime.combine(end_date, datetime.time(), tzinfo=datetime.timezone.utc)
+        emails = [f"{options['email_prefix']}{i}@example.com" for i in range(options['users'])]
+        password = make_password(options['password'])
+
+        User.objects.filter(email__in=emails).delete()
+        tokens = []
+        for i, email in enumerate(emails):
+            with transaction.atomic():
+                user = User.objects.create(email=email, password=password)
+                self.seed_user(user, random.Random(f"{options['seed']}:{i}"), end, options)
+                tokens.append({'email': email, 'token': Token.objects.create(user=user).key})
+            self.stdout.write(f"Seeded {email}.")
+
+        if options['tokens_file']:
+            with open(options['tokens_file'], 'w') as stream:
+                json.dump(tokens, stream, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(emails)} users with {options['workouts']} workouts of {options['logs']} logs each."
+        ))
+
+    def seed_user(self, user, rng, end, options):
+        strength = rng.uniform(0.6, 1.4)
+        catalogue = MOVEMENTS[:options['movements']]
+        movements = [
+            Movement(author=user, name=name, resistance_type=resistance_type, body_part=body_part)
+            for name, resistance_type, body_part, _ in catalogue
+        ]
+        base_loads = {movement.id: load and load * strength for movement, (*_, load) in zip(movements, catalogue)}
+
+        workouts, workout_movements, logs = [], [], []
+        for index in range(options['workouts']):
+            day = end - datetime.timedelta(days=2 * (options['workouts'] - index))
+            start = day + datetime.timedelta(hours=rng.randint(6, 20), minutes=rng.randrange(0, 60, 5))
+            workout = Workout(user=user, start_timestamp=start, end_timestamp=start + datetime.timedelta(minutes=75))
+            workouts.append(workout)
+            # Loads creep up by about a fifth over the whole history.
+            progress = 1 + 0.2 * index / max(options['workouts'], 1)
+            for order, movement in enumerate(rng.sample(movements, options['logs'])):
+                workout_movement = WorkoutMovement(workout=workout, movement=movement, order=order)
+                workout_movements.append(workout_movement)
+                base_load = base_loads[movement.id]
+                logs.append(MovementLog(
+                    workout_movement=workout_movement, user=user, movement=movement,
+                    sets=synthetic_sets(rng, base_load and base_load * progress),
+                    timestamp=start + datetime.timedelta(minutes=10 * (order + 1)),
+                ))
+
+        # Written like api.importer: in bulk, with the derived rows rebuilt once.
+        UserDataVersion.stamp(user.pk, [*movements, *workouts, *workout_movements, *logs])
+        Movement.objects.bulk_create(movements)
+        Workout.objects.bulk_create(workouts, batch_size=1000)
+        WorkoutMovement.objects.bulk_create(workout_movements, batch_size=1000)
+        MovementLog.objects.bulk_create(logs, batch_size=1000)
+        movement_ids = [movement.id for movement in movements]
+        Movement.refresh_last_logs(movement_ids)
+        PersonalRecord.refresh(movement_ids)
+        WeeklyVolume.refresh_users([user.pk])
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_alter_workout_start_timestamp'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movement',
+            name='last_log',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.movementlog'),
+        ),
+        migrations.AddField(
+            model_name='movement',
+            name='last_logged_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE api_movement m
+            SET last_log_id = latest.id, last_logged_at = latest.timestamp
+            FROM (
+                SELECT DISTINCT ON (wm.movement_id) wm.movement_id, ml.id, ml.timestamp
+                FROM api_movementlog ml
+                JOIN api_workoutmovement wm ON wm.id = ml.workout_movement_id
+                ORDER BY wm.movement_id, ml.timestamp DESC
+            ) latest
+            WHERE m.id = latest.movement_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_movement_last_log_movement_last_logged_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movementlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='movementlog_timestamp_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['user', '-start_timestamp', '-id'], name='workout_user_start_id_idx'),
+        ),
+    ]
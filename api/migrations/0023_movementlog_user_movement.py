@@ -0,0 +1,71 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_user_and_movement(apps, schema_editor):
+    # Each batch commits on its own (the migration is non-atomic) so the
+    # backfill never holds row locks on the whole table. Batches walk the
+    # primary key, so none rescans the rows earlier ones filled.
+    with schema_editor.connection.cursor() as cursor:
+        last_id = -1
+        while True:
+            cursor.execute(
+                """
+                UPDATE api_movementlog ml
+                SET user_id = w.user_id, movement_id = wm.movement_id
+                FROM api_workoutmovement wm
+                JOIN api_workout w ON w.id = wm.workout_id
+                WHERE wm.id = ml.workout_movement_id
+                  AND ml.id IN (
+                      SELECT id FROM api_movementlog
+                      WHERE id > %s
+                      ORDER BY id
+                      LIMIT %s
+                  )
+                RETURNING ml.id
+                """,
+                [last_id, BACKFILL_BATCH_SIZE],
+            )
+            updated = [row[0] for row in cursor.fetchall()]
+            if not updated:
+                break
+            last_id = max(updated)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('api', '0022_movementlog_movementlog_timestamp_id_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movementlog',
+            name='movement',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='movement_logs', to='api.movement'),
+        ),
+        migrations.AddField(
+            model_name='movementlog',
+            name='user',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='movement_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_user_and_movement, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='movementlog',
+            index=models.Index(fields=['user', '-timestamp', '-id'], name='movementlog_user_ts_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='movementlog',
+            index=models.Index(fields=['movement', '-timestamp', '-id'], name='movementlog_movement_ts_id_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='movementlog',
+            name='movementlog_timestamp_id_idx',
+        ),
+    ]
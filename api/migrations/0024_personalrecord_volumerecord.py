@@ -0,0 +1,96 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:07
+
+import django.db.models.deletion
+import lumberjacked.utils
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+from api.models import best_sessions, estimated_1rm
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def backfill_records(apps, schema_editor):
+    # Records of existing history, as PersonalRecord.refresh() computes
+    # them, one batch of movements per transaction (the migration is
+    # non-atomic). Each batch replaces the records of its movements, so an
+    # interrupted backfill can be re-run.
+    Movement = apps.get_model('api', 'Movement')
+    MovementLog = apps.get_model('api', 'MovementLog')
+    PersonalRecord = apps.get_model('api', 'PersonalRecord')
+    VolumeRecord = apps.get_model('api', 'VolumeRecord')
+    last_id = -1
+    while True:
+        movement_ids = list(
+            Movement.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:BACKFILL_BATCH_SIZE]
+        )
+        if not movement_ids:
+            break
+        last_id = movement_ids[-1]
+        logs = (
+            MovementLog.objects
+            .filter(movement_id__in=movement_ids, user__isnull=False)
+            .order_by('timestamp', 'id')
+            .values_list('id', 'user_id', 'movement_id', 'timestamp', 'sets')
+        )
+        records, volumes = best_sessions(logs.iterator(chunk_size=2000))
+        with transaction.atomic():
+            PersonalRecord.objects.filter(movement_id__in=movement_ids).delete()
+            VolumeRecord.objects.filter(movement_id__in=movement_ids).delete()
+            PersonalRecord.objects.bulk_create([
+                PersonalRecord(
+                    user_id=user_id, movement_id=movement_id, rep_count=reps, load=load,
+                    estimated_1rm=estimated_1rm(load, reps), movement_log_id=log_id, achieved_at=timestamp,
+                )
+                for (user_id, movement_id, reps), (load, log_id, timestamp) in records.items()
+            ], batch_size=1000)
+            VolumeRecord.objects.bulk_create([
+                VolumeRecord(
+                    user_id=user_id, movement_id=movement_id, volume=volume,
+                    movement_log_id=log_id, achieved_at=timestamp,
+                )
+                for (user_id, movement_id), (volume, log_id, timestamp) in volumes.items()
+            ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('api', '0023_movementlog_user_movement'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonalRecord',
+            fields=[
+                ('id', models.PositiveBigIntegerField(default=lumberjacked.utils.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('rep_count', models.PositiveIntegerField()),
+                ('load', models.FloatField()),
+                ('estimated_1rm', models.FloatField()),
+                ('achieved_at', models.DateTimeField()),
+                ('movement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_records', to='api.movement')),
+                ('movement_log', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.movementlog')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_records', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'movement', 'rep_count'), name='personalrecord_user_movement_reps_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='VolumeRecord',
+            fields=[
+                ('id', models.PositiveBigIntegerField(default=lumberjacked.utils.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('volume', models.FloatField()),
+                ('achieved_at', models.DateTimeField()),
+                ('movement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='volume_records', to='api.movement')),
+                ('movement_log', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.movementlog')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='volume_records', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'movement'), name='volumerecord_user_movement_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_records, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:10
+
+import django.db.models.deletion
+import lumberjacked.utils
+from django.conf import settings
+from django.db import migrations, models, transaction
+
+from api.models import weekly_totals
+from authn.models import time_zone
+
+BACKFILL_BATCH_SIZE = 100
+
+
+def backfill_weekly_volume(apps, schema_editor):
+    # Rollups of existing history, as WeeklyVolume.refresh_users() computes
+    # them, one batch of users per transaction (the migration is
+    # non-atomic). Each batch replaces the rows of its users, so an
+    # interrupted backfill can be re-run.
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    MovementLog = apps.get_model('api', 'MovementLog')
+    WeeklyVolume = apps.get_model('api', 'WeeklyVolume')
+    last_id = None
+    while True:
+        users = User.objects.order_by('id').only('id', 'timezone')
+        if last_id is not None:
+            users = users.filter(id__gt=last_id)
+        users = list(users[:BACKFILL_BATCH_SIZE])
+        if not users:
+            break
+        last_id = users[-1].id
+        with transaction.atomic():
+            WeeklyVolume.objects.filter(user__in=users).delete()
+            for user in users:
+                logs = (
+                    MovementLog.objects
+                    .filter(user=user)
+                    .values_list('timestamp', 'sets', 'movement__body_part')
+                )
+                totals = weekly_totals(logs.iterator(chunk_size=2000), time_zone(user.timezone))
+                WeeklyVolume.objects.bulk_create([
+                    WeeklyVolume(user=user, week=week, body_part=body_part, sets=set_count, reps=reps, tonnage=tonnage)
+                    for (week, body_part), (set_count, reps, tonnage) in totals.items()
+                ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('api', '0024_personalrecord_volumerecord'),
+        ('authn', '0002_user_timezone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklyVolume',
+            fields=[
+                ('id', models.PositiveBigIntegerField(default=lumberjacked.utils.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('week', models.DateField()),
+                ('body_part', models.CharField(blank=True, choices=[('full_body', 'Full Body'), ('upper_body', 'Upper Body'), ('lower_body', 'Lower Body'), ('core', 'Core'), ('chest', 'Chest'), ('back', 'Back'), ('shoulders', 'Shoulders'), ('arms', 'Arms'), ('glutes', 'Glutes'), ('quads', 'Quads'), ('hamstrings', 'Hamstrings'), ('calves', 'Calves'), ('hip_flexors', 'Hip Flexors'), ('adductors', 'Adductors'), ('abductors', 'Abductors'), ('upper_chest', 'Upper Chest'), ('lower_chest', 'Lower Chest'), ('lats', 'Lats'), ('traps', 'Traps'), ('rhomboids', 'Rhomboids'), ('lower_back', 'Lower Back'), ('front_delts', 'Front Delts'), ('side_delts', 'Side Delts'), ('rear_delts', 'Rear Delts'), ('biceps', 'Biceps'), ('triceps', 'Triceps'), ('forearms', 'Forearms'), ('glute_max', 'Glute Max'), ('glute_med', 'Glute Med'), ('gastrocnemius', 'Gastrocnemius'), ('soleus', 'Soleus'), ('rectus_abdominis', 'Rectus Abdominis'), ('obliques', 'Obliques'), ('transverse_abdominis', 'Transverse Abdominis')], max_length=25)),
+                ('sets', models.IntegerField(default=0)),
+                ('reps', models.IntegerField(default=0)),
+                ('tonnage', models.FloatField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_volume', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'week', 'body_part'), name='weeklyvolume_user_week_body_part_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_weekly_volume, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:40
+
+import django.db.models.deletion
+import django.utils.timezone
+import lumberjacked.utils
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_weeklyvolume'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movementlog',
+            name='updated_timestamp',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='movementlogtemplate',
+            name='updated_timestamp',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='updated_timestamp',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='workoutmovement',
+            name='updated_timestamp',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.PositiveBigIntegerField(default=lumberjacked.utils.generate_id, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=30)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('deleted_timestamp', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['user', 'deleted_timestamp'], name='tombstone_user_deleted_idx'),
+                    models.Index(fields=['deleted_timestamp'], name='tombstone_deleted_idx'),
+                ],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='movement',
+            index=models.Index(fields=['author', 'updated_timestamp'], name='movement_author_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movementlog',
+            index=models.Index(fields=['user', 'updated_timestamp'], name='movementlog_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movementlogtemplate',
+            index=models.Index(fields=['author', 'updated_timestamp'], name='mlt_author_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['user', 'updated_timestamp'], name='workout_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutmovement',
+            index=models.Index(fields=['updated_timestamp'], name='workoutmovement_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workouttemplate',
+            index=models.Index(fields=['author', 'updated_timestamp'], name='workouttemplate_author_upd_idx'),
+        ),
+    ]
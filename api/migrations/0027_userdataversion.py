@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0026_updated_timestamps_tombstone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDataVersion',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='data_version', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
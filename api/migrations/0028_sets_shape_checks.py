@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:41
+
+import api.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0027_userdataversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='movementlog',
+            constraint=models.CheckConstraint(condition=api.models.JSONPathMatch(models.F('sets'), models.Value('$.type() == "array" && !exists($[*] ? (!(@.type() == "object" && (@.reps.type() == "number" && @.reps >= 1 && @.reps == @.reps.floor()) && (!exists(@.load) || @.load.type() == "null" || @.load.type() == "number") && (@."type".type() == "string" && (@."type" == "warmup" || @."type" == "working" || @."type" == "dropset" || @."type" == "failure" || @."type" == "myoreps")) && (!exists(@.rest_time) || @.rest_time.type() == "null" || (@.rest_time.type() == "number" && @.rest_time >= 0 && @.rest_time == @.rest_time.floor())))))')), name='movementlog_sets_shape_check'),
+        ),
+        migrations.AddConstraint(
+            model_name='movementlogtemplate',
+            constraint=models.CheckConstraint(condition=api.models.JSONPathMatch(models.F('sets'), models.Value('$.type() == "array" && !exists($[*] ? (!(@.type() == "object" && (!exists(@.reps) || @.reps.type() == "null" || (@.reps.type() == "string" && @.reps like_regex "^[0-9]+(-[0-9]+)?$")) && (@."type".type() == "string" && (@."type" == "warmup" || @."type" == "working" || @."type" == "dropset" || @."type" == "failure" || @."type" == "myoreps")) && (!exists(@.rest_time) || @.rest_time.type() == "null" || (@.rest_time.type() == "number" && @.rest_time >= 0 && @.rest_time == @.rest_time.floor())))))')), name='mlt_sets_shape_check'),
+        ),
+    ]
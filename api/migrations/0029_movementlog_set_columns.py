@@ -0,0 +1,155 @@
+import api.models
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+BATCH_SIZE = 5000
+
+# SET_TYPE_CHOICES as of this migration; set_types holds indexes into it.
+SET_TYPES = ['warmup', 'working', 'dropset', 'failure', 'myoreps']
+
+
+def sets_to_columns(apps, schema_editor):
+    # Each batch commits on its own (the migration is non-atomic) so the
+    # backfill never holds row locks on the whole table. Numbers that JSON
+    # spelled with a fraction, like 5.0, are cast through numeric.
+    with schema_editor.connection.cursor() as cursor:
+        last_id = -1
+        while True:
+            cursor.execute(
+                """
+                UPDATE api_movementlog ml
+                SET set_reps = c.reps, set_loads = c.loads, set_types = c.types, set_rest_times = c.rest_times
+                FROM (
+                    SELECT b.id,
+                           COALESCE(ARRAY_AGG((e.value ->> 'reps')::numeric::integer ORDER BY e.n)
+                                    FILTER (WHERE e.n IS NOT NULL), '{}') AS reps,
+                           COALESCE(ARRAY_AGG((e.value ->> 'load')::float8 ORDER BY e.n)
+                                    FILTER (WHERE e.n IS NOT NULL), '{}') AS loads,
+                           COALESCE(ARRAY_AGG((array_position(%s::text[], e.value ->> 'type') - 1)::smallint ORDER BY e.n)
+                                    FILTER (WHERE e.n IS NOT NULL), '{}') AS types,
+                           COALESCE(ARRAY_AGG((e.value ->> 'rest_time')::numeric::integer ORDER BY e.n)
+                                    FILTER (WHERE e.n IS NOT NULL), '{}') AS rest_times
+                    FROM (
+                        SELECT id, sets FROM api_movementlog
+                        WHERE id > %s
+                        ORDER BY id
+                        LIMIT %s
+                    ) b
+                    LEFT JOIN LATERAL jsonb_array_elements(b.sets) WITH ORDINALITY AS e(value, n) ON true
+                    GROUP BY b.id
+                ) c
+                WHERE ml.id = c.id
+                RETURNING ml.id
+                """,
+                [SET_TYPES, last_id, BATCH_SIZE],
+            )
+            updated = [row[0] for row in cursor.fetchall()]
+            if not updated:
+                break
+            last_id = max(updated)
+
+
+def columns_to_sets(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        last_id = -1
+        while True:
+            cursor.execute(
+                """
+                UPDATE api_movementlog ml
+                SET sets = COALESCE((
+                    SELECT jsonb_agg(jsonb_build_object(
+                        'reps', s.reps, 'load', s.load, 'type', (%s::text[])[s.type + 1], 'rest_time', s.rest_time
+                    ) ORDER BY s.n)
+                    FROM unnest(ml.set_reps, ml.set_loads, ml.set_types, ml.set_rest_times)
+                        WITH ORDINALITY AS s(reps, load, type, rest_time, n)
+                ), '[]'::jsonb)
+                WHERE ml.id IN (
+                    SELECT id FROM api_movementlog
+                    WHERE id > %s
+                    ORDER BY id
+                    LIMIT %s
+                )
+                RETURNING ml.id
+                """,
+                [SET_TYPES, last_id, BATCH_SIZE],
+            )
+            updated = [row[0] for row in cursor.fetchall()]
+            if not updated:
+                break
+            last_id = max(updated)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('api', '0028_sets_shape_checks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movementlog',
+            name='set_reps',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), null=True, size=None),
+        ),
+        migrations.AddField(
+            model_name='movementlog',
+            name='set_loads',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), null=True, size=None),
+        ),
+        migrations.AddField(
+            model_name='movementlog',
+            name='set_types',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.SmallIntegerField(), null=True, size=None),
+        ),
+        migrations.AddField(
+            model_name='movementlog',
+            name='set_rest_times',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(null=True), null=True, size=None),
+        ),
+        migrations.RunPython(sets_to_columns, columns_to_sets),
+        migrations.AlterField(
+            model_name='movementlog',
+            name='set_reps',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None),
+        ),
+        migrations.AlterField(
+            model_name='movementlog',
+            name='set_loads',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(null=True), default=list, size=None),
+        ),
+        migrations.AlterField(
+            model_name='movementlog',
+            name='set_types',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.SmallIntegerField(), default=list, size=None),
+        ),
+        migrations.AlterField(
+            model_name='movementlog',
+            name='set_rest_times',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(null=True), default=list, size=None),
+        ),
+        migrations.RemoveConstraint(
+            model_name='movementlog',
+            name='movementlog_sets_shape_check',
+        ),
+        migrations.RemoveField(
+            model_name='movementlog',
+            name='sets',
+        ),
+        migrations.AddConstraint(
+            model_name='movementlog',
+            constraint=models.CheckConstraint(condition=api.models.EqualCardinality(models.F('set_reps'), models.F('set_loads'), models.F('set_types'), models.F('set_rest_times')), name='movementlog_set_arrays_aligned'),
+        ),
+        migrations.AddConstraint(
+            model_name='movementlog',
+            constraint=models.CheckConstraint(condition=api.models.ArrayElementsWithin(models.F('set_reps'), minimum=1), name='movementlog_set_reps_check'),
+        ),
+        migrations.AddConstraint(
+            model_name='movementlog',
+            constraint=models.CheckConstraint(condition=api.models.ArrayElementsWithin(models.F('set_types'), minimum=0, maximum=4), name='movementlog_set_types_check'),
+        ),
+        migrations.AddConstraint(
+            model_name='movementlog',
+            constraint=models.CheckConstraint(condition=api.models.ArrayElementsWithin(models.F('set_rest_times'), minimum=0, allow_null=True), name='movementlog_set_rest_times_check'),
+        ),
+    ]
@@ -0,0 +1,106 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0029_movementlog_set_columns'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='movement',
+            name='movement_author_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='movementlog',
+            name='movementlog_user_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='movementlogtemplate',
+            name='mlt_author_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tombstone',
+            name='tombstone_user_deleted_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='workout',
+            name='workout_user_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='workoutmovement',
+            name='workoutmovement_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='workouttemplate',
+            name='workouttemplate_author_upd_idx',
+        ),
+        migrations.AddField(
+            model_name='movement',
+            name='sync_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='movementlog',
+            name='sync_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='movementlogtemplate',
+            name='sync_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='sync_version',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='workout',
+            name='sync_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='workoutmovement',
+            name='sync_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='workouttemplate',
+            name='sync_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='movement',
+            index=models.Index(fields=['author', 'sync_version'], name='movement_author_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movementlog',
+            index=models.Index(fields=['user', 'sync_version'], name='movementlog_user_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movementlogtemplate',
+            index=models.Index(fields=['author', 'sync_version'], name='mlt_author_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['user', 'sync_version'], name='tombstone_user_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workout',
+            index=models.Index(fields=['user', 'sync_version'], name='workout_user_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workoutmovement',
+            index=models.Index(fields=['workout', 'sync_version'], name='wm_workout_sync_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workouttemplate',
+            index=models.Index(fields=['author', 'sync_version'], name='wtemplate_author_sync_idx'),
+        ),
+    ]
@@ -1,10 +1,159 @@
-from django.db import models
+import datetime
+
+from django.contrib.postgres.fields import ArrayField
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
 
 from authn.models import User
-from lumberjacked.utils import generate_id
+from lumberjacked.utils import ID_INSERT_ATTEMPTS, GeneratedIdMixin, IdCollisionError, generate_id
 
+# MovementLog.set_types stores indexes into this list: only append to it.
 SET_TYPE_CHOICES = ['warmup', 'working', 'dropset', 'failure', 'myoreps']
+SET_TYPE_CODES = {set_type: code for code, set_type in enumerate(SET_TYPE_CHOICES)}
+
+# The parallel arrays MovementLog stores its sets in, in pack_sets() order.
+SET_COLUMNS = ('set_reps', 'set_loads', 'set_types', 'set_rest_times')
+# Largest reps or rest_time the integer set_reps and set_rest_times hold.
+SET_INT_MAX = 2**31 - 1
+
+
+def pack_sets(sets):
+    """Split a list of sets into the MovementLog.set_* column arrays."""
+    return (
+        [s['reps'] for s in sets],
+        [s.get('load') for s in sets],
+        [SET_TYPE_CODES[s['type']] for s in sets],
+        [s.get('rest_time') for s in sets],
+    )
+
+
+def unpack_sets(reps, loads, types, rest_times):
+    """Rebuild the list of sets, in SetSerializer's shape, from the column arrays."""
+    return [
+        {'reps': set_reps, 'load': load, 'type': SET_TYPE_CHOICES[set_type], 'rest_time': rest_time}
+        for set_reps, load, set_type, rest_time in zip(reps, loads, types, rest_times)
+    ]
+
+
+class JSONPathMatch(models.Func):
+    """PostgreSQL jsonb_path_match(): the boolean result of a jsonpath predicate."""
+    function = 'jsonb_path_match'
+    template = '%(function)s(%(expressions)s::jsonpath)'
+    output_field = models.BooleanField()
+
+
+def _jsonpath_whole_number(path, minimum):
+    return f'({path}.type() == "number" && {path} >= {minimum} && {path} == {path}.floor())'
+
+
+def _jsonpath_optional(path, predicate):
+    return f'(!exists({path}) || {path}.type() == "null" || {predicate})'
+
+
+_JSONPATH_SET_TYPE = '(@."type".type() == "string" && ({}))'.format(
+    ' || '.join(f'@."type" == "{set_type}"' for set_type in SET_TYPE_CHOICES)
+)
+
+
+class ArrayElementsWithin(models.Func):
+    """
+    True when no element of an array lies outside [minimum, maximum]; either
+    bound may be None. NULL elements fail unless allow_null.
+    """
+    output_field = models.BooleanField()
+
+    def __init__(self, expression, minimum=None, maximum=None, allow_null=False):
+        super().__init__(expression)
+        self.minimum, self.maximum, self.allow_null = minimum, maximum, allow_null
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        conditions = []
+        if not self.allow_null:
+            conditions.append(f'array_position({sql}, NULL) IS NULL')
+        if self.minimum is not None:
+            conditions.append(f'{int(self.minimum)} <= ALL({sql})')
+        if self.maximum is not None:
+            conditions.append(f'{int(self.maximum)} >= ALL({sql})')
+        return '(%s)' % ' AND '.join(conditions), tuple(params) * len(conditions)
+
+
+class EqualCardinality(models.Func):
+    """True when all the given arrays have the same number of elements."""
+    output_field = models.BooleanField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        compiled = [compiler.compile(expression) for expression in self.source_expressions]
+        first_sql, first_params = compiled[0]
+        conditions, params = [], []
+        for sql, other_params in compiled[1:]:
+            conditions.append(f'cardinality({first_sql}) = cardinality({sql})')
+            params.extend([*first_params, *other_params])
+        return '(%s)' % ' AND '.join(conditions), params
+
+
+def sets_shape_check(name, element_predicate):
+    """
+    CHECK that sets is a JSON array whose elements all satisfy
+    element_predicate, a jsonpath predicate on @. Mirrors the compiled
+    validators in api.serializers, so rows written by trusted bulk paths
+    without serializer validation still have the shape readers expect.
+    """
+    return models.CheckConstraint(
+        condition=JSONPathMatch(
+            F('sets'), models.Value(f'$.type() == "array" && !exists($[*] ? (!({element_predicate})))'),
+        ),
+        name=name,
+    )
+
+
+# Each element: {reps?: "5"|"8-10"|null, type: SET_TYPE_CHOICES, rest_time?: int >= 0|null}.
+# Range bounds are only checked by TemplateSetSerializer.
+TEMPLATE_SET_PREDICATE = ' && '.join([
+    '@.type() == "object"',
+    _jsonpath_optional('@.reps', '(@.reps.type() == "string" && @.reps like_regex "^[0-9]+(-[0-9]+)?$")'),
+    _JSONPATH_SET_TYPE,
+    _jsonpath_optional('@.rest_time', _jsonpath_whole_number('@.rest_time', 0)),
+])
+
+
+class OwnedQuerySet(models.QuerySet):
+    """
+    QuerySet for models that declare an owner_field lookup path to the
+    owning User, so ownership can be enforced in SQL rather than per object.
+    """
+    def owned_by(self, user):
+        return self.filter(**{self.model.owner_field: user})
+
+
+def owner_id(instance):
+    """Follow the owner_field path of instance to the owning user's id."""
+    *path, owner = instance.owner_field.split('__')
+    for name in path:
+        instance = getattr(instance, name)
+    return getattr(instance, owner + '_id')
+
+
+class SyncedMixin:
+    """
+    For models with a sync_kind. save() bumps the owner's UserDataVersion
+    and stamps the row's sync_version with the new version in the same
+    transaction. The bump locks the user's version row until commit, so one
+    user's versions are handed out in commit order and delta sync can use
+    them as cursors. Paths that write with bulk_create() or update() stamp
+    the rows themselves, with UserDataVersion.stamp() or with the
+    sync_version of a row saved earlier in the same transaction.
+    """
+    def save(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            user_id = owner_id(self)
+            if user_id is not None:
+                self.sync_version = UserDataVersion.bump(user_id)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'sync_version'}
+            super().save(*args, **kwargs)
 
 
 class ResistanceType(models.TextChoices):
@@ -66,7 +215,7 @@ class BodyPart(models.TextChoices):
     TRANSVERSE_ABDOMINIS = 'transverse_abdominis', 'Transverse Abdominis'
 
 
-class Movement(models.Model):
+class Movement(SyncedMixin, GeneratedIdMixin, models.Model):
     id = models.PositiveBigIntegerField(default=generate_id, primary_key=True, editable=False)
     author = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
     name = models.CharField(max_length=200, blank=False)
@@ -75,55 +224,142 @@ class Movement(models.Model):
     body_part = models.CharField(max_length=25, blank=True, choices=BodyPart.choices)
     created_timestamp = models.DateTimeField(auto_now_add=True)
     updated_timestamp = models.DateTimeField(auto_now=True)
+    # UserDataVersion.version of the last write to the row (see SyncedMixin).
+    sync_version = models.PositiveBigIntegerField(default=0, editable=False)
+    # Denormalized pointer to the most recent MovementLog of this movement.
+    # Maintained by MovementLog.save() and the post_delete handler in api.signals.
+    last_log = models.ForeignKey('MovementLog', null=True, blank=True, editable=False, on_delete=models.SET_NULL, related_name='+')
+    last_logged_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    owner_field = 'author'
+    sync_kind = 'movements'
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'sync_version'], name='movement_author_sync_idx'),
+        ]
 
     def __str__(self):
         return "Movement (name: %s, user: %s)" % (self.name, self.author)
 
+    def save(self, *args, **kwargs):
+        body_part_changed = (
+            not self._state.adding
+            and Movement.objects.filter(pk=self.pk).exclude(body_part=self.body_part).exists()
+        )
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if body_part_changed:
+                # Every week this movement was logged in is rolled up under
+                # the old body part.
+                WeeklyVolume.refresh_users(
+                    MovementLog.objects.filter(movement=self).values_list('user_id', flat=True).distinct()
+                )
+
+    @classmethod
+    def refresh_last_logs(cls, movement_ids):
+        """
+        Recompute last_log and last_logged_at for the given movements from
+        their full log history.
+        """
+        movement_ids = set(movement_ids)
+        if not movement_ids:
+            return
+        latest = latest_logs_by_movement(movement_ids)
+        movements = [
+            cls(
+                pk=movement_id,
+                last_log=latest.get(movement_id),
+                last_logged_at=latest[movement_id].timestamp if movement_id in latest else None,
+            )
+            for movement_id in movement_ids
+        ]
+        cls.objects.bulk_update(movements, ['last_log', 'last_logged_at'])
 
-class Workout(models.Model):
+
+class Workout(SyncedMixin, GeneratedIdMixin, models.Model):
     id = models.PositiveBigIntegerField(default=generate_id, primary_key=True, editable=False)
     user = models.ForeignKey(User, null=True, on_delete=models.CASCADE)
     start_timestamp = models.DateTimeField(default=timezone.now)
     end_timestamp = models.DateTimeField(blank=True, null=True)
+    updated_timestamp = models.DateTimeField(auto_now=True)
+    sync_version = models.PositiveBigIntegerField(default=0, editable=False)
+
+    owner_field = 'user'
+    sync_kind = 'workouts'
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of a user's workout history.
+            models.Index(fields=['user', '-start_timestamp', '-id'], name='workout_user_start_id_idx'),
+            models.Index(fields=['user', 'sync_version'], name='workout_user_sync_idx'),
+        ]
 
     def __str__(self):
         return "Workout (date: %s, user: %s)" % (self.start_timestamp.date(), self.user)
 
 
-class MovementLogTemplate(models.Model):
+class MovementLogTemplate(SyncedMixin, GeneratedIdMixin, models.Model):
     id = models.PositiveBigIntegerField(default=generate_id, primary_key=True, editable=False)
     author = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
     name = models.CharField(max_length=200, blank=False)
     movement = models.ForeignKey('Movement', null=True, blank=True, on_delete=models.SET_NULL, related_name='templates')
     # Each element: {reps: str ("5" or "8-10"), type: "warmup"|"working"|"failure"|"myoreps"|"dropset", rest_time: int|null}
-    # Structure is enforced by TemplateSetSerializer.
+    # Structure is enforced by TemplateSetSerializer and mlt_sets_shape_check.
     sets = models.JSONField(default=list)
+    updated_timestamp = models.DateTimeField(auto_now=True)
+    sync_version = models.PositiveBigIntegerField(default=0, editable=False)
+
+    owner_field = 'author'
+    sync_kind = 'movement_log_templates'
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'sync_version'], name='mlt_author_sync_idx'),
+        ]
+        constraints = [
+            sets_shape_check('mlt_sets_shape_check', TEMPLATE_SET_PREDICATE),
+        ]
 
     def __str__(self):
         return "MovementLogTemplate (name: %s, user: %s)" % (self.name, self.author)
 
 
-class WorkoutTemplate(models.Model):
+class WorkoutTemplate(SyncedMixin, GeneratedIdMixin, models.Model):
     id = models.PositiveBigIntegerField(default=generate_id, primary_key=True, editable=False)
     author = models.ForeignKey(User, null=True, on_delete=models.SET_NULL)
     name = models.CharField(max_length=200, blank=False)
     created_timestamp = models.DateTimeField(auto_now_add=True)
     updated_timestamp = models.DateTimeField(auto_now=True)
+    sync_version = models.PositiveBigIntegerField(default=0, editable=False)
+
+    owner_field = 'author'
+    sync_kind = 'workout_templates'
+    objects = OwnedQuerySet.as_manager()
 
     class Meta:
         unique_together = [('author', 'name')]
+        indexes = [
+            models.Index(fields=['author', 'sync_version'], name='wtemplate_author_sync_idx'),
+        ]
 
     def __str__(self):
         return "WorkoutTemplate (name: %s, user: %s)" % (self.name, self.author)
 
 
-class WorkoutTemplateMovement(models.Model):
+class WorkoutTemplateMovement(GeneratedIdMixin, models.Model):
     id = models.PositiveBigIntegerField(default=generate_id, primary_key=True, editable=False)
     template = models.ForeignKey(WorkoutTemplate, on_delete=models.CASCADE, related_name='template_movements')
     movement = models.ForeignKey(Movement, on_delete=models.CASCADE)
     movement_log_template = models.ForeignKey(MovementLogTemplate, null=True, blank=True, on_delete=models.SET_NULL)
     order = models.PositiveIntegerField()
 
+    owner_field = 'template__author'
+    objects = OwnedQuerySet.as_manager()
+
     class Meta:
         ordering = ['order']
 
@@ -131,28 +367,675 @@ class WorkoutTemplateMovement(models.Model):
         return "WorkoutTemplateMovement (movement: %s, template: %s, order: %s)" % (self.movement, self.template, self.order)
 
 
-class WorkoutMovement(models.Model):
+class WorkoutMovement(SyncedMixin, GeneratedIdMixin, models.Model):
     id = models.PositiveBigIntegerField(default=generate_id, primary_key=True, editable=False)
     workout = models.ForeignKey(Workout, on_delete=models.CASCADE, related_name='workout_movements')
     movement = models.ForeignKey(Movement, on_delete=models.CASCADE, related_name='workout_movements')
     template = models.ForeignKey(MovementLogTemplate, null=True, blank=True, on_delete=models.SET_NULL)
     order = models.PositiveIntegerField()
+    updated_timestamp = models.DateTimeField(auto_now=True)
+    sync_version = models.PositiveBigIntegerField(default=0, editable=False)
+
+    owner_field = 'workout__user'
+    sync_kind = 'workout_movements'
+    objects = OwnedQuerySet.as_manager()
 
     class Meta:
         ordering = ['order']
+        indexes = [
+            # Delta sync, through the user's workouts.
+            models.Index(fields=['workout', 'sync_version'], name='wm_workout_sync_idx'),
+        ]
 
     def __str__(self):
         return "WorkoutMovement (movement: %s, workout: %s, order: %s)" % (self.movement, self.workout, self.order)
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if not adding:
+                self._sync_movement_log()
+
+    def _sync_movement_log(self):
+        # Keep the denormalized MovementLog.movement in step when the
+        # movement of a logged workout movement is swapped.
+        moved = MovementLog.objects.filter(workout_movement=self).exclude(movement_id=self.movement_id)
+        moved_logs = [
+            (movement_id, timestamp, unpack_sets(*columns), body_part)
+            for movement_id, timestamp, *columns, body_part
+            in moved.values_list('movement_id', 'timestamp', *SET_COLUMNS, 'movement__body_part')
+        ]
+        stale_movement_ids = {movement_id for movement_id, *_ in moved_logs}
+        if stale_movement_ids:
+            moved.update(movement_id=self.movement_id, sync_version=self.sync_version)
+            WeeklyVolume.adjust(self.workout.user, [
+                change
+                for _, timestamp, sets, body_part in moved_logs
+                for change in [(timestamp, sets, body_part, -1), (timestamp, sets, self.movement.body_part, 1)]
+            ])
+            Movement.refresh_last_logs(stale_movement_ids | {self.movement_id})
+            PersonalRecord.refresh(stale_movement_ids | {self.movement_id})
 
-class MovementLog(models.Model):
+
+class MovementLog(SyncedMixin, GeneratedIdMixin, models.Model):
     id = models.PositiveBigIntegerField(default=generate_id, primary_key=True, editable=False)
     workout_movement = models.OneToOneField(WorkoutMovement, on_delete=models.CASCADE, related_name='movement_log')
-    # Each element: {reps: int, load: float|null, type: "warmup"|"working"|"failure"|"myoreps"|"dropset", rest_time: int|null}
-    # Structure is enforced by SetSerializer.
-    sets = models.JSONField(default=list)
+    # Denormalized from workout_movement.workout.user and workout_movement.movement
+    # so that history queries and ownership checks stay on this table.
+    # Kept in sync by save() and WorkoutMovement.save().
+    user = models.ForeignKey(User, null=True, editable=False, db_index=False, on_delete=models.CASCADE, related_name='movement_logs')
+    movement = models.ForeignKey(Movement, null=True, editable=False, db_index=False, on_delete=models.CASCADE, related_name='movement_logs')
+    # The sets as parallel arrays, one element per set; read and written
+    # through the sets property as SetSerializer's list of dicts. Storing no
+    # per-set keys keeps rows small and lets SQL aggregate with unnest().
+    set_reps = ArrayField(models.IntegerField(), default=list)
+    set_loads = ArrayField(models.FloatField(null=True), default=list)
+    # Indexes into SET_TYPE_CHOICES.
+    set_types = ArrayField(models.SmallIntegerField(), default=list)
+    set_rest_times = ArrayField(models.IntegerField(null=True), default=list)
     notes = models.TextField(blank=True)
     timestamp = models.DateTimeField(blank=True, default=timezone.now)
+    updated_timestamp = models.DateTimeField(auto_now=True)
+    sync_version = models.PositiveBigIntegerField(default=0, editable=False)
+
+    owner_field = 'user'
+    sync_kind = 'movement_logs'
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # User history and keyset pagination of movement log history.
+            models.Index(fields=['user', '-timestamp', '-id'], name='movementlog_user_ts_id_idx'),
+            # Per-movement history and latest log lookups.
+            models.Index(fields=['movement', '-timestamp', '-id'], name='movementlog_movement_ts_id_idx'),
+            models.Index(fields=['user', 'sync_version'], name='movementlog_user_sync_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=EqualCardinality(*(F(column) for column in SET_COLUMNS)),
+                name='movementlog_set_arrays_aligned',
+            ),
+            models.CheckConstraint(
+                condition=ArrayElementsWithin(F('set_reps'), minimum=1),
+                name='movementlog_set_reps_check',
+            ),
+            models.CheckConstraint(
+                condition=ArrayElementsWithin(F('set_types'), minimum=0, maximum=len(SET_TYPE_CHOICES) - 1),
+                name='movementlog_set_types_check',
+            ),
+            models.CheckConstraint(
+                condition=ArrayElementsWithin(F('set_rest_times'), minimum=0, allow_null=True),
+                name='movementlog_set_rest_times_check',
+            ),
+        ]
 
     def __str__(self):
         return "MovementLog (movement: %s, date: %s)" % (self.workout_movement.movement, self.timestamp.date())
+
+    @property
+    def sets(self):
+        return unpack_sets(self.set_reps, self.set_loads, self.set_types, self.set_rest_times)
+
+    @sets.setter
+    def sets(self, sets):
+        self.set_reps, self.set_loads, self.set_types, self.set_rest_times = pack_sets(sets)
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        self.user_id = self.workout_movement.workout.user_id
+        self.movement_id = self.workout_movement.movement_id
+        if 'update_fields' in kwargs and kwargs['update_fields'] is not None:
+            update_fields = set(kwargs['update_fields'])
+            if 'sets' in update_fields:
+                update_fields.discard('sets')
+                update_fields.update(SET_COLUMNS)
+            kwargs['update_fields'] = {*update_fields, 'user', 'movement'}
+        with transaction.atomic():
+            previous = None
+            if not adding:
+                row = (
+                    MovementLog.objects
+                    .filter(pk=self.pk)
+                    .values_list('timestamp', *SET_COLUMNS, 'movement__body_part')
+                    .first()
+                )
+                if row is not None:
+                    timestamp, *columns, body_part = row
+                    previous = (timestamp, unpack_sets(*columns), body_part)
+            super().save(*args, **kwargs)
+            self._sync_last_log(adding)
+            self._sync_personal_records(adding)
+            self._sync_weekly_volume(previous)
+
+    def _sync_last_log(self, adding):
+        claimed = (
+            Movement.objects
+            .filter(pk=self.movement_id)
+            .filter(
+                Q(last_logged_at__isnull=True) | Q(last_logged_at__lt=self.timestamp)
+                | Q(last_logged_at=self.timestamp, last_log_id__lte=self.pk)
+            )
+            .update(last_log=self, last_logged_at=self.timestamp)
+        )
+        if adding:
+            return
+        # An edited log may have moved back in time or to another movement,
+        # so any other movement still pointing at it has to be recomputed.
+        stale = Movement.objects.filter(last_log=self)
+        if claimed:
+            stale = stale.exclude(pk=self.movement_id)
+        Movement.refresh_last_logs(stale.values_list('pk', flat=True))
+
+    def _sync_personal_records(self, adding):
+        if not adding:
+            # Records held by this log can only be raised in place; if its
+            # sets shrank, or it moved in time or to another movement, the
+            # affected movements are recomputed from their history.
+            heaviest, volume = session_records(self.sets)
+            held = list(PersonalRecord.objects.filter(movement_log=self))
+            held_volume = list(VolumeRecord.objects.filter(movement_log=self))
+            stale_movement_ids = {
+                record.movement_id
+                for record in held
+                if record.movement_id != self.movement_id
+                or record.achieved_at != self.timestamp
+                or heaviest.get(record.rep_count, 0) < record.load
+            } | {
+                record.movement_id
+                for record in held_volume
+                if record.movement_id != self.movement_id
+                or record.achieved_at != self.timestamp
+                or volume < record.volume
+            }
+            if stale_movement_ids:
+                PersonalRecord.refresh(stale_movement_ids | {self.movement_id})
+                return
+        PersonalRecord.record_log(self)
+
+
+    def _sync_weekly_volume(self, previous):
+        changes = [(self.timestamp, self.sets, self.workout_movement.movement.body_part, 1)]
+        if previous is not None:
+            changes.append((*previous, -1))
+        WeeklyVolume.adjust(self.workout_movement.workout.user, changes)
+
+    @classmethod
+    def bulk_record(cls, logs):
+        """
+        Insert new logs of one user with a single bulk_create and bring
+        what save() maintains up to date for them: last log pointers,
+        personal records, weekly volume and the user's data version. Each
+        log's workout_movement must have its workout and movement loaded.
+        """
+        if not logs:
+            return
+        for log in logs:
+            log.user_id = log.workout_movement.workout.user_id
+            log.movement_id = log.workout_movement.movement_id
+        user = logs[0].workout_movement.workout.user
+        newest = {}
+        for log in logs:
+            if log.movement_id not in newest or (
+                (log.timestamp, log.pk) > (newest[log.movement_id].timestamp, newest[log.movement_id].pk)
+            ):
+                newest[log.movement_id] = log
+        with transaction.atomic():
+            UserDataVersion.stamp(user.pk, logs)
+            cls.objects.bulk_create(logs)
+            for log in newest.values():
+                log._sync_last_log(adding=True)
+            for log in logs:
+                PersonalRecord.record_log(log)
+            WeeklyVolume.adjust(user, [
+                (log.timestamp, log.sets, log.workout_movement.movement.body_part, 1) for log in logs
+            ])
+
+
+def estimated_1rm(load, reps):
+    """Epley estimate of the one-rep max of a set."""
+    return load if reps == 1 else load * (1 + reps / 30)
+
+
+def session_records(sets):
+    """
+    Return ({rep_count: heaviest load}, session volume) for a list of sets.
+    Sets without a load (e.g. bodyweight) are ignored.
+    """
+    heaviest = {}
+    volume = 0.0
+    for s in sets:
+        reps, load = s.get('reps'), s.get('load')
+        if not reps or load is None:
+            continue
+        volume += reps * load
+        if reps not in heaviest or load > heaviest[reps]:
+            heaviest[reps] = load
+    return heaviest, volume
+
+
+def best_sessions(logs):
+    """
+    Fold (log id, user id, movement id, timestamp, sets) tuples, in
+    timestamp and id order, into the personal records
+    {(user id, movement id, rep count): (load, log id, timestamp)} and the
+    volume records {(user id, movement id): (volume, log id, timestamp)}
+    they hold. The earliest log wins ties.
+    """
+    records = {}
+    volumes = {}
+    for log_id, user_id, movement_id, timestamp, sets in logs:
+        heaviest, volume = session_records(sets)
+        for reps, load in heaviest.items():
+            key = (user_id, movement_id, reps)
+            if key not in records or load > records[key][0]:
+                records[key] = (load, log_id, timestamp)
+        if heaviest and ((user_id, movement_id) not in volumes or volume > volumes[user_id, movement_id][0]):
+            volumes[user_id, movement_id] = (volume, log_id, timestamp)
+    return records, volumes
+
+
+class PersonalRecord(GeneratedIdMixin, models.Model):
+    """
+    Heaviest load lifted for a rep count of a movement. Maintained
+    incrementally by MovementLog.save() and recomputed per movement by
+    refresh() when a record-holding log is deleted or shrinks.
+    """
+    id = models.PositiveBigIntegerField(default=generate_id, primary_key=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='personal_records')
+    movement = models.ForeignKey(Movement, on_delete=models.CASCADE, related_name='personal_records')
+    rep_count = models.PositiveIntegerField()
+    load = models.FloatField()
+    estimated_1rm = models.FloatField()
+    # SET_NULL so the post_delete handler in api.signals can find records
+    # whose log was deleted and recompute them.
+    movement_log = models.ForeignKey(MovementLog, null=True, on_delete=models.SET_NULL, related_name='+')
+    achieved_at = models.DateTimeField()
+
+    owner_field = 'user'
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'movement', 'rep_count'], name='personalrecord_user_movement_reps_uniq'),
+        ]
+
+    def __str__(self):
+        return "PersonalRecord (movement: %s, reps: %s, load: %s)" % (self.movement_id, self.rep_count, self.load)
+
+    @classmethod
+    def record_log(cls, log):
+        """Raise the records of log's movement with the sets of log."""
+        heaviest, volume = session_records(log.sets)
+        if not heaviest:
+            return
+        existing = {
+            record.rep_count: record.load
+            for record in cls.objects.filter(user_id=log.user_id, movement_id=log.movement_id, rep_count__in=heaviest)
+        }
+        improved = [
+            cls(
+                user_id=log.user_id, movement_id=log.movement_id, rep_count=reps, load=load,
+                estimated_1rm=estimated_1rm(load, reps), movement_log=log, achieved_at=log.timestamp,
+            )
+            for reps, load in heaviest.items()
+            if reps not in existing or load > existing[reps]
+        ]
+        if improved:
+            cls._upsert(improved)
+        VolumeRecord.objects.filter(
+            user_id=log.user_id, movement_id=log.movement_id, volume__lt=volume,
+        ).update(volume=volume, movement_log=log, achieved_at=log.timestamp)
+        VolumeRecord.objects.get_or_create(
+            user_id=log.user_id, movement_id=log.movement_id,
+            defaults={'volume': volume, 'movement_log': log, 'achieved_at': log.timestamp},
+        )
+
+    @classmethod
+    def _upsert(cls, records):
+        """
+        Insert records or raise the ones they replace. The upsert only
+        resolves conflicts on the record key, so rows whose generated ID
+        turns out to be taken get a fresh one and go again, as in save().
+        """
+        for _ in range(ID_INSERT_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    cls.objects.bulk_create(
+                        records,
+                        update_conflicts=True,
+                        unique_fields=['user', 'movement', 'rep_count'],
+                        update_fields=['load', 'estimated_1rm', 'movement_log', 'achieved_at'],
+                    )
+                return
+            except IntegrityError:
+                taken = set(cls.objects.filter(pk__in=[r.pk for r in records]).values_list('pk', flat=True))
+                if not taken:
+                    raise
+                for record in records:
+                    if record.pk in taken:
+                        record.pk = generate_id()
+        raise IdCollisionError(f"No free {cls._meta.label} id after {ID_INSERT_ATTEMPTS} attempts.")
+
+    @classmethod
+    def refresh(cls, movement_ids):
+        """
+        Recompute personal and volume records of the given movements from
+        their full log history. The earliest log wins ties.
+        """
+        movement_ids = set(movement_ids)
+        if not movement_ids:
+            return
+        logs = (
+            MovementLog.objects
+            .filter(movement_id__in=movement_ids)
+            .order_by('timestamp', 'id')
+            .values_list('id', 'user_id', 'movement_id', 'timestamp', *SET_COLUMNS)
+        )
+        records, volumes = best_sessions(
+            (log_id, user_id, movement_id, timestamp, unpack_sets(*columns))
+            for log_id, user_id, movement_id, timestamp, *columns in logs.iterator(chunk_size=2000)
+        )
+        cls.objects.filter(movement_id__in=movement_ids).delete()
+        VolumeRecord.objects.filter(movement_id__in=movement_ids).delete()
+        cls.objects.bulk_create(
+            cls(
+                user_id=user_id, movement_id=movement_id, rep_count=reps, load=load,
+                estimated_1rm=estimated_1rm(load, reps), movement_log_id=log_id, achieved_at=timestamp,
+            )
+            for (user_id, movement_id, reps), (load, log_id, timestamp) in records.items()
+        )
+        VolumeRecord.objects.bulk_create(
+            VolumeRecord(
+                user_id=user_id, movement_id=movement_id, volume=volume, movement_log_id=log_id, achieved_at=timestamp,
+            )
+            for (user_id, movement_id), (volume, log_id, timestamp) in volumes.items()
+        )
+
+
+class VolumeRecord(GeneratedIdMixin, models.Model):
+    """
+    Highest single-session volume (reps x load) of a movement, maintained
+    alongside PersonalRecord.
+    """
+    id = models.PositiveBigIntegerField(default=generate_id, primary_key=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='volume_records')
+    movement = models.ForeignKey(Movement, on_delete=models.CASCADE, related_name='volume_records')
+    volume = models.FloatField()
+    movement_log = models.ForeignKey(MovementLog, null=True, on_delete=models.SET_NULL, related_name='+')
+    achieved_at = models.DateTimeField()
+
+    owner_field = 'user'
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'movement'], name='volumerecord_user_movement_uniq'),
+        ]
+
+    def __str__(self):
+        return "VolumeRecord (movement: %s, volume: %s)" % (self.movement_id, self.volume)
+
+
+def iso_week_start(timestamp, tz):
+    """Return the Monday of the ISO week containing timestamp in zone tz."""
+    day = timezone.localtime(timestamp, tz).date()
+    return day - datetime.timedelta(days=day.weekday())
+
+
+def training_volume(sets):
+    """Return (set count, reps, tonnage) of the non-warmup sets in sets."""
+    set_count = reps = 0
+    tonnage = 0.0
+    for s in sets:
+        if s.get('type') == 'warmup':
+            continue
+        set_count += 1
+        reps += s.get('reps') or 0
+        tonnage += (s.get('reps') or 0) * (s.get('load') or 0)
+    return set_count, reps, tonnage
+
+
+def weekly_totals(logs, tz):
+    """
+    Sum (timestamp, sets, body part) tuples of one user into
+    {(ISO week start, body part): (sets, reps, tonnage)}, skipping logs
+    without non-warmup sets.
+    """
+    totals = {}
+    for timestamp, sets, body_part in logs:
+        set_count, reps, tonnage = training_volume(sets)
+        if not set_count:
+            continue
+        key = (iso_week_start(timestamp, tz), body_part)
+        total = totals.get(key, (0, 0, 0.0))
+        totals[key] = (total[0] + set_count, total[1] + reps, total[2] + tonnage)
+    return totals
+
+
+class WeeklyVolume(GeneratedIdMixin, models.Model):
+    """
+    Non-warmup sets, reps and tonnage per user, ISO week (in the user's
+    time zone) and body part. Adjusted by deltas as MovementLogs are
+    created, edited and deleted so reads never touch the logged sets;
+    refresh_users() recomputes from history when week boundaries or body
+    parts shift wholesale.
+    """
+    id = models.PositiveBigIntegerField(default=generate_id, primary_key=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='weekly_volume')
+    # Monday of the ISO week.
+    week = models.DateField()
+    body_part = models.CharField(max_length=25, blank=True, choices=BodyPart.choices)
+    sets = models.IntegerField(default=0)
+    reps = models.IntegerField(default=0)
+    tonnage = models.FloatField(default=0)
+
+    owner_field = 'user'
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'week', 'body_part'], name='weeklyvolume_user_week_body_part_uniq'),
+        ]
+
+    def __str__(self):
+        return "WeeklyVolume (user: %s, week: %s, body part: %s)" % (self.user_id, self.week, self.body_part)
+
+    @classmethod
+    def adjust(cls, user, changes):
+        """
+        Apply (timestamp, sets, body_part, sign) changes for user, netting
+        them per row first so an edit within the same week is one UPDATE.
+        """
+        tz = user.tzinfo
+        deltas = {}
+        for timestamp, sets, body_part, sign in changes:
+            set_count, reps, tonnage = training_volume(sets)
+            key = (iso_week_start(timestamp, tz), body_part)
+            net = deltas.get(key, (0, 0, 0.0))
+            deltas[key] = (net[0] + sign * set_count, net[1] + sign * reps, net[2] + sign * tonnage)
+
+        for (week, body_part), (set_count, reps, tonnage) in deltas.items():
+            if not (set_count or reps or tonnage):
+                continue
+            rows = cls.objects.filter(user=user, week=week, body_part=body_part)
+            updated = rows.update(
+                sets=F('sets') + set_count,
+                reps=F('reps') + reps,
+                tonnage=F('tonnage') + tonnage,
+            )
+            if not updated and set_count > 0:
+                cls.objects.create(user=user, week=week, body_part=body_part, sets=set_count, reps=reps, tonnage=tonnage)
+            elif set_count < 0:
+                rows.filter(sets__lte=0).delete()
+
+    @classmethod
+    def refresh_users(cls, user_ids):
+        """Recompute the rollups of the given users from their full log history."""
+        for user in User.objects.filter(pk__in=set(user_ids)):
+            logs = (
+                MovementLog.objects
+                .filter(user=user)
+                .values_list('timestamp', *SET_COLUMNS, 'movement__body_part')
+            )
+            totals = weekly_totals(
+                (
+                    (timestamp, unpack_sets(*columns), body_part)
+                    for timestamp, *columns, body_part in logs.iterator(chunk_size=2000)
+                ),
+                user.tzinfo,
+            )
+            cls.objects.filter(user=user).delete()
+            cls.objects.bulk_create(
+                cls(user=user, week=week, body_part=body_part, sets=set_count, reps=reps, tonnage=tonnage)
+                for (week, body_part), (set_count, reps, tonnage) in totals.items()
+            )
+
+
+class UserDataVersion(models.Model):
+    """
+    Counter bumped by every write to a user's synced rows (see SyncedMixin),
+    used as the weak ETag of the user's list endpoints and as the delta sync
+    cursor. Kept off User so that saving a cached User object cannot move it
+    backwards.
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='data_version')
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return "UserDataVersion (user: %s, version: %s)" % (self.user_id, self.version)
+
+    @classmethod
+    def bump(cls, user_id):
+        """
+        Increment the user's version and return the new one. The row stays
+        locked until the transaction ends, so call this in the transaction
+        of the write it versions.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {cls._meta.db_table} SET version = version + 1 WHERE user_id = %s RETURNING version",
+                [user_id],
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            return row[0]
+        _, created = cls.objects.get_or_create(user_id=user_id, defaults={'version': 1})
+        return 1 if created else cls.bump(user_id)
+
+    @classmethod
+    def stamp(cls, user_id, rows):
+        """Bump the user's version and set it as the sync_version of rows before they are written."""
+        version = cls.bump(user_id)
+        for row in rows:
+            row.sync_version = version
+        return version
+
+    @classmethod
+    def current(cls, user_id):
+        return cls.objects.filter(user_id=user_id).values_list('version', flat=True).first() or 0
+
+
+class Tombstone(GeneratedIdMixin, models.Model):
+    """
+    Deletion of a synced row (a model with a sync_kind), kept so delta sync
+    can tell clients to drop it. Written by the post_delete handler in
+    api.signals and pruned by the prune_tombstones command.
+    """
+    id = models.PositiveBigIntegerField(default=generate_id, primary_key=True, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tombstones')
+    kind = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    deleted_timestamp = models.DateTimeField(default=timezone.now)
+    sync_version = models.PositiveBigIntegerField(default=0)
+
+    owner_field = 'user'
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'sync_version'], name='tombstone_user_sync_idx'),
+            models.Index(fields=['deleted_timestamp'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return "Tombstone (kind: %s, id: %s)" % (self.kind, self.object_id)
+
+
+def latest_logs_by_movement(movement_ids):
+    """
+    Return {movement_id: MovementLog} holding the most recent log of each
+    movement, resolved in a single query regardless of how many movements
+    are requested. Logs at the same time are ordered by id, as in history.
+    """
+    if not movement_ids:
+        return {}
+    logs = (
+        MovementLog.objects
+        .filter(movement_id__in=movement_ids)
+        .annotate(
+            recency=Window(
+                RowNumber(),
+                partition_by=F('movement_id'),
+                order_by=[F('timestamp').desc(), F('id').desc()],
+            ),
+        )
+        .filter(recency=1)
+    )
+    return {log.movement_id: log for log in logs}
+
+
+_PROGRESSION_SQL = """
+    SELECT ml.id,
+           ml.timestamp,
+           ml.set_reps, ml.set_loads, ml.set_types, ml.set_rest_times,
+           (ARRAY_AGG(s.n ORDER BY s.load DESC NULLS LAST, s.reps DESC))[1] AS top_set_number,
+           COALESCE(SUM(s.reps * s.load), 0) AS total_volume,
+           COUNT(*) FILTER (WHERE s.type <> {warmup}) AS working_sets,
+           MAX(CASE WHEN s.reps = 1 THEN s.load ELSE s.load * (1 + s.reps / 30.0::float8) END) AS estimated_1rm
+    FROM api_movementlog ml
+    CROSS JOIN LATERAL unnest(ml.set_reps, ml.set_loads, ml.set_types, ml.set_rest_times)
+        WITH ORDINALITY AS s(reps, load, type, rest_time, n)
+    WHERE {where}
+    GROUP BY ml.id, ml.timestamp
+    ORDER BY ml.timestamp, ml.id
+"""
+
+
+def movement_progression(movement_id, since=None, until=None, set_types=None):
+    """
+    Return one row per MovementLog of a movement, oldest first, with its top
+    set (heaviest load, then most reps), total volume (reps x load), number
+    of non-warmup sets and Epley estimated 1RM. Aggregation runs in Postgres
+    over the set arrays so only the per-session summary leaves the database.
+    Logs whose sets are all filtered out by set_types are omitted.
+    """
+    where = ["ml.movement_id = %s"]
+    params = [movement_id]
+    if since is not None:
+        where.append("ml.timestamp >= %s")
+        params.append(since)
+    if until is not None:
+        where.append("ml.timestamp < %s")
+        params.append(until)
+    if set_types:
+        where.append("s.type = ANY(%s::smallint[])")
+        params.append([SET_TYPE_CODES[set_type] for set_type in set_types])
+
+    sql = _PROGRESSION_SQL.format(where=" AND ".join(where), warmup=SET_TYPE_CODES['warmup'])
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'movement_log': log_id,
+            'timestamp': timestamp,
+            'top_set': unpack_sets(reps, loads, types, rest_times)[top_set_number - 1],
+            'total_volume': total_volume,
+            'working_sets': working_sets,
+            'estimated_1rm': estimated_1rm,
+        }
+        for (log_id, timestamp, reps, loads, types, rest_times, top_set_number,
+             total_volume, working_sets, estimated_1rm) in rows
+    ]
@@ -0,0 +1,145 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Field, Func, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    CursorPagination whose cursor holds every ordering field of the row it
+    stops at, not only the first, and seeks past that row with a row
+    comparison such as (timestamp, id) < (%s, %s). DRF's own cursor seeks on
+    the first field and steps over ties with an OFFSET, which rescans and
+    can skip or repeat rows when many share a timestamp, as imported logs
+    do. The ordering must be unique and use one direction throughout, so
+    that it matches a composite index.
+    """
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field_name in ordering:
+            field_name = field_name.lstrip('-')
+            value = instance[field_name] if isinstance(instance, dict) else getattr(instance, field_name)
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else value)
+        return json.dumps(values)
+
+    def seek(self, queryset, position, after):
+        """Keep the rows after position in the ordering, or before it."""
+        names = [field_name.lstrip('-') for field_name in self.ordering]
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(names):
+                raise ValueError
+            fields = [queryset.model._meta.get_field(name) for name in names]
+            values = [Value(field.to_python(value), output_field=field) for field, value in zip(fields, values)]
+        except (ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        descending = self.ordering[0].startswith('-')
+        lookup = 'lt' if after == descending else 'gt'
+        row = Func(*(F(name) for name in names), function='ROW', output_field=Field())
+        return queryset.alias(_keyset=row).filter(**{f'_keyset__{lookup}': Func(*values, function='ROW')})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # CursorPagination.paginate_queryset() with seek() in place of the
+        # filter on the first ordering field.
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            queryset = self.seek(queryset, current_position, after=not reverse)
+
+        # Positions are unique, so offsets only come from hand-made cursors.
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+class HistoryPagination(BasePagination):
+    """
+    Page-number pagination unless the client asks for ?pagination=cursor (or
+    follows a cursor link), in which case KeysetCursorPagination over
+    cursor_ordering is used. Cursor pages seek on an index instead of
+    counting and offsetting, so deep pages cost the same as the first.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_ordering = None
+
+    def __init__(self):
+        self.page_number_paginator = PageNumberPagination()
+        self.cursor_paginator = KeysetCursorPagination()
+        self.cursor_paginator.ordering = self.cursor_ordering
+        self.paginator = self.page_number_paginator
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or self.cursor_paginator.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.cursor_paginator if self.use_cursor(request) else self.page_number_paginator
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.paginator.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.page_number_paginator.get_schema_operation_parameters(view)
+            + self.cursor_paginator.get_schema_operation_parameters(view)
+        )
+
+
+class WorkoutHistoryPagination(HistoryPagination):
+    cursor_ordering = ('-start_timestamp', '-id')
+
+
+class MovementLogHistoryPagination(HistoryPagination):
+    cursor_ordering = ('-timestamp', '-id')
@@ -3,24 +3,24 @@ from rest_framework import permissions
 
 class IsMovementOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user
+        return obj.author_id == request.user.id
 
 class IsMovementLogOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.workout_movement.workout.user == request.user
+        return obj.user_id == request.user.id
 
 class IsWorkoutOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user
+        return obj.user_id == request.user.id
 
 class IsWorkoutMovementOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.workout.user == request.user
+        return obj.workout.user_id == request.user.id
 
 class IsMovementLogTemplateOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user
+        return obj.author_id == request.user.id
 
 class IsWorkoutTemplateOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user
+        return obj.author_id == request.user.id
@@ -0,0 +1,71 @@
+"""
+Per-request SQL query counts for load testing.
+
+With settings.QUERY_COUNT_HEADER on, QueryCountMiddleware reports the number
+of queries each request ran in an X-Query-Count response header, which
+benchmarks/load.py aggregates per endpoint. Queries are counted by an
+execute wrapper on every database connection against a counter held in a
+context variable, so queries run by async views through sync_to_async, in
+other threads, are counted too. The wrapper goes on each connection as it
+is opened, and on any the current thread already has open.
+"""
+import contextvars
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+HEADER = 'X-Query-Count'
+
+_counter = contextvars.ContextVar('query_counter', default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    counter = _counter.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def _install(sender, connection, **kwargs):
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+def _install_open():
+    for connection in connections.all(initialized_only=True):
+        _install(None, connection)
+
+
+class QueryCountMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        connection_created.connect(_install, dispatch_uid='api.query_count')
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        _install_open()
+        counter = [0]
+        token = _counter.set(counter)
+        try:
+            response = self.get_response(request)
+        finally:
+            _counter.reset(token)
+        response[HEADER] = str(counter[0])
+        return response
+
+    async def __acall__(self, request):
+        counter = [0]
+        token = _counter.set(counter)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _counter.reset(token)
+        response[HEADER] = str(counter[0])
+        return response
@@ -0,0 +1,106 @@
+"""
+Cache of serialized workout history responses.
+
+Entries are keyed by view, user, the user's data version (UserDataVersion,
+bumped by every write to the user's rows) and the full request path, so a
+write invalidates all of a user's entries at once without deleting any;
+superseded entries simply age out. Response data is cached rather than
+rendered bytes, so every renderer is served from the same entry.
+
+The version is read before the response is built. A write racing a miss can
+then only store newer data under an older version, which the next read no
+longer asks for. Responses built inside a batch (api.batch) are not stored,
+as the batch may still roll back the version bumps they were read under.
+
+Any Django cache backend works, including the local-memory, file and
+database ones, so a single node needs no external cache service. Hit and
+miss counts are kept per process.
+"""
+import hashlib
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from .models import UserDataVersion
+
+
+class ResponseCacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, view_name, hit):
+        with self._lock:
+            counts = self._counts.setdefault(view_name, {'hits': 0, 'misses': 0})
+            counts['hits' if hit else 'misses'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {view_name: dict(counts) for view_name, counts in self._counts.items()}
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+stats = ResponseCacheStats()
+
+
+def response_cache():
+    alias = settings.RESPONSE_CACHE_ALIAS
+    return caches[alias] if alias else None
+
+
+class ResponseCacheMixin:
+    """
+    For views whose GET output depends only on the requesting user's rows.
+    Wrap the building of a response in cached_response(), or
+    acached_response() on the async path; only 200 responses are stored.
+    Reuses the data version read by DataVersionETagMixin when both apply.
+    """
+    data_version = None
+
+    def response_cache_key(self, request):
+        path = hashlib.sha256(request.get_full_path().encode()).hexdigest()
+        return f"responses:{type(self).__name__}:{request.user.pk}:{self.data_version}:{path}"
+
+    def _respond(self, data):
+        stats.record(type(self).__name__, hit=data is not None)
+        return Response(data) if data is not None else None
+
+    def cached_response(self, request, build):
+        cache = response_cache()
+        if cache is None:
+            return build()
+        if self.data_version is None:
+            self.data_version = UserDataVersion.current(request.user.pk)
+        key = self.response_cache_key(request)
+        response = self._respond(cache.get(key))
+        if response is None:
+            response = build()
+            if response.status_code == 200 and not getattr(request, 'in_batch', False):
+                cache.set(key, response.data)
+            response['X-Response-Cache'] = 'miss'
+        else:
+            response['X-Response-Cache'] = 'hit'
+        return response
+
+    async def acached_response(self, request, abuild):
+        cache = response_cache()
+        if cache is None:
+            return await abuild()
+        if self.data_version is None:
+            self.data_version = await sync_to_async(UserDataVersion.current)(request.user.pk)
+        key = self.response_cache_key(request)
+        response = self._respond(await cache.aget(key))
+        if response is None:
+            response = await abuild()
+            if response.status_code == 200 and not getattr(request, 'in_batch', False):
+                await cache.aset(key, response.data)
+            response['X-Response-Cache'] = 'miss'
+        else:
+            response['X-Response-Cache'] = 'hit'
+        return response
@@ -1,17 +1,120 @@
 import re
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
 from rest_framework import serializers
 from .models import (
-    Movement, MovementLog, MovementLogTemplate,
+    Movement, MovementLog, MovementLogTemplate, PersonalRecord, VolumeRecord, WeeklyVolume,
     Workout, WorkoutMovement, WorkoutTemplate, WorkoutTemplateMovement,
-    SET_TYPE_CHOICES,
+    SET_INT_MAX, SET_TYPE_CHOICES,
 )
+from .batch import BATCH_METHODS, BATCH_MODES
+from .export import EXPORT_FORMATS
+
+
+_SET_TYPES = frozenset(SET_TYPE_CHOICES)
+# ASCII digits only, matching the CHECK constraint on MovementLogTemplate.sets.
+_REPS_RE = re.compile(r'[0-9]+')
+_REPS_RANGE_RE = re.compile(r'([0-9]+)-([0-9]+)')
+
+
+def _is_rest_time(value):
+    return value is None or (type(value) is int and 0 <= value <= SET_INT_MAX)
+
+
+def clean_sets(data):
+    """
+    SetSerializer(many=True) validation of canonical JSON input in one pass:
+    a list of dicts with int reps >= 1, numeric or null load, a known type
+    and null or int rest_time >= 0, ints at most SET_INT_MAX. Returns the validated list, or None if
+    anything else is found so the caller can fall back to field validation.
+    """
+    if type(data) is not list:
+        return None
+    cleaned = []
+    for item in data:
+        if type(item) is not dict:
+            return None
+        reps, set_type = item.get('reps'), item.get('type')
+        if not (type(reps) is int and 1 <= reps <= SET_INT_MAX and type(set_type) is str and set_type in _SET_TYPES):
+            return None
+        validated = {'reps': reps}
+        if 'load' in item:
+            load = item['load']
+            if load is not None:
+                if type(load) is not float and type(load) is not int:
+                    return None
+                load = float(load)
+            validated['load'] = load
+        validated['type'] = set_type
+        if 'rest_time' in item:
+            if not _is_rest_time(item['rest_time']):
+                return None
+            validated['rest_time'] = item['rest_time']
+        cleaned.append(validated)
+    return cleaned
+
+
+def _is_template_reps(value):
+    if value is None:
+        return True
+    if type(value) is not str:
+        return False
+    if _REPS_RE.fullmatch(value):
+        return int(value) >= 1
+    match = _REPS_RANGE_RE.fullmatch(value)
+    return match is not None and 1 <= int(match[1]) < int(match[2])
+
+
+def clean_template_sets(data):
+    """The clean_sets() equivalent for TemplateSetSerializer(many=True)."""
+    if type(data) is not list:
+        return None
+    cleaned = []
+    for item in data:
+        if type(item) is not dict:
+            return None
+        set_type = item.get('type')
+        if not (type(set_type) is str and set_type in _SET_TYPES):
+            return None
+        validated = {}
+        if 'reps' in item:
+            if not _is_template_reps(item['reps']):
+                return None
+            validated['reps'] = item['reps']
+        validated['type'] = set_type
+        if 'rest_time' in item:
+            if not _is_rest_time(item['rest_time']):
+                return None
+            validated['rest_time'] = item['rest_time']
+        cleaned.append(validated)
+    return cleaned
+
+
+class CompiledListSerializer(serializers.ListSerializer):
+    """
+    Validates through the child's compiled clean_many(data) when it accepts the
+    input, skipping the per-element field pipeline. Anything it rejects is
+    validated element by element as usual, which produces the errors.
+    """
+    def to_internal_value(self, data):
+        cleaned = self.child.clean_many(data)
+        if cleaned is None:
+            return super().to_internal_value(data)
+        return cleaned
 
 
 class SetSerializer(serializers.Serializer):
-    reps = serializers.IntegerField(min_value=1)
+    reps = serializers.IntegerField(min_value=1, max_value=SET_INT_MAX)
     load = serializers.FloatField(required=False, allow_null=True)
     type = serializers.ChoiceField(choices=SET_TYPE_CHOICES)
-    rest_time = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    rest_time = serializers.IntegerField(min_value=0, max_value=SET_INT_MAX, required=False, allow_null=True)
+
+    clean_many = staticmethod(clean_sets)
+
+    class Meta:
+        list_serializer_class = CompiledListSerializer
 
 
 class MovementSerializer(serializers.ModelSerializer):
@@ -35,7 +138,7 @@ class MovementSerializer(serializers.ModelSerializer):
 
 
 class MovementLogSerializer(serializers.ModelSerializer):
-    movement_detail = MovementSerializer(source='workout_movement.movement', read_only=True)
+    movement_detail = MovementSerializer(source='movement', read_only=True)
     sets = SetSerializer(many=True)
 
     class Meta:
@@ -55,6 +158,64 @@ class MovementLogSerializer(serializers.ModelSerializer):
         return value
 
 
+class MovementProgressionQuerySerializer(serializers.Serializer):
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    set_type = serializers.ListField(child=serializers.ChoiceField(choices=SET_TYPE_CHOICES), required=False)
+
+    def validate(self, data):
+        if 'since' in data and 'until' in data and data['since'] >= data['until']:
+            raise serializers.ValidationError("since must be earlier than until.")
+        return data
+
+
+class MovementProgressionSerializer(serializers.Serializer):
+    movement_log = serializers.IntegerField()
+    timestamp = serializers.DateTimeField()
+    top_set = SetSerializer()
+    total_volume = serializers.FloatField()
+    working_sets = serializers.IntegerField()
+    estimated_1rm = serializers.FloatField(allow_null=True)
+
+
+class PersonalRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PersonalRecord
+        fields = ['rep_count', 'load', 'estimated_1rm', 'movement_log', 'achieved_at']
+        read_only_fields = fields
+
+
+class VolumeRecordSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VolumeRecord
+        fields = ['volume', 'movement_log', 'achieved_at']
+        read_only_fields = fields
+
+
+class MovementRecordsSerializer(serializers.Serializer):
+    movement = serializers.IntegerField()
+    best_estimated_1rm = PersonalRecordSerializer(allow_null=True)
+    best_volume = VolumeRecordSerializer(allow_null=True)
+    records = PersonalRecordSerializer(many=True)
+
+
+class WeeklyVolumeQuerySerializer(serializers.Serializer):
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+
+
+class HistoryExportQuerySerializer(serializers.Serializer):
+    export_format = serializers.ChoiceField(choices=EXPORT_FORMATS, required=False, default='csv')
+    gzip = serializers.BooleanField(required=False, default=False)
+
+
+class WeeklyVolumeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WeeklyVolume
+        fields = ['week', 'body_part', 'sets', 'reps', 'tonnage']
+        read_only_fields = fields
+
+
 class WorkoutSerializer(serializers.ModelSerializer):
     class Meta:
         model = Workout
@@ -81,16 +242,21 @@ class LatestMovementLogSerializer(serializers.ModelSerializer):
 class TemplateSetSerializer(serializers.Serializer):
     reps = serializers.CharField(required=False, allow_null=True)
     type = serializers.ChoiceField(choices=SET_TYPE_CHOICES)
-    rest_time = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    rest_time = serializers.IntegerField(min_value=0, max_value=SET_INT_MAX, required=False, allow_null=True)
+
+    clean_many = staticmethod(clean_template_sets)
+
+    class Meta:
+        list_serializer_class = CompiledListSerializer
 
     def validate_reps(self, value):
         if value is None:
             return value
-        if re.fullmatch(r'\d+', value):
+        if _REPS_RE.fullmatch(value):
             if int(value) < 1:
                 raise serializers.ValidationError("Reps must be at least 1.")
-        elif re.fullmatch(r'\d+-\d+', value):
-            low, high = value.split('-')
+        elif match := _REPS_RANGE_RE.fullmatch(value):
+            low, high = match.groups()
             if int(low) < 1:
                 raise serializers.ValidationError("Reps range minimum must be at least 1.")
             if int(low) >= int(high):
@@ -105,8 +271,8 @@ class MovementLogTemplateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = MovementLogTemplate
-        fields = ['id', 'author', 'name', 'movement', 'sets']
-        read_only_fields = ['id', 'author']
+        fields = ['id', 'author', 'name', 'movement', 'sets', 'updated_timestamp']
+        read_only_fields = ['id', 'author', 'updated_timestamp']
 
     def validate_sets(self, value):
         if len(value) == 0:
@@ -157,6 +323,9 @@ class WorkoutMovementWithLatestLogSerializer(serializers.ModelSerializer):
     Like WorkoutMovementWithRecordedLogSerializer but shows the most recent log
     for the movement across all workouts, with a for_current_workout flag.
     Also includes the selected template.
+
+    Previous logs are read from the denormalized Movement.last_log pointer, so
+    the movement's last_log should be select_related by the caller.
     """
     class Meta:
         model = WorkoutMovement
@@ -170,12 +339,7 @@ class WorkoutMovementWithLatestLogSerializer(serializers.ModelSerializer):
             log = instance.movement_log
             log.for_current_workout = True
         except MovementLog.DoesNotExist:
-            log = (
-                MovementLog.objects
-                .filter(workout_movement__movement=instance.movement)
-                .order_by('-timestamp')
-                .first()
-            )
+            log = instance.movement.last_log
             if log:
                 log.for_current_workout = False
 
@@ -201,6 +365,9 @@ class WorkoutWithRecordedLogsSerializer(serializers.ModelSerializer):
 
     def get_movements_details(self, obj):
         wms = obj.workout_movements.all()
+        if 'workout_movements' not in getattr(obj, '_prefetched_objects_cache', {}):
+            # Freshly created or updated workouts are not prefetched by the view.
+            wms = wms.select_related('movement', 'template', 'movement_log')
         return WorkoutMovementWithRecordedLogSerializer(wms, many=True, context=self.context).data
 
     def validate(self, attrs):
@@ -210,16 +377,36 @@ class WorkoutWithRecordedLogsSerializer(serializers.ModelSerializer):
                 "Provide either template or movements, not both."
             )
 
+        request = self.context.get('request')
+
+        if attrs.get('movements'):
+            movement_ids = set(attrs['movements'])
+            owned = set(
+                Movement.objects
+                .filter(id__in=movement_ids, author=request.user)
+                .values_list('id', flat=True)
+            )
+            offending = movement_ids - owned
+            if offending:
+                raise serializers.ValidationError(
+                    {"movements": [f"Movement {mid} does not exist or is not owned by you." for mid in sorted(offending)]}
+                )
+
         if self.instance is None:
             # Validate template movements are still owned by the user
             template = attrs.get('template')
             if template:
-                request = self.context.get('request')
-                for tm in template.template_movements.select_related('movement').order_by('order'):
-                    if not Movement.objects.filter(id=tm.movement_id, author=request.user).exists():
-                        raise serializers.ValidationError(
-                            {"template": f"Movement '{tm.movement.name}' no longer exists or is not owned by you."}
-                        )
+                self._template_movements = list(
+                    template.template_movements.select_related('movement').order_by('order')
+                )
+                offending = [tm.movement for tm in self._template_movements if tm.movement.author_id != request.user.id]
+                if offending:
+                    raise serializers.ValidationError(
+                        {"template": [
+                            f"Movement '{movement.name}' no longer exists or is not owned by you."
+                            for movement in offending
+                        ]}
+                    )
             return attrs
 
         # Update only: prevent removing movements with logs
@@ -239,25 +426,35 @@ class WorkoutWithRecordedLogsSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    @transaction.atomic
     def create(self, validated_data):
         template = validated_data.pop('template', None)
         movement_ids = validated_data.pop('movements', [])
         workout = super().create(validated_data)
 
         if template:
-            for tm in template.template_movements.select_related('movement', 'movement_log_template').order_by('order'):
-                WorkoutMovement.objects.create(
+            wms = [
+                WorkoutMovement(
                     workout=workout,
-                    movement=tm.movement,
-                    template=tm.movement_log_template,
+                    movement_id=tm.movement_id,
+                    template_id=tm.movement_log_template_id,
                     order=tm.order,
                 )
+                for tm in self._template_movements
+            ]
         else:
-            for order, movement_id in enumerate(movement_ids):
-                WorkoutMovement.objects.create(workout=workout, movement_id=movement_id, order=order)
+            wms = [
+                WorkoutMovement(workout=workout, movement_id=movement_id, order=order)
+                for order, movement_id in enumerate(movement_ids)
+            ]
+        # Written in the transaction that just versioned the workout.
+        for wm in wms:
+            wm.sync_version = workout.sync_version
+        WorkoutMovement.objects.bulk_create(wms)
 
         return workout
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         validated_data.pop('template', None)
         movement_ids = validated_data.pop('movements', None)
@@ -266,16 +463,26 @@ class WorkoutWithRecordedLogsSerializer(serializers.ModelSerializer):
         if movement_ids is not None:
             existing = {wm.movement_id: wm for wm in instance.workout_movements.all()}
             removed = set(existing.keys()) - set(movement_ids)
-            instance.workout_movements.filter(movement_id__in=removed).delete()
+            if removed:
+                instance.workout_movements.filter(movement_id__in=removed).delete()
 
+            reordered, added = [], []
+            now = timezone.now()
             for order, mid in enumerate(movement_ids):
                 if mid in existing:
                     wm = existing[mid]
                     if wm.order != order:
                         wm.order = order
-                        wm.save(update_fields=['order'])
+                        wm.updated_timestamp = now
+                        wm.sync_version = instance.sync_version
+                        reordered.append(wm)
                 else:
-                    WorkoutMovement.objects.create(workout=instance, movement_id=mid, order=order)
+                    added.append(WorkoutMovement(
+                        workout=instance, movement_id=mid, order=order, sync_version=instance.sync_version,
+                    ))
+            # bulk_update() does not touch auto_now fields.
+            WorkoutMovement.objects.bulk_update(reordered, ['order', 'updated_timestamp', 'sync_version'])
+            WorkoutMovement.objects.bulk_create(added)
 
         return instance
 
@@ -289,10 +496,98 @@ class WorkoutWithLatestLogsSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_movements_details(self, obj):
-        wms = obj.workout_movements.select_related('movement', 'template', 'movement_log').order_by('order')
+        wms = obj.workout_movements.all()
+        if 'workout_movements' not in getattr(obj, '_prefetched_objects_cache', {}):
+            wms = wms.select_related('movement', 'movement__last_log', 'template', 'movement_log').order_by('order')
         return WorkoutMovementWithLatestLogSerializer(wms, many=True, context=self.context).data
 
 
+class FinishedMovementLogSerializer(serializers.Serializer):
+    """Write-only serializer for each log in a WorkoutFinishSerializer batch."""
+    workout_movement = serializers.IntegerField()
+    sets = SetSerializer(many=True)
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+    timestamp = serializers.DateTimeField(required=False)
+
+    def validate_sets(self, value):
+        if len(value) == 0:
+            raise serializers.ValidationError("At least one set is required.")
+        return value
+
+
+class WorkoutFinishSerializer(serializers.ModelSerializer):
+    """
+    Records the movement logs of a workout and ends it in one transaction.
+    The workout movements of all logs are checked in one query and the logs
+    are written with MovementLog.bulk_record(). Logs without a timestamp,
+    and the workout when end_timestamp is omitted, are stamped with the
+    time of the request. Overlapping finishes of one workout, such as a
+    retried request, are serialized on the workout row, and the one that
+    goes second fails validation.
+    """
+    ALREADY_LOGGED = "Workout movement already has a movement log."
+
+    logs = FinishedMovementLogSerializer(many=True, write_only=True)
+    end_timestamp = serializers.DateTimeField(required=False)
+
+    class Meta:
+        model = Workout
+        fields = ['id', 'user', 'logs', 'start_timestamp', 'end_timestamp']
+        read_only_fields = ['id', 'user', 'start_timestamp']
+
+    def validate_logs(self, logs):
+        workout_movements = {
+            wm.id: wm
+            for wm in (
+                WorkoutMovement.objects
+                .filter(workout=self.instance, id__in={log['workout_movement'] for log in logs})
+                .select_related('workout__user', 'movement')
+                .annotate(logged=Exists(MovementLog.objects.filter(workout_movement=OuterRef('pk'))))
+            )
+        }
+        errors, seen = [], set()
+        for log in logs:
+            wm = workout_movements.get(log['workout_movement'])
+            if wm is None:
+                errors.append({'workout_movement': ["Workout movement is not part of this workout."]})
+            elif wm.logged or wm.id in seen:
+                errors.append({'workout_movement': [self.ALREADY_LOGGED]})
+            else:
+                errors.append({})
+                seen.add(wm.id)
+                log['workout_movement'] = wm
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return logs
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        # validate_logs() ran unlocked; check again now that a finish that
+        # raced it has committed.
+        Workout.objects.select_for_update().filter(pk=instance.pk).values_list('pk').get()
+        logged = set(
+            MovementLog.objects
+            .filter(workout_movement__in=[log['workout_movement'] for log in validated_data['logs']])
+            .values_list('workout_movement_id', flat=True)
+        )
+        if logged:
+            raise serializers.ValidationError({'logs': [
+                {'workout_movement': [self.ALREADY_LOGGED]} if log['workout_movement'].id in logged else {}
+                for log in validated_data['logs']
+            ]})
+        now = timezone.now()
+        MovementLog.bulk_record([
+            MovementLog(
+                workout_movement=log['workout_movement'], sets=log['sets'], notes=log['notes'],
+                timestamp=log.get('timestamp', now),
+            )
+            for log in validated_data['logs']
+        ])
+        instance.end_timestamp = validated_data.get('end_timestamp', now)
+        instance.save()
+        return instance
+
+
 class WorkoutTemplateMovementItemSerializer(serializers.Serializer):
     """Write-only serializer for each movement item in a WorkoutTemplate."""
     movement = serializers.PrimaryKeyRelatedField(queryset=Movement.objects.all())
@@ -317,6 +612,96 @@ class WorkoutTemplateMovementSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class TemplateMovementReconciliation:
+    """
+    Diffs the desired movement items of a WorkoutTemplate against its stored
+    WorkoutTemplateMovements and applies the result with one bulk statement
+    per kind of change.
+
+    Each item is a dict with 'movement' and optionally 'movement_log_template'
+    or 'sets', as produced by WorkoutTemplateMovementItemSerializer. An item
+    with sets rewrites the sets of its existing MovementLogTemplate or creates
+    a new one. MovementLogTemplates released by the template are deleted once
+    no WorkoutTemplateMovement references them anymore. Apply it in the
+    transaction that saved the template: the MovementLogTemplates it writes
+    take the template's sync_version.
+    """
+    def __init__(self, template, items, author):
+        existing = {
+            wtm.movement_id: wtm
+            for wtm in template.template_movements.select_related('movement_log_template')
+        }
+        previous_mlt_ids = {wtm.movement_log_template_id for wtm in existing.values()} - {None}
+        kept_mlt_ids = set()
+
+        self.mlts_to_create, self.mlts_to_update = [], []
+        self.wtms_to_create, self.wtms_to_update = [], []
+
+        for order, item in enumerate(items):
+            movement = item['movement']
+            existing_wtm = existing.pop(movement.id, None)
+            current_mlt = existing_wtm.movement_log_template if existing_wtm else None
+
+            if 'movement_log_template' in item:
+                mlt = item['movement_log_template']
+            elif item.get('sets'):
+                sets_json = [
+                    {'reps': s.get('reps'), 'type': s['type'], 'rest_time': s.get('rest_time')}
+                    for s in item['sets']
+                ]
+                if current_mlt:
+                    mlt = current_mlt
+                    mlt.sets = sets_json
+                    mlt.updated_timestamp = timezone.now()
+                    mlt.sync_version = template.sync_version
+                    self.mlts_to_update.append(mlt)
+                else:
+                    mlt = MovementLogTemplate(
+                        author=author,
+                        name=f"{movement.name} Template",
+                        movement=movement,
+                        sets=sets_json,
+                        sync_version=template.sync_version,
+                    )
+                    self.mlts_to_create.append(mlt)
+            else:
+                mlt = None
+
+            mlt_id = mlt.pk if mlt else None
+            if mlt_id is not None:
+                kept_mlt_ids.add(mlt_id)
+
+            if existing_wtm is None:
+                self.wtms_to_create.append(WorkoutTemplateMovement(
+                    template=template,
+                    movement=movement,
+                    movement_log_template=mlt,
+                    order=order,
+                ))
+            elif existing_wtm.movement_log_template_id != mlt_id or existing_wtm.order != order:
+                existing_wtm.movement_log_template = mlt
+                existing_wtm.order = order
+                self.wtms_to_update.append(existing_wtm)
+
+        # Whatever is left over was dropped from the template.
+        self.wtms_to_delete = list(existing.values())
+        # Candidates only; templates still used by other WorkoutTemplates survive.
+        self.released_mlt_ids = previous_mlt_ids - kept_mlt_ids
+
+    def apply(self):
+        MovementLogTemplate.objects.bulk_create(self.mlts_to_create)
+        MovementLogTemplate.objects.bulk_update(self.mlts_to_update, ['sets', 'updated_timestamp', 'sync_version'])
+        if self.wtms_to_delete:
+            WorkoutTemplateMovement.objects.filter(pk__in=[wtm.pk for wtm in self.wtms_to_delete]).delete()
+        WorkoutTemplateMovement.objects.bulk_update(self.wtms_to_update, ['movement_log_template', 'order'])
+        WorkoutTemplateMovement.objects.bulk_create(self.wtms_to_create)
+        if self.released_mlt_ids:
+            still_used = WorkoutTemplateMovement.objects.filter(
+                movement_log_template_id__in=self.released_mlt_ids
+            ).values('movement_log_template_id')
+            MovementLogTemplate.objects.filter(pk__in=self.released_mlt_ids).exclude(pk__in=still_used).delete()
+
+
 class WorkoutTemplateSerializer(serializers.ModelSerializer):
     movements = WorkoutTemplateMovementItemSerializer(many=True, write_only=True, required=False)
     source_workout = serializers.PrimaryKeyRelatedField(
@@ -381,122 +766,87 @@ class WorkoutTemplateSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    @transaction.atomic
     def create(self, validated_data):
         source_workout = validated_data.pop('source_workout', None)
         movements_data = validated_data.pop('movements', None)
         template = super().create(validated_data)
 
         if source_workout:
-            for wm in source_workout.workout_movements.select_related('movement', 'template').order_by('order'):
-                WorkoutTemplateMovement.objects.create(
-                    template=template,
-                    movement=wm.movement,
-                    movement_log_template=wm.template,
-                    order=wm.order,
-                )
-        else:
-            request = self.context.get('request')
-            for order, item in enumerate(movements_data):
-                movement = item['movement']
-                sets_data = item.get('sets')
-
-                if 'movement_log_template' in item:
-                    movement_log_template = item['movement_log_template']
-                elif sets_data:
-                    movement_log_template = MovementLogTemplate.objects.create(
-                        author=request.user,
-                        name=f"{movement.name} Template",
-                        movement=movement,
-                        sets=[{'reps': s.get('reps'), 'type': s['type'], 'rest_time': s.get('rest_time')} for s in sets_data],
-                    )
-                else:
-                    movement_log_template = None
-
-                WorkoutTemplateMovement.objects.create(
-                    template=template,
-                    movement=movement,
-                    movement_log_template=movement_log_template,
-                    order=order,
-                )
+            movements_data = [
+                {'movement': wm.movement, 'movement_log_template': wm.template}
+                for wm in source_workout.workout_movements.select_related('movement', 'template').order_by('order')
+            ]
+        TemplateMovementReconciliation(template, movements_data, author=self.context['request'].user).apply()
 
         return template
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         validated_data.pop('source_workout', None)
         movements_data = validated_data.pop('movements', None)
         instance = super().update(instance, validated_data)
 
         if movements_data is not None:
-            request = self.context.get('request')
-
-            existing_wtms = {
-                wtm.movement_id: wtm
-                for wtm in instance.template_movements.select_related('movement_log_template').all()
-            }
-            new_movement_ids = {item['movement'].id for item in movements_data}
-
-            for movement_id, wtm in existing_wtms.items():
-                if movement_id not in new_movement_ids:
-                    mlt = wtm.movement_log_template
-                    wtm.delete()
-                    if mlt:
-                        still_used = WorkoutTemplateMovement.objects.filter(
-                            movement_log_template=mlt
-                        ).exists()
-                        if not still_used:
-                            mlt.delete()
-
-            for order, item in enumerate(movements_data):
-                movement = item['movement']
-                sets_data = item.get('sets')
-                existing_wtm = existing_wtms.get(movement.id)
-
-                if 'movement_log_template' in item:
-                    movement_log_template = item['movement_log_template']
-                    if existing_wtm and existing_wtm.movement_log_template and existing_wtm.movement_log_template != movement_log_template:
-                        old_mlt = existing_wtm.movement_log_template
-                        still_used = WorkoutTemplateMovement.objects.filter(
-                            movement_log_template=old_mlt
-                        ).exclude(id=existing_wtm.id).exists()
-                        if not still_used:
-                            old_mlt.delete()
-                elif sets_data:
-                    sets_json = [
-                        {'reps': s.get('reps'), 'type': s['type'], 'rest_time': s.get('rest_time')}
-                        for s in sets_data
-                    ]
-                    if existing_wtm and existing_wtm.movement_log_template:
-                        mlt = existing_wtm.movement_log_template
-                        mlt.sets = sets_json
-                        mlt.save(update_fields=['sets'])
-                        movement_log_template = mlt
-                    else:
-                        movement_log_template = MovementLogTemplate.objects.create(
-                            author=request.user,
-                            name=f"{movement.name} Template",
-                            movement=movement,
-                            sets=sets_json,
-                        )
-                else:
-                    movement_log_template = None
-                    if existing_wtm and existing_wtm.movement_log_template:
-                        mlt = existing_wtm.movement_log_template
-                        still_used = WorkoutTemplateMovement.objects.filter(
-                            movement_log_template=mlt
-                        ).exclude(id=existing_wtm.id).exists()
-                        if not still_used:
-                            mlt.delete()
-
-                if existing_wtm:
-                    existing_wtm.movement_log_template = movement_log_template
-                    existing_wtm.order = order
-                    existing_wtm.save(update_fields=['movement_log_template', 'order'])
-                else:
-                    WorkoutTemplateMovement.objects.create(
-                        template=instance,
-                        movement=movement,
-                        movement_log_template=movement_log_template,
-                        order=order,
-                    )
+            TemplateMovementReconciliation(instance, movements_data, author=self.context['request'].user).apply()
 
         return instance
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=BATCH_METHODS)
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False, allow_null=True, default=None)
+
+
+class BatchSerializer(serializers.Serializer):
+    mode = serializers.ChoiceField(choices=BATCH_MODES, required=False, default='atomic')
+    requests = BatchSubRequestSerializer(many=True, allow_empty=False)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # Enforced before any sub-request is validated.
+        fields['requests'].max_length = settings.BATCH_MAX_REQUESTS
+        return fields
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    since = serializers.RegexField(r'^\d+(\.\d+)?$', required=False)
+
+
+class SyncWorkoutSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Workout
+        fields = ['id', 'start_timestamp', 'end_timestamp', 'updated_timestamp']
+        read_only_fields = fields
+
+
+class SyncWorkoutMovementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WorkoutMovement
+        fields = ['id', 'workout', 'movement', 'template', 'order', 'updated_timestamp']
+        read_only_fields = fields
+
+
+class SyncMovementLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MovementLog
+        fields = ['id', 'workout_movement', 'sets', 'notes', 'timestamp', 'updated_timestamp']
+        read_only_fields = fields
+
+
+class SyncWorkoutTemplateMovementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WorkoutTemplateMovement
+        fields = ['movement', 'movement_log_template', 'order']
+        read_only_fields = fields
+
+
+class SyncWorkoutTemplateSerializer(serializers.ModelSerializer):
+    """Templates with their movements flattened to ids; expects template_movements prefetched."""
+    movements = SyncWorkoutTemplateMovementSerializer(source='template_movements', many=True, read_only=True)
+
+    class Meta:
+        model = WorkoutTemplate
+        fields = ['id', 'name', 'movements', 'created_timestamp', 'updated_timestamp']
+        read_only_fields = fields
@@ -0,0 +1,101 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from authn.models import User
+
+from .models import (
+    Movement, MovementLog, MovementLogTemplate, PersonalRecord, Tombstone, UserDataVersion, VolumeRecord,
+    WeeklyVolume, Workout, WorkoutMovement, WorkoutTemplate,
+    owner_id,
+)
+
+# Clients drop these rows along with their deleted parent, so rows deleted
+# by cascading from one of the parents need no tombstones of their own.
+_CASCADED_ON_CLIENTS = {
+    WorkoutMovement: (Workout,),
+    MovementLog: (Workout, WorkoutMovement),
+}
+
+
+@receiver(post_delete, sender=MovementLog)
+def refresh_movement_last_log(sender, instance, **kwargs):
+    # Movement.last_log is SET_NULL, so a movement whose pointer was just
+    # cleared still carries a stale last_logged_at and needs to fall back
+    # to its next most recent log.
+    stale = Movement.objects.filter(
+        pk=instance.movement_id,
+        last_log__isnull=True,
+        last_logged_at__isnull=False,
+    )
+    Movement.refresh_last_logs(stale.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=MovementLog)
+def refresh_personal_records(sender, instance, **kwargs):
+    # Record log pointers are SET_NULL as well; only movements that lost a
+    # record holder are recomputed.
+    orphaned = (
+        PersonalRecord.objects.filter(movement_id=instance.movement_id, movement_log__isnull=True).exists()
+        or VolumeRecord.objects.filter(movement_id=instance.movement_id, movement_log__isnull=True).exists()
+    )
+    if orphaned:
+        PersonalRecord.refresh([instance.movement_id])
+
+
+@receiver(post_delete, sender=MovementLog)
+def subtract_weekly_volume(sender, instance, **kwargs):
+    if instance.user_id is None:
+        return
+    WeeklyVolume.adjust(instance.user, [(instance.timestamp, instance.sets, instance.movement.body_part, -1)])
+
+
+@receiver(pre_save, sender=User)
+def detect_timezone_change(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or (update_fields is not None and 'timezone' not in update_fields):
+        return
+    instance._timezone_changed = User.objects.filter(pk=instance.pk).exclude(timezone=instance.timezone).exists()
+
+
+@receiver(post_save, sender=User)
+def rebuild_weekly_volume(sender, instance, **kwargs):
+    # Week boundaries move with the time zone, so every rollup is stale.
+    if getattr(instance, '_timezone_changed', False):
+        instance._timezone_changed = False
+        WeeklyVolume.refresh_users([instance.pk])
+
+
+def _origin_model(origin):
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+@receiver(post_delete)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    kind = getattr(sender, 'sync_kind', None)
+    if kind is None:
+        return
+    origin_model = _origin_model(origin)
+    # Tombstones of a deleted user would be deleted with it.
+    if origin_model is User or origin_model in _CASCADED_ON_CLIENTS.get(sender, ()):
+        return
+    user_id = owner_id(instance)
+    if user_id is not None:
+        Tombstone.objects.create(
+            user_id=user_id, kind=kind, object_id=instance.pk, sync_version=UserDataVersion.bump(user_id),
+        )
+
+
+@receiver(pre_delete, sender=Movement)
+@receiver(pre_delete, sender=MovementLogTemplate)
+def touch_workout_templates(sender, instance, origin=None, **kwargs):
+    # Deleting either one cascades to or clears WorkoutTemplateMovements,
+    # which are synced as part of their WorkoutTemplate.
+    if _origin_model(origin) is User:
+        return
+    lookup = 'template_movements__movement' if sender is Movement else 'template_movements__movement_log_template'
+    templates = WorkoutTemplate.objects.filter(**{lookup: instance})
+    for author_id in templates.order_by().values_list('author_id', flat=True).distinct():
+        templates.filter(author_id=author_id).update(
+            updated_timestamp=timezone.now(), sync_version=UserDataVersion.bump(author_id),
+        )
@@ -0,0 +1,109 @@
+"""
+Delta sync for offline clients.
+
+A sync returns the user's rows of every model with a sync_kind that were
+created or updated after the cursor, plus the ids of those deleted after it
+(from Tombstone), so its cost follows the number of changes rather than the
+size of the history. Without a cursor everything is returned. Clients apply
+rows as upserts.
+
+Rows and tombstones carry the UserDataVersion of the transaction that wrote
+them (see SyncedMixin). Bumping the version locks the user's version row
+until commit, so versions become visible in order, and every version up to
+the one read at the start of a sync is committed. Cursors are that version
+and the time of the sync in microseconds since the epoch, "<version>.<time>";
+the time only serves to expire cursors older than the tombstones. Cursors
+of the earlier time-only form have expired.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .models import (
+    Movement, MovementLog, MovementLogTemplate, Tombstone, UserDataVersion, Workout, WorkoutMovement,
+    WorkoutTemplate, WorkoutTemplateMovement,
+)
+from .serializers import (
+    MovementSerializer, MovementLogTemplateSerializer,
+    SyncMovementLogSerializer, SyncWorkoutSerializer, SyncWorkoutMovementSerializer,
+    SyncWorkoutTemplateSerializer,
+)
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class SyncCursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Sync cursor has expired; sync again without since."
+    default_code = 'sync_cursor_expired'
+
+
+def encode_cursor(version, moment):
+    return f"{version}.{(moment - _EPOCH) // datetime.timedelta(microseconds=1)}"
+
+
+def decode_cursor(cursor):
+    """Return the version and time of a cursor."""
+    version, dot, micros = cursor.partition('.')
+    if not dot:
+        raise SyncCursorExpired()
+    return int(version), _EPOCH + datetime.timedelta(microseconds=int(micros))
+
+
+def tombstone_retention():
+    return datetime.timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+
+
+def _synced_querysets(user):
+    return [
+        (Movement, Movement.objects.owned_by(user), MovementSerializer),
+        (Workout, Workout.objects.owned_by(user), SyncWorkoutSerializer),
+        (WorkoutMovement, WorkoutMovement.objects.owned_by(user), SyncWorkoutMovementSerializer),
+        (MovementLog, MovementLog.objects.owned_by(user), SyncMovementLogSerializer),
+        (MovementLogTemplate, MovementLogTemplate.objects.owned_by(user), MovementLogTemplateSerializer),
+        (
+            WorkoutTemplate,
+            WorkoutTemplate.objects.owned_by(user).prefetch_related(
+                Prefetch('template_movements', queryset=WorkoutTemplateMovement.objects.order_by('order')),
+            ),
+            SyncWorkoutTemplateSerializer,
+        ),
+    ]
+
+
+def changes_since(user, cursor=None):
+    """
+    Return the sync payload of user for the given cursor: one list of rows
+    per sync kind, the deleted ids per kind and the next cursor.
+    """
+    now = timezone.now()
+    since = None
+    if cursor is not None:
+        since, synced_at = decode_cursor(cursor)
+        if synced_at < now - tombstone_retention():
+            raise SyncCursorExpired()
+
+    # Read first: rows committed while the sync runs are sent again next time.
+    payload = {'cursor': encode_cursor(UserDataVersion.current(user.pk), now)}
+    deleted = {}
+    for model, queryset, serializer_class in _synced_querysets(user):
+        if since is not None:
+            queryset = queryset.filter(sync_version__gt=since)
+        payload[model.sync_kind] = serializer_class(queryset.order_by('sync_version', 'id'), many=True).data
+        deleted[model.sync_kind] = []
+
+    if since is not None:
+        tombstones = (
+            Tombstone.objects
+            .filter(user=user, sync_version__gt=since)
+            .order_by('sync_version')
+            .values_list('kind', 'object_id')
+        )
+        for kind, object_id in tombstones:
+            deleted.setdefault(kind, []).append(object_id)
+    payload['deleted'] = deleted
+    return payload
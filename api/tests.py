@@ -1,15 +1,42 @@
+import csv
 import datetime
+import gzip
+import inspect
+import io
+import json
+import os
+import tempfile
 from dateutil import parser
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, models, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 import pytz
+from rest_framework.pagination import CursorPagination
+from rest_framework.serializers import ListSerializer
 from rest_framework.test import APITestCase
 from rest_framework import status
-from unittest import mock
+from unittest import mock, skipUnless
 from urllib.parse import urlencode
 
-from .models import Movement, MovementLog, MovementLogTemplate, Workout, WorkoutMovement, WorkoutTemplate, WorkoutTemplateMovement
+from .importer import HistoryImporter
+from .models import (
+    SET_COLUMNS, SET_TYPE_CHOICES, Movement, MovementLog, MovementLogTemplate, PersonalRecord, Tombstone,
+    UserDataVersion, VolumeRecord, WeeklyVolume, Workout, WorkoutMovement, WorkoutTemplate, WorkoutTemplateMovement,
+)
+from .response_cache import stats as response_cache_stats
+from .serializers import (
+    CompiledListSerializer, SetSerializer, TemplateSetSerializer, WorkoutFinishSerializer, clean_sets,
+    clean_template_sets,
+)
+from .sync import encode_cursor
 from authn.models import User
+from lumberjacked.utils import ID_EPOCH_MS, ID_TICK_MS, ID_TICK_SHIFT, IdCollisionError, IdGenerator
 
 
 class MovementTests(APITestCase):
@@ -90,7 +117,7 @@ class MovementTests(APITestCase):
         self.client.force_authenticate(user=alt_user)
 
         response = self.client.get(self.detail_url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_retrieve_nonexistent_movement_fails(self):
         url = reverse('movement-detail', kwargs={'id': 123})
@@ -179,9 +206,12 @@ class WorkoutTests(APITestCase):
         cls.list_url = reverse('workout-list')
         cls.detail_url = reverse('workout-detail', kwargs={'id': cls.workout.id})
         cls.end_url = reverse('workout-end', kwargs={'id': cls.workout.id})
+        cls.finish_url = reverse('workout-finish', kwargs={'id': cls.workout.id})
         cls.current_url = reverse('workout-current')
 
     def setUp(self):
+        # Data versions roll back with each test but cached responses do not.
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
         self.client.force_authenticate(user=self.user)
 
     def tearDown(self):
@@ -195,6 +225,7 @@ class WorkoutTests(APITestCase):
         self.assertEqual(self.client.put(self.detail_url, data={}).status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertEqual(self.client.delete(self.detail_url).status_code, status.HTTP_401_UNAUTHORIZED)
         self.assertEqual(self.client.get(self.end_url).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.client.post(self.finish_url, data={}).status_code, status.HTTP_401_UNAUTHORIZED)
 
     def test_list_workouts(self):
         response = self.client.get(self.list_url)
@@ -205,6 +236,55 @@ class WorkoutTests(APITestCase):
             [movement['id'] for movement in response.data['results'][0]['movements_details']],
             [self.movement1.id, self.movement2.id])
 
+    @mock.patch.object(CursorPagination, 'page_size', 2)
+    def test_list_workouts_cursor_pagination(self):
+        older = [
+            Workout.objects.create(user=self.user, start_timestamp=timezone.now() - datetime.timedelta(days=days))
+            for days in range(1, 5)
+        ]
+        seen = []
+        url = f"{self.list_url}?pagination=cursor"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(workout['id'] for workout in response.data['results'])
+            url = response.data['next']
+        self.assertListEqual(seen, [self.workout.id] + [workout.id for workout in older])
+
+    @mock.patch.object(CursorPagination, 'page_size', 2)
+    def test_list_workouts_cursor_pagination_seeks_past_ties(self):
+        start = timezone.now() - datetime.timedelta(days=1)
+        tied = [Workout.objects.create(user=self.user, start_timestamp=start) for _ in range(5)]
+        expected = [self.workout.id] + sorted((workout.id for workout in tied), reverse=True)
+
+        pages = []
+        url = f"{self.list_url}?pagination=cursor"
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertFalse(any('OFFSET' in query['sql'] for query in queries))
+            pages.append(response.data)
+            url = response.data['next']
+        self.assertListEqual([workout['id'] for page in pages for workout in page['results']], expected)
+
+        seen = [workout['id'] for workout in pages[-1]['results']]
+        url = pages[-1]['previous']
+        while url:
+            response = self.client.get(url)
+            seen = [workout['id'] for workout in response.data['results']] + seen
+            url = response.data['previous']
+        self.assertListEqual(seen, expected)
+
+    def test_list_workouts_invalid_cursor_fails(self):
+        response = self.client.get(self.list_url, {'cursor': 'cD1ub3QtanNvbg=='})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_workouts_page_out_of_range_fails(self):
+        response = self.client.get(f"{self.list_url}?page=2")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_list_workouts_alt_user(self):
         alt_user = User.objects.create_user(email="alt@example.com", password="altpassword")
         self.client.force_authenticate(user=alt_user)
@@ -230,7 +310,7 @@ class WorkoutTests(APITestCase):
         self.client.force_authenticate(user=alt_user)
 
         response = self.client.get(self.detail_url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_retrieve_nonexistent_workout_fails(self):
         url = reverse('workout-detail', kwargs={'id': 123})
@@ -284,6 +364,90 @@ class WorkoutTests(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_finish_workout(self):
+        wm1, wm2 = self.workout.workout_movements.order_by('order')
+        end = datetime.datetime(2022, 3, 12, 1, 0, 0, tzinfo=pytz.utc)
+        data = {
+            'end_timestamp': end.isoformat(),
+            'logs': [
+                {'workout_movement': wm1.id, 'sets': [{'reps': 5, 'load': 100.0, 'type': 'working'}]},
+                {
+                    'workout_movement': wm2.id, 'notes': "Paused",
+                    'sets': [{'reps': 8, 'load': 60.0, 'type': 'warmup'}, {'reps': 3, 'load': 80.0, 'type': 'working'}],
+                },
+            ],
+        }
+        response = self.client.post(self.finish_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(parser.isoparse(response.data['end_timestamp']), end)
+        self.assertListEqual(
+            [d['recorded_log']['sets'][0]['reps'] for d in response.data['movements_details']], [5, 8])
+
+        self.workout.refresh_from_db()
+        self.assertEqual(self.workout.end_timestamp, end)
+        log = MovementLog.objects.get(workout_movement=wm2)
+        self.assertEqual((log.user_id, log.movement_id, log.notes), (self.user.id, self.movement2.id, "Paused"))
+        self.movement1.refresh_from_db()
+        self.assertEqual(self.movement1.last_log, MovementLog.objects.get(workout_movement=wm1))
+        self.assertEqual(
+            set(PersonalRecord.objects.filter(user=self.user).values_list('movement', 'rep_count', 'load')),
+            {(self.movement1.id, 5, 100.0), (self.movement2.id, 8, 60.0), (self.movement2.id, 3, 80.0)})
+        self.assertEqual(WeeklyVolume.objects.get(user=self.user).sets, 2)
+
+    def test_finish_workout_rejects_invalid_logs_atomically(self):
+        wm1, wm2 = self.workout.workout_movements.order_by('order')
+        other_workout = Workout.objects.create(user=self.user)
+        other_wm = WorkoutMovement.objects.create(workout=other_workout, movement=self.movement1, order=0)
+        sets = [{'reps': 5, 'load': 100.0, 'type': 'working'}]
+        data = {'logs': [
+            {'workout_movement': wm1.id, 'sets': sets},
+            {'workout_movement': other_wm.id, 'sets': sets},
+            {'workout_movement': wm1.id, 'sets': sets},
+        ]}
+        response = self.client.post(self.finish_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['logs'][0], {})
+        self.assertIn('workout_movement', response.data['logs'][1])
+        self.assertIn('workout_movement', response.data['logs'][2])
+
+        response = self.client.post(self.finish_url, {'logs': [{'workout_movement': wm2.id, 'sets': []}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('sets', response.data['logs'][0])
+
+        MovementLog.objects.create(workout_movement=wm2, sets=sets)
+        data = {'logs': [{'workout_movement': wm1.id, 'sets': sets}, {'workout_movement': wm2.id, 'sets': sets}]}
+        response = self.client.post(self.finish_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(MovementLog.objects.count(), 1)
+        self.workout.refresh_from_db()
+        self.assertIsNone(self.workout.end_timestamp)
+
+    def test_finish_workout_racing_a_finish_fails_validation(self):
+        wm1, wm2 = self.workout.workout_movements.order_by('order')
+        sets = [{'reps': 5, 'load': 100.0, 'type': 'working'}]
+        validate_logs = WorkoutFinishSerializer.validate_logs
+
+        def validate_logs_then_commit_other_finish(serializer, logs):
+            logs = validate_logs(serializer, logs)
+            MovementLog.objects.create(workout_movement=wm2, sets=sets)
+            return logs
+
+        data = {'logs': [{'workout_movement': wm1.id, 'sets': sets}, {'workout_movement': wm2.id, 'sets': sets}]}
+        with mock.patch.object(WorkoutFinishSerializer, 'validate_logs', validate_logs_then_commit_other_finish):
+            response = self.client.post(self.finish_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['logs'][0], {})
+        self.assertIn('workout_movement', response.data['logs'][1])
+        self.assertEqual(MovementLog.objects.count(), 1)
+        self.workout.refresh_from_db()
+        self.assertIsNone(self.workout.end_timestamp)
+
+    def test_finish_workout_alt_user_fails(self):
+        alt_user = User.objects.create_user(email="alt@example.com", password="altpassword")
+        self.client.force_authenticate(user=alt_user)
+        response = self.client.post(self.finish_url, {'logs': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_current_workout(self):
         self.client.get(self.end_url)  # end existing workout
 
@@ -351,6 +515,34 @@ class WorkoutTests(APITestCase):
         self.assertTrue(any(d['name'] == "Bench Press" for d in response.data['movements_details']))
         self.assertTrue(any(d['latest_log']['for_current_workout'] == False for d in response.data['movements_details']))
 
+    def test_current_workout_query_count_independent_of_movements(self):
+        self.client.get(self.end_url)  # end existing workout
+
+        def current_workout_with(movement_count):
+            workout = Workout.objects.create(user=self.user)
+            for order in range(movement_count):
+                movement = Movement.objects.create(name=f"Movement {movement_count}-{order}", author=self.user)
+                old_workout = Workout.objects.create(user=self.user, end_timestamp=timezone.now())
+                old_wm = WorkoutMovement.objects.create(workout=old_workout, movement=movement, order=0)
+                MovementLog.objects.create(
+                    workout_movement=old_wm,
+                    sets=[{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': 120}])
+                WorkoutMovement.objects.create(workout=workout, movement=movement, order=order)
+            return workout
+
+        # Data version, workout, workout movements.
+        workout = current_workout_with(2)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.current_url)
+        self.assertEqual(len(response.data['movements_details']), 2)
+        workout.delete()
+
+        current_workout_with(6)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.current_url)
+        self.assertEqual(len(response.data['movements_details']), 6)
+        self.assertTrue(all(d['latest_log']['for_current_workout'] == False for d in response.data['movements_details']))
+
     def test_current_workout_nonexistent_fails(self):
         self.client.get(self.end_url)  # end existing workout
         response = self.client.get(self.current_url)
@@ -440,7 +632,7 @@ class WorkoutMovementTests(APITestCase):
         alt_user = User.objects.create_user(email="alt4@example.com", password="altpassword")
         self.client.force_authenticate(user=alt_user)
         response = self.client.get(self.detail_url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_update_template(self):
         response = self.client.patch(self.detail_url, {'template': self.template.id}, format='json')
@@ -546,6 +738,19 @@ class MovementLogTests(APITestCase):
         self.assertEqual(response.data['count'], 1)
         self.assertEqual(response.data['results'][0]['workout_movement'], self.wm1.id)
 
+    @mock.patch.object(CursorPagination, 'page_size', 3)
+    def test_list_movement_logs_cursor_pagination(self):
+        seen = []
+        url = f"{self.list_url}?pagination=cursor"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(log['id'] for log in response.data['results'])
+            url = response.data['next']
+        self.assertCountEqual(seen, [
+            self.movement1_log1.id, self.movement2_log1.id, self.movement2_log2.id, self.movement2_log3.id])
+
     @mock.patch('django.utils.timezone.now',
             mock.Mock(return_value=datetime.datetime(2021, 3, 12, 0, 0, 0, tzinfo=pytz.utc)))
     def test_create_movement_log(self):
@@ -600,6 +805,20 @@ class MovementLogTests(APITestCase):
         response = self.client.post(self.list_url, {'workout_movement': new_wm.id, 'sets': sets}, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_movement_log_out_of_range_sets_fails(self):
+        new_workout = Workout.objects.create(user=self.user)
+        new_wm = WorkoutMovement.objects.create(workout=new_workout, movement=self.movement1, order=0)
+        for sets in [
+            [{'reps': 3000000000, 'load': 100.0, 'type': 'working', 'rest_time': 120}],
+            [{'reps': 3, 'load': 100.0, 'type': 'working', 'rest_time': 3000000000}],
+        ]:
+            with self.subTest(sets=sets):
+                response = self.client.post(self.list_url, {'workout_movement': new_wm.id, 'sets': sets}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        sets = [{'reps': 2**31 - 1, 'type': 'working', 'rest_time': 2**31 - 1}]
+        response = self.client.post(self.list_url, {'workout_movement': new_wm.id, 'sets': sets}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
     def test_create_movement_log_optional_set_fields(self):
         new_workout = Workout.objects.create(user=self.user)
         new_wm = WorkoutMovement.objects.create(workout=new_workout, movement=self.movement1, order=0)
@@ -622,7 +841,7 @@ class MovementLogTests(APITestCase):
         self.client.force_authenticate(user=alt_user)
 
         response = self.client.get(self.detail_url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     @mock.patch('django.utils.timezone.now',
             mock.Mock(return_value=datetime.datetime(2021, 3, 12, 0, 0, 0, tzinfo=pytz.utc)))
@@ -665,6 +884,19 @@ class MovementLogTests(APITestCase):
         response = self.client.patch(self.detail_url, {'sets': []}, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_movement_log_denormalized_owner_and_movement(self):
+        self.movement1_log1.refresh_from_db()
+        self.assertEqual(self.movement1_log1.user_id, self.user.id)
+        self.assertEqual(self.movement1_log1.movement_id, self.movement1.id)
+
+        self.wm1.movement = self.movement2
+        self.wm1.save()
+        self.movement1_log1.refresh_from_db()
+        self.assertEqual(self.movement1_log1.movement_id, self.movement2.id)
+
+        response = self.client.get(f"{self.list_url}?{urlencode({'movement': self.movement2.id})}")
+        self.assertEqual(response.data['count'], 4)
+
     def test_delete_movement_log(self):
         response = self.client.delete(self.detail_url)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
@@ -678,6 +910,1200 @@ class MovementLogTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class MovementLastLogTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.movement = Movement.objects.create(name="Squat", author=cls.user)
+        cls.other_movement = Movement.objects.create(name="Bench Press", author=cls.user)
+
+    def log(self, movement, days_ago):
+        workout = Workout.objects.create(user=self.user)
+        wm = WorkoutMovement.objects.create(workout=workout, movement=movement, order=0)
+        return MovementLog.objects.create(
+            workout_movement=wm,
+            sets=[{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': 120}],
+            timestamp=timezone.now() - datetime.timedelta(days=days_ago))
+
+    def assertLastLog(self, movement, log):
+        movement.refresh_from_db()
+        self.assertEqual(movement.last_log, log)
+        self.assertEqual(movement.last_logged_at, log.timestamp if log else None)
+
+    def test_create_updates_pointer(self):
+        older = self.log(self.movement, days_ago=2)
+        self.assertLastLog(self.movement, older)
+        newer = self.log(self.movement, days_ago=1)
+        self.assertLastLog(self.movement, newer)
+        self.log(self.movement, days_ago=5)
+        self.assertLastLog(self.movement, newer)
+        self.assertLastLog(self.other_movement, None)
+
+    def test_delete_latest_falls_back(self):
+        older = self.log(self.movement, days_ago=2)
+        newer = self.log(self.movement, days_ago=1)
+        newer.delete()
+        self.assertLastLog(self.movement, older)
+        older.workout_movement.workout.delete()
+        self.assertLastLog(self.movement, None)
+
+    def test_timestamp_moved_back_falls_back(self):
+        older = self.log(self.movement, days_ago=2)
+        newer = self.log(self.movement, days_ago=1)
+        newer.timestamp = timezone.now() - datetime.timedelta(days=3)
+        newer.save()
+        self.assertLastLog(self.movement, older)
+        newer.timestamp = timezone.now()
+        newer.save()
+        self.assertLastLog(self.movement, newer)
+
+    def test_log_moved_to_other_movement(self):
+        older = self.log(self.movement, days_ago=2)
+        newer = self.log(self.movement, days_ago=1)
+        newer.workout_movement.movement = self.other_movement
+        newer.workout_movement.save()
+        self.assertLastLog(self.movement, older)
+        self.assertLastLog(self.other_movement, newer)
+
+    def test_tied_timestamps_prefer_higher_id(self):
+        first = self.log(self.movement, days_ago=1)
+        second = self.log(self.movement, days_ago=1)
+        second.timestamp = first.timestamp
+        second.save()
+        self.assertLess(first.id, second.id)
+        self.assertLastLog(self.movement, second)
+        first.save()
+        self.assertLastLog(self.movement, second)
+        Movement.refresh_last_logs([self.movement.id])
+        self.assertLastLog(self.movement, second)
+
+    def test_rebuild_command(self):
+        self.log(self.movement, days_ago=2)
+        newer = self.log(self.movement, days_ago=1)
+        Movement.objects.update(last_log=None, last_logged_at=None)
+        call_command('rebuild_movement_last_logs', batch_size=1, stdout=io.StringIO())
+        self.assertLastLog(self.movement, newer)
+        self.assertLastLog(self.other_movement, None)
+
+
+class MovementProgressionTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.alt_user = User.objects.create_user(email="alt@example.com", password="password")
+        cls.movement = Movement.objects.create(name="Squat", author=cls.user)
+        cls.url = reverse('movement-progression', kwargs={'id': cls.movement.id})
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def log(self, sets, days_ago):
+        workout = Workout.objects.create(user=self.user)
+        wm = WorkoutMovement.objects.create(workout=workout, movement=self.movement, order=0)
+        return MovementLog.objects.create(
+            workout_movement=wm, sets=sets,
+            timestamp=timezone.now() - datetime.timedelta(days=days_ago))
+
+    def test_alt_user_fails(self):
+        self.client.force_authenticate(user=self.alt_user)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_set_type_fails(self):
+        response = self.client.get(f"{self.url}?set_type=invalid")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('set_type', response.data)
+
+    @skipUnless(connection.vendor == 'postgresql', "progression is aggregated with Postgres JSON functions")
+    def test_progression(self):
+        older = self.log([
+            {'reps': 10, 'load': 60.0, 'type': 'warmup', 'rest_time': 60},
+            {'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': 120},
+            {'reps': 3, 'load': 100.0, 'type': 'working', 'rest_time': 120},
+        ], days_ago=7)
+        newer = self.log([
+            {'reps': 1, 'load': 120.0, 'type': 'failure', 'rest_time': None},
+            {'reps': 8, 'load': None, 'type': 'working', 'rest_time': None},
+        ], days_ago=1)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['movement_log'] for row in response.data], [older.id, newer.id])
+        self.assertEqual(response.data[0]['top_set']['reps'], 5)
+        self.assertEqual(response.data[0]['top_set']['load'], 100.0)
+        self.assertEqual(response.data[0]['total_volume'], 1400.0)
+        self.assertEqual(response.data[0]['working_sets'], 2)
+        self.assertAlmostEqual(response.data[0]['estimated_1rm'], 100.0 * (1 + 5 / 30))
+        self.assertEqual(response.data[1]['top_set']['load'], 120.0)
+        self.assertEqual(response.data[1]['total_volume'], 120.0)
+        self.assertEqual(response.data[1]['estimated_1rm'], 120.0)
+
+        since = (timezone.now() - datetime.timedelta(days=3)).isoformat()
+        response = self.client.get(self.url, {'since': since})
+        self.assertEqual([row['movement_log'] for row in response.data], [newer.id])
+
+        response = self.client.get(self.url, {'set_type': ['working', 'failure']})
+        self.assertEqual(response.data[0]['total_volume'], 800.0)
+        self.assertEqual(response.data[0]['working_sets'], 2)
+
+        response = self.client.get(self.url, {'set_type': 'warmup'})
+        self.assertEqual([row['movement_log'] for row in response.data], [older.id])
+        self.assertEqual(response.data[0]['working_sets'], 0)
+
+
+class PersonalRecordTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.alt_user = User.objects.create_user(email="alt@example.com", password="password")
+        cls.movement = Movement.objects.create(name="Squat", author=cls.user)
+        cls.other_movement = Movement.objects.create(name="Bench Press", author=cls.user)
+        cls.list_url = reverse('personal-record-list')
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def log(self, movement, sets, days_ago):
+        workout = Workout.objects.create(user=self.user)
+        wm = WorkoutMovement.objects.create(workout=workout, movement=movement, order=0)
+        return MovementLog.objects.create(
+            workout_movement=wm, sets=sets,
+            timestamp=timezone.now() - datetime.timedelta(days=days_ago))
+
+    def assertRecords(self, movement, expected, volume):
+        records = PersonalRecord.objects.filter(movement=movement)
+        self.assertDictEqual(
+            {record.rep_count: (record.load, record.movement_log) for record in records},
+            expected,
+        )
+        if volume is None:
+            self.assertFalse(VolumeRecord.objects.filter(movement=movement).exists())
+        else:
+            record = VolumeRecord.objects.get(movement=movement)
+            self.assertEqual((record.volume, record.movement_log), volume)
+
+    def test_create_raises_records(self):
+        first = self.log(self.movement, [
+            {'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None},
+            {'reps': 3, 'load': 90.0, 'type': 'working', 'rest_time': None},
+        ], days_ago=2)
+        second = self.log(self.movement, [
+            {'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None},
+            {'reps': 3, 'load': 110.0, 'type': 'working', 'rest_time': None},
+            {'reps': 10, 'load': None, 'type': 'working', 'rest_time': None},
+        ], days_ago=1)
+        self.assertRecords(self.movement, {5: (100.0, first), 3: (110.0, second)}, (830.0, second))
+        self.assertRecords(self.other_movement, {}, None)
+
+    def test_create_retries_taken_record_id(self):
+        taken = self.log(self.other_movement, [{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}], days_ago=2)
+        taken_id = PersonalRecord.objects.get(movement=self.other_movement).id
+        with mock.patch.object(PersonalRecord._meta.pk, '_get_default', lambda: taken_id):
+            log = self.log(self.movement, [{'reps': 5, 'load': 110.0, 'type': 'working', 'rest_time': None}], days_ago=1)
+        self.assertRecords(self.movement, {5: (110.0, log)}, (550.0, log))
+        self.assertRecords(self.other_movement, {5: (100.0, taken)}, (500.0, taken))
+
+    def test_edit_grows_and_shrinks(self):
+        first = self.log(self.movement, [{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}], days_ago=2)
+        second = self.log(self.movement, [{'reps': 5, 'load': 110.0, 'type': 'working', 'rest_time': None}], days_ago=1)
+
+        first.sets = [{'reps': 5, 'load': 120.0, 'type': 'working', 'rest_time': None}]
+        first.save()
+        self.assertRecords(self.movement, {5: (120.0, first)}, (600.0, first))
+
+        first.sets = [{'reps': 2, 'load': 50.0, 'type': 'working', 'rest_time': None}]
+        first.save()
+        self.assertRecords(self.movement, {5: (110.0, second), 2: (50.0, first)}, (550.0, second))
+
+    def test_delete_recomputes(self):
+        first = self.log(self.movement, [{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}], days_ago=2)
+        second = self.log(self.movement, [{'reps': 5, 'load': 110.0, 'type': 'working', 'rest_time': None}], days_ago=1)
+        second.delete()
+        self.assertRecords(self.movement, {5: (100.0, first)}, (500.0, first))
+        first.workout_movement.workout.delete()
+        self.assertRecords(self.movement, {}, None)
+
+    def test_log_moved_to_other_movement(self):
+        first = self.log(self.movement, [{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}], days_ago=2)
+        second = self.log(self.movement, [{'reps': 5, 'load': 110.0, 'type': 'working', 'rest_time': None}], days_ago=1)
+        second.workout_movement.movement = self.other_movement
+        second.workout_movement.save()
+        self.assertRecords(self.movement, {5: (100.0, first)}, (500.0, first))
+        self.assertRecords(self.other_movement, {5: (110.0, second)}, (550.0, second))
+
+    def test_rebuild_command(self):
+        self.log(self.movement, [{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}], days_ago=2)
+        second = self.log(self.movement, [{'reps': 1, 'load': 140.0, 'type': 'working', 'rest_time': None}], days_ago=1)
+        expected = {record.rep_count: (record.load, record.movement_log) for record in PersonalRecord.objects.all()}
+        PersonalRecord.objects.all().delete()
+        VolumeRecord.objects.all().delete()
+        call_command('rebuild_personal_records', batch_size=1, stdout=io.StringIO())
+        self.assertRecords(self.movement, expected, (500.0, PersonalRecord.objects.get(rep_count=5).movement_log))
+        self.assertEqual(PersonalRecord.objects.get(rep_count=1).movement_log, second)
+
+    def test_list_personal_records(self):
+        first = self.log(self.movement, [
+            {'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None},
+            {'reps': 1, 'load': 110.0, 'type': 'working', 'rest_time': None},
+        ], days_ago=2)
+        self.log(self.other_movement, [{'reps': 8, 'load': 60.0, 'type': 'working', 'rest_time': None}], days_ago=1)
+
+        response = self.client.get(self.list_url, {'movement': self.movement.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['movement'], self.movement.id)
+        self.assertEqual([record['rep_count'] for record in response.data[0]['records']], [1, 5])
+        self.assertEqual(response.data[0]['best_estimated_1rm']['rep_count'], 5)
+        self.assertAlmostEqual(response.data[0]['best_estimated_1rm']['estimated_1rm'], 100.0 * (1 + 5 / 30))
+        self.assertEqual(response.data[0]['best_volume']['volume'], 610.0)
+        self.assertEqual(response.data[0]['best_volume']['movement_log'], first.id)
+
+        self.assertEqual(len(self.client.get(self.list_url).data), 2)
+        self.client.force_authenticate(user=self.alt_user)
+        self.assertEqual(self.client.get(self.list_url).data, [])
+
+
+class WeeklyVolumeTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.squat = Movement.objects.create(name="Squat", author=cls.user, body_part='quads')
+        cls.bench = Movement.objects.create(name="Bench Press", author=cls.user, body_part='chest')
+        cls.list_url = reverse('weekly-volume-list')
+        # Monday 2024-01-08 02:00 UTC is still Sunday evening in Los Angeles.
+        cls.monday = datetime.datetime(2024, 1, 8, 2, 0, tzinfo=pytz.utc)
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def log(self, movement, sets, timestamp):
+        workout = Workout.objects.create(user=self.user)
+        wm = WorkoutMovement.objects.create(workout=workout, movement=movement, order=0)
+        return MovementLog.objects.create(workout_movement=wm, sets=sets, timestamp=timestamp)
+
+    def rollup(self):
+        return {
+            (str(row.week), row.body_part): (row.sets, row.reps, row.tonnage)
+            for row in WeeklyVolume.objects.filter(user=self.user)
+        }
+
+    def test_create_edit_delete(self):
+        log = self.log(self.squat, [
+            {'reps': 10, 'load': 50.0, 'type': 'warmup', 'rest_time': None},
+            {'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None},
+            {'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None},
+        ], self.monday)
+        self.log(self.bench, [{'reps': 8, 'load': None, 'type': 'working', 'rest_time': None}], self.monday)
+        self.assertDictEqual(self.rollup(), {
+            ('2024-01-01', 'quads'): (2, 10, 1000.0),
+            ('2024-01-01', 'chest'): (1, 8, 0.0),
+        })
+
+        log.sets = log.sets[:2]
+        log.timestamp = self.monday + datetime.timedelta(days=1)
+        log.save()
+        self.assertDictEqual(self.rollup(), {
+            ('2024-01-08', 'quads'): (1, 5, 500.0),
+            ('2024-01-01', 'chest'): (1, 8, 0.0),
+        })
+
+        log.delete()
+        self.assertDictEqual(self.rollup(), {('2024-01-01', 'chest'): (1, 8, 0.0)})
+
+    def test_movement_changes(self):
+        log = self.log(self.squat, [{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}], self.monday)
+        log.workout_movement.movement = self.bench
+        log.workout_movement.save()
+        self.assertDictEqual(self.rollup(), {('2024-01-01', 'chest'): (1, 5, 500.0)})
+
+        self.bench.body_part = 'upper_chest'
+        self.bench.save()
+        self.assertDictEqual(self.rollup(), {('2024-01-01', 'upper_chest'): (1, 5, 500.0)})
+
+    def test_timezone_change_rebuilds(self):
+        self.log(self.squat, [{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}], self.monday)
+        self.user.timezone = 'UTC'
+        self.user.save()
+        self.assertDictEqual(self.rollup(), {('2024-01-08', 'quads'): (1, 5, 500.0)})
+
+    def test_rebuild_command(self):
+        self.log(self.squat, [{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}], self.monday)
+        expected = self.rollup()
+        WeeklyVolume.objects.all().delete()
+        call_command('rebuild_weekly_volume', batch_size=1, stdout=io.StringIO())
+        self.assertDictEqual(self.rollup(), expected)
+
+    def test_list_weekly_volume(self):
+        self.log(self.squat, [{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}], self.monday)
+        self.log(self.bench, [{'reps': 5, 'load': 60.0, 'type': 'working', 'rest_time': None}],
+                 self.monday + datetime.timedelta(days=7))
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(row['week'], row['body_part']) for row in response.data['results']],
+            [('2024-01-08', 'chest'), ('2024-01-01', 'quads')],
+        )
+
+        response = self.client.get(self.list_url, {'since': '2024-01-10'})
+        self.assertEqual([row['body_part'] for row in response.data['results']], ['chest'])
+        response = self.client.get(self.list_url, {'until': '2024-01-07'})
+        self.assertEqual([row['body_part'] for row in response.data['results']], ['quads'])
+        response = self.client.get(self.list_url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class HistoryExportTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.squat = Movement.objects.create(name="Squat", author=cls.user, body_part='quads')
+        cls.bench = Movement.objects.create(name="Bench Press", author=cls.user, body_part='chest')
+        cls.workout = Workout.objects.create(
+            user=cls.user, start_timestamp=datetime.datetime(2024, 1, 8, 17, 0, tzinfo=pytz.utc))
+        squat_wm = WorkoutMovement.objects.create(workout=cls.workout, movement=cls.squat, order=0)
+        WorkoutMovement.objects.create(workout=cls.workout, movement=cls.bench, order=1)
+        cls.log = MovementLog.objects.create(
+            workout_movement=squat_wm, notes="Felt strong",
+            sets=[{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}],
+            timestamp=datetime.datetime(2024, 1, 8, 17, 30, tzinfo=pytz.utc))
+        cls.empty_workout = Workout.objects.create(
+            user=cls.user, start_timestamp=datetime.datetime(2024, 1, 10, 17, 0, tzinfo=pytz.utc))
+
+        other_user = User.objects.create_user(email="other@example.com", password="password")
+        Workout.objects.create(user=other_user)
+
+        cls.export_url = reverse('history-export')
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_authentication_requirements(self):
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.export_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_csv(self):
+        response = self.client.get(self.export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('lumberjacked-history.csv', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(self.content(response).decode())))
+        self.assertEqual(
+            [(row['workout_id'], row['movement_name'], row['movement_log_id']) for row in rows],
+            [
+                (str(self.workout.id), 'Squat', str(self.log.id)),
+                (str(self.workout.id), 'Bench Press', ''),
+                (str(self.empty_workout.id), '', ''),
+            ],
+        )
+        self.assertEqual(rows[0]['notes'], "Felt strong")
+        self.assertEqual(json.loads(rows[0]['sets']), self.log.sets)
+
+    def test_export_ndjson(self):
+        response = self.client.get(self.export_url, {'export_format': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        workouts = [json.loads(line) for line in self.content(response).decode().splitlines()]
+        self.assertEqual([workout['id'] for workout in workouts], [self.workout.id, self.empty_workout.id])
+        movements = workouts[0]['movements']
+        self.assertEqual([movement['movement']['name'] for movement in movements], ['Squat', 'Bench Press'])
+        self.assertEqual(movements[0]['log']['sets'], self.log.sets)
+        self.assertIsNone(movements[1]['log'])
+        self.assertEqual(workouts[1]['movements'], [])
+
+    def test_export_gzip(self):
+        plain = self.content(self.client.get(self.export_url))
+        response = self.client.get(self.export_url, {'gzip': 'true'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('lumberjacked-history.csv.gz', response['Content-Disposition'])
+        self.assertEqual(gzip.decompress(self.content(response)), plain)
+
+    def test_invalid_format(self):
+        response = self.client.get(self.export_url, {'export_format': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_command(self):
+        out = io.StringIO()
+        call_command('export_history', self.user.email, export_format='ndjson', chunk_size=1, stdout=out)
+        self.assertEqual(out.getvalue().encode(), self.content(self.client.get(self.export_url, {'export_format': 'ndjson'})))
+
+
+class HistoryImportTests(APITestCase):
+    CSV = (
+        "Workout_Start,workout_end,movement,reps,load,set_type,rest_time,notes\n"
+        "2024-01-08T17:00:00Z,2024-01-08T18:00:00Z,squat,5,100,,,Felt strong\n"
+        "2024-01-08T17:00:00Z,,Squat,5,105,working,120,\n"
+        "2024-01-08T17:00:00Z,,Overhead Press,8,40,,,\n"
+        "2024-01-10T17:00:00Z,,Squat,five,100,,,\n"
+        "2024-01-10T17:00:00Z,,Squat,3,110,,,\n"
+        "not a date,,Squat,3,110,,,\n"
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password", timezone='UTC')
+        cls.squat = Movement.objects.create(name="Squat", author=cls.user, body_part='quads')
+        cls.import_url = reverse('history-import')
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, content):
+        return self.client.post(
+            self.import_url,
+            {'file': SimpleUploadedFile('history.csv', content.encode(), content_type='text/csv')},
+            format='multipart',
+        )
+
+    def test_authentication_requirements(self):
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.upload(self.CSV).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_import(self):
+        response = self.upload(self.CSV)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['rows'], 6)
+        self.assertEqual(response.data['workouts'], 2)
+        self.assertEqual(response.data['movement_logs'], 3)
+        self.assertEqual(response.data['movements_created'], 1)
+        self.assertEqual(response.data['error_count'], 2)
+        self.assertEqual([error['line'] for error in response.data['errors']], [5, 7])
+
+        self.assertEqual(Movement.objects.filter(author=self.user).count(), 2)
+        workout = Workout.objects.get(user=self.user, start_timestamp=datetime.datetime(2024, 1, 8, 17, tzinfo=pytz.utc))
+        self.assertEqual(workout.end_timestamp, datetime.datetime(2024, 1, 8, 18, tzinfo=pytz.utc))
+        self.assertEqual(
+            [wm.movement.name for wm in workout.workout_movements.order_by('order')],
+            ['Squat', 'Overhead Press'],
+        )
+        log = MovementLog.objects.get(workout_movement__workout=workout, movement=self.squat)
+        self.assertEqual(log.user, self.user)
+        self.assertEqual(log.notes, "Felt strong")
+        self.assertEqual(log.sets, [
+            {'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None},
+            {'reps': 5, 'load': 105.0, 'type': 'working', 'rest_time': 120},
+        ])
+
+        # Denormalized data is rebuilt after the bulk writes.
+        self.squat.refresh_from_db()
+        self.assertEqual(self.squat.last_logged_at, datetime.datetime(2024, 1, 10, 17, tzinfo=pytz.utc))
+        self.assertEqual(PersonalRecord.objects.get(movement=self.squat, rep_count=5).load, 105.0)
+        self.assertEqual(WeeklyVolume.objects.get(user=self.user, body_part='quads').sets, 3)
+
+    def test_reimport_skips_existing_workouts(self):
+        self.upload(self.CSV)
+        response = self.upload(self.CSV)
+        self.assertEqual(response.data['workouts'], 0)
+        self.assertEqual(response.data['skipped_workouts'], 2)
+        self.assertEqual(Workout.objects.filter(user=self.user).count(), 2)
+
+    def test_non_contiguous_workout_rows_rejected(self):
+        response = self.upload(
+            "workout_start,movement,reps\n"
+            "2024-01-08T17:00:00Z,Squat,5\n"
+            "2024-01-10T17:00:00Z,Squat,5\n"
+            "2024-01-08T17:00:00Z,Bench Press,5\n"
+            "2024-01-10T17:00:00Z,Squat,3\n"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['workouts'], 2)
+        self.assertEqual(response.data['skipped_workouts'], 0)
+        self.assertEqual([error['line'] for error in response.data['errors']], [4])
+        self.assertIn("contiguous", response.data['errors'][0]['error'])
+        self.assertFalse(Movement.objects.filter(author=self.user, name="Bench Press").exists())
+        self.assertEqual(MovementLog.objects.get(user=self.user, timestamp__day=10).sets[1]['reps'], 3)
+
+    def test_nothing_imported_fails(self):
+        response = self.upload("workout_start,movement,reps\n2024-01-08T17:00:00Z,Squat,five\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error_count'], 1)
+
+    def test_out_of_range_numbers_rejected(self):
+        response = self.upload(
+            "workout_start,movement,reps,rest_time\n"
+            "2024-01-08T17:00:00Z,Squat,3000000000,\n"
+            "2024-01-08T17:00:00Z,Squat,5,3000000000\n"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([error['line'] for error in response.data['errors']], [2, 3])
+        self.assertIn("at most", response.data['errors'][0]['error'])
+
+    def test_failed_chunk_does_not_cache_new_movements(self):
+        importer = HistoryImporter(self.user)
+        importer.movement_ids = {}
+        chunk = [{
+            'start': datetime.datetime(2024, 1, 8, 17, tzinfo=pytz.utc), 'end': None,
+            'movements': {'deadlift': {'name': "Deadlift", 'sets': [
+                {'reps': 5, 'load': 140.0, 'type': 'working', 'rest_time': None}], 'notes': ''}},
+        }]
+        with mock.patch.object(MovementLog.objects, 'bulk_create', side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                importer._write(chunk)
+        self.assertEqual(importer.movement_ids, {})
+        self.assertEqual(importer.touched_movement_ids, set())
+
+        importer._write(chunk)
+        deadlift = Movement.objects.get(author=self.user, name="Deadlift")
+        self.assertEqual(importer.movement_ids, {'deadlift': deadlift.id})
+        self.assertEqual(MovementLog.objects.get(user=self.user).movement, deadlift)
+
+    def test_missing_columns(self):
+        response = self.upload("date,exercise\n2024-01-08,Squat\n")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Workout.objects.filter(user=self.user).exists())
+
+    def test_import_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write(self.CSV)
+        self.addCleanup(os.unlink, f.name)
+        out = io.StringIO()
+        call_command('import_history', self.user.email, f.name, chunk_size=1, stdout=out, stderr=io.StringIO())
+        self.assertIn("Imported 2 workouts and 3 movement logs", out.getvalue())
+        self.assertEqual(out.getvalue().count("Read "), 2)
+        self.assertEqual(MovementLog.objects.filter(user=self.user).count(), 3)
+
+
+class SyncTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.squat = Movement.objects.create(name="Squat", author=cls.user)
+        cls.bench = Movement.objects.create(name="Bench Press", author=cls.user)
+        cls.workout = Workout.objects.create(user=cls.user)
+        cls.squat_wm = WorkoutMovement.objects.create(workout=cls.workout, movement=cls.squat, order=0)
+        cls.bench_wm = WorkoutMovement.objects.create(workout=cls.workout, movement=cls.bench, order=1)
+        cls.log = MovementLog.objects.create(
+            workout_movement=cls.squat_wm, sets=[{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}])
+        cls.template = WorkoutTemplate.objects.create(author=cls.user, name="Legs")
+        WorkoutTemplateMovement.objects.create(template=cls.template, movement=cls.squat, order=0)
+
+        other_user = User.objects.create_user(email="other@example.com", password="password")
+        Movement.objects.create(name="Squat", author=other_user)
+
+        cls.sync_url = reverse('sync')
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def sync(self, cursor=None):
+        response = self.client.get(self.sync_url, {} if cursor is None else {'since': cursor})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_authentication_requirements(self):
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self.client.get(self.sync_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_full_sync(self):
+        data = self.sync()
+        self.assertCountEqual([row['id'] for row in data['movements']], [self.squat.id, self.bench.id])
+        self.assertEqual([row['id'] for row in data['workouts']], [self.workout.id])
+        self.assertCountEqual([row['id'] for row in data['workout_movements']], [self.squat_wm.id, self.bench_wm.id])
+        self.assertEqual([row['id'] for row in data['movement_logs']], [self.log.id])
+        self.assertEqual(data['workout_templates'][0]['movements'], [
+            {'movement': self.squat.id, 'movement_log_template': None, 'order': 0},
+        ])
+        self.assertTrue(all(ids == [] for ids in data['deleted'].values()))
+        self.assertIn('cursor', data)
+
+    def test_delta_sync(self):
+        cursor = self.sync()['cursor']
+        self.assertTrue(all(self.sync(cursor)[kind] == [] for kind in ['movements', 'workouts', 'movement_logs']))
+
+        self.workout.end_timestamp = timezone.now()
+        self.workout.save()
+        bench_id, bench_wm_id = self.bench.id, self.bench_wm.id
+        self.bench.delete()
+
+        data = self.sync(cursor)
+        self.assertEqual([row['id'] for row in data['workouts']], [self.workout.id])
+        self.assertEqual(data['movements'], [])
+        self.assertEqual(data['workout_movements'], [])
+        self.assertEqual(data['deleted']['movements'], [bench_id])
+        # Cascaded from the movement, which clients cannot infer.
+        self.assertEqual(data['deleted']['workout_movements'], [bench_wm_id])
+
+    def test_delta_sync_follows_commit_order_not_clock(self):
+        cursor = self.sync()['cursor']
+        self.workout.save()
+        # As if the transaction had started long before the cursor was handed out.
+        Workout.objects.filter(pk=self.workout.pk).update(updated_timestamp=timezone.now() - datetime.timedelta(hours=1))
+        data = self.sync(cursor)
+        self.assertEqual([row['id'] for row in data['workouts']], [self.workout.id])
+        self.assertEqual(self.sync(data['cursor'])['workouts'], [])
+
+    def test_deleting_template_movement_parts_touches_template(self):
+        lunge = Movement.objects.create(name="Lunge", author=self.user)
+        mlt = MovementLogTemplate.objects.create(author=self.user, name="Squat Template", movement=self.squat)
+        WorkoutTemplateMovement.objects.filter(template=self.template).update(movement_log_template=mlt)
+        WorkoutTemplateMovement.objects.create(template=self.template, movement=lunge, order=1)
+
+        cursor = self.sync()['cursor']
+        lunge.delete()
+        data = self.sync(cursor)
+        self.assertEqual(data['workout_templates'][0]['movements'], [
+            {'movement': self.squat.id, 'movement_log_template': mlt.id, 'order': 0},
+        ])
+
+        cursor = data['cursor']
+        mlt.delete()
+        data = self.sync(cursor)
+        self.assertEqual(data['workout_templates'][0]['movements'], [
+            {'movement': self.squat.id, 'movement_log_template': None, 'order': 0},
+        ])
+
+    def test_deleting_workout_tombstones_only_the_workout(self):
+        cursor = self.sync()['cursor']
+        workout_id = self.workout.id
+        self.workout.delete()
+        data = self.sync(cursor)
+        self.assertEqual(data['deleted']['workouts'], [workout_id])
+        self.assertEqual(data['deleted']['workout_movements'], [])
+        self.assertEqual(data['deleted']['movement_logs'], [])
+
+    def test_deleting_user_leaves_no_tombstones(self):
+        self.user.delete()
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_expired_cursor(self):
+        cursor = encode_cursor(0, timezone.now() - datetime.timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1))
+        self.assertEqual(self.client.get(self.sync_url, {'since': cursor}).status_code, status.HTTP_410_GONE)
+        # Time-only cursors handed out before versioned sync.
+        self.assertEqual(self.client.get(self.sync_url, {'since': '1760000000000000'}).status_code, status.HTTP_410_GONE)
+        self.assertEqual(self.client.get(self.sync_url, {'since': 'yesterday'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prune_tombstones(self):
+        self.bench.delete()
+        Tombstone.objects.update(
+            deleted_timestamp=timezone.now() - datetime.timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1))
+        call_command('prune_tombstones', stdout=io.StringIO())
+        self.assertFalse(Tombstone.objects.exists())
+
+
+class BatchTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.alt_user = User.objects.create_user(email="alt@example.com", password="altpassword")
+        cls.squat = Movement.objects.create(name="Squat", author=cls.user)
+        cls.bench = Movement.objects.create(name="Bench Press", author=cls.user)
+        cls.alt_movement = Movement.objects.create(name="Deadlift", author=cls.alt_user)
+        cls.workout = Workout.objects.create(user=cls.user)
+        cls.url = reverse('batch')
+        cls.wm_list_url = reverse('workout-movement-list')
+
+    def setUp(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        self.client.force_authenticate(user=None)
+
+    def add_movement(self, movement):
+        return {
+            'method': 'POST', 'path': self.wm_list_url,
+            'body': {'workout': self.workout.id, 'movement': movement.id},
+        }
+
+    def batch(self, requests, **data):
+        response = self.client.post(self.url, {'requests': requests, **data}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_authentication_required(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.post(self.url, {'requests': [self.add_movement(self.squat)]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_sub_requests_run_in_order(self):
+        data = self.batch([
+            self.add_movement(self.squat),
+            self.add_movement(self.bench),
+            {'method': 'GET', 'path': f"{self.wm_list_url}?workout={self.workout.id}"},
+            # Served by an async view outside of batches.
+            {'method': 'GET', 'path': reverse('movement-list')},
+        ])
+        self.assertTrue(data['committed'])
+        self.assertListEqual([r['status'] for r in data['responses']], [201, 201, 200, 200])
+        self.assertListEqual([wm['order'] for wm in data['responses'][2]['body']['results']], [0, 1])
+        self.assertEqual(data['responses'][3]['body']['count'], 2)
+
+    def test_atomic_batch_rolls_back_on_failure(self):
+        data = self.batch([
+            self.add_movement(self.squat),
+            self.add_movement(self.alt_movement),
+            self.add_movement(self.bench),
+        ])
+        self.assertFalse(data['committed'])
+        self.assertListEqual([r['status'] for r in data['responses']], [201, 403, 424])
+        self.assertFalse(WorkoutMovement.objects.exists())
+
+    def test_best_effort_batch_keeps_successful_requests(self):
+        data = self.batch([
+            self.add_movement(self.squat),
+            self.add_movement(self.alt_movement),
+            self.add_movement(self.bench),
+        ], mode='best_effort')
+        self.assertTrue(data['committed'])
+        self.assertListEqual([r['status'] for r in data['responses']], [201, 403, 201])
+        self.assertSetEqual(
+            set(WorkoutMovement.objects.values_list('movement', flat=True)), {self.squat.id, self.bench.id})
+
+    def test_sub_requests_run_as_batch_user(self):
+        alt_workout = Workout.objects.create(user=self.alt_user)
+        data = self.batch([
+            {'method': 'GET', 'path': reverse('workout-detail', kwargs={'id': alt_workout.id})},
+            {'method': 'DELETE', 'path': reverse('movement-detail', kwargs={'id': self.alt_movement.id})},
+        ], mode='best_effort')
+        self.assertListEqual([r['status'] for r in data['responses']], [404, 404])
+        self.assertTrue(Movement.objects.filter(pk=self.alt_movement.pk).exists())
+
+    def test_unknown_and_unbatchable_routes(self):
+        data = self.batch([
+            {'method': 'GET', 'path': '/api/nowhere/'},
+            {'method': 'GET', 'path': reverse('history-export')},
+            {'method': 'POST', 'path': self.url, 'body': {'requests': []}},
+        ], mode='best_effort')
+        self.assertListEqual([r['status'] for r in data['responses']], [404, 400, 400])
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_request_cap(self):
+        response = self.client.post(
+            self.url, {'requests': [self.add_movement(self.squat)] * 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('requests', response.data)
+        self.assertFalse(WorkoutMovement.objects.exists())
+
+    def test_rolled_back_reads_are_not_cached(self):
+        list_url = reverse('workout-list')
+        data = self.batch([
+            self.add_movement(self.squat),
+            {'method': 'GET', 'path': list_url},
+            {'method': 'GET', 'path': '/api/nowhere/'},
+        ])
+        self.assertFalse(data['committed'])
+        self.assertEqual(len(data['responses'][1]['body']['results'][0]['movements_details']), 1)
+        # Takes the data version the rolled back batch had bumped to.
+        Workout.objects.create(user=self.user, start_timestamp=timezone.now() - datetime.timedelta(days=1))
+        response = self.client.get(list_url)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['results'][0]['movements_details'], [])
+
+
+class ConditionalGetTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.movement = Movement.objects.create(name="Squat", author=cls.user)
+        cls.workout = Workout.objects.create(user=cls.user)
+        WorkoutMovement.objects.create(workout=cls.workout, movement=cls.movement, order=0)
+        cls.urls = [
+            reverse('movement-list'),
+            reverse('workout-list'),
+            reverse('workout-template-list'),
+            reverse('workout-current'),
+        ]
+
+    def setUp(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        self.client.force_authenticate(user=self.user)
+
+    def test_not_modified_before_any_work(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                self.assertTrue(etag.startswith('W/'))
+                with self.assertNumQueries(1):
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(response.content, b'')
+
+    def test_writes_change_etag(self):
+        url = reverse('workout-list')
+        etag = self.client.get(url)['ETag']
+        self.movement.notes = "Low bar"
+        self.movement.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+        etag = response['ETag']
+        version = UserDataVersion.current(self.user.pk)
+        self.workout.delete()
+        # Cascaded workout movements do not bump the version again.
+        self.assertEqual(UserDataVersion.current(self.user.pk), version + 1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_etag_is_per_user(self):
+        url = reverse('movement-list')
+        etag = self.client.get(url)['ETag']
+        other_user = User.objects.create_user(email="other@example.com", password="password")
+        self.client.force_authenticate(user=other_user)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_finished_workout_cache_headers(self):
+        url = reverse('workout-detail', kwargs={'id': self.workout.id})
+        self.assertNotIn('max-age', self.client.get(url).get('Cache-Control', ''))
+        self.workout.end_timestamp = timezone.now()
+        self.workout.save()
+        response = self.client.get(url)
+        self.assertIn(f'max-age={settings.FINISHED_WORKOUT_MAX_AGE}', response['Cache-Control'])
+        self.assertIn('must-revalidate', response['Cache-Control'])
+
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.workout.end_timestamp = timezone.now()
+        self.workout.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ResponseCacheTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.admin = User.objects.create_superuser(email="admin@example.com", password="password")
+        cls.movement = Movement.objects.create(name="Squat", author=cls.user)
+        cls.workout = Workout.objects.create(user=cls.user)
+        cls.wm = WorkoutMovement.objects.create(workout=cls.workout, movement=cls.movement, order=0)
+        cls.list_url = reverse('workout-list')
+        cls.detail_url = reverse('workout-detail', kwargs={'id': cls.workout.id})
+
+    def setUp(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+        response_cache_stats.reset()
+        self.client.force_authenticate(user=self.user)
+
+    def test_hit_skips_serialization(self):
+        for url in [self.list_url, self.detail_url]:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(first['X-Response-Cache'], 'miss')
+                with self.assertNumQueries(1):
+                    second = self.client.get(url)
+                self.assertEqual(second['X-Response-Cache'], 'hit')
+                self.assertEqual(second.data, first.data)
+
+    def test_writes_invalidate(self):
+        writes = [
+            lambda: self.movement.save(),
+            lambda: self.workout.save(),
+            lambda: self.wm.save(),
+            lambda: MovementLog.objects.create(
+                workout_movement=self.wm, sets=[{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': None}]),
+            lambda: MovementLog.objects.get(workout_movement=self.wm).delete(),
+        ]
+        self.client.get(self.detail_url)
+        for write in writes:
+            write()
+            self.assertEqual(self.client.get(self.detail_url)['X-Response-Cache'], 'miss')
+
+        self.movement.name = "Back Squat"
+        self.movement.save()
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data['movements_details'][0]['name'], "Back Squat")
+
+    def test_entries_are_per_user(self):
+        self.client.get(self.detail_url)
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.get(self.detail_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stats(self):
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('cache-stats'))
+        self.assertEqual(response.data['WorkoutList'], {'hits': 1, 'misses': 1})
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get(reverse('cache-stats')).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class FastReadSerializerTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.squat = Movement.objects.create(name="Squat", author=cls.user, body_part='legs', resistance_type='barbell')
+        cls.bench = Movement.objects.create(name="Bench", author=cls.user, notes="Pause reps")
+        cls.curl = Movement.objects.create(name="Curl", author=cls.user)
+        cls.mlt = MovementLogTemplate.objects.create(
+            author=cls.user, name="Squat 5x5", movement=cls.squat,
+            sets=[{'reps': '5', 'type': 'working', 'rest_time': 180}, {'type': 'warmup'}])
+
+        sets = [{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': 120}]
+        for day in range(3):
+            start = timezone.now() - datetime.timedelta(days=3 - day)
+            workout = Workout.objects.create(user=cls.user, start_timestamp=start, end_timestamp=start)
+            squat = WorkoutMovement.objects.create(workout=workout, movement=cls.squat, order=0)
+            WorkoutMovement.objects.create(workout=workout, movement=cls.curl, order=1)
+            MovementLog.objects.create(workout_movement=squat, sets=sets, notes=f"Day {day}", timestamp=start)
+        Workout.objects.create(user=cls.user, end_timestamp=timezone.now())
+
+        # The current workout: a recorded log, a previous log only, nothing logged.
+        cls.current = Workout.objects.create(user=cls.user)
+        squat = WorkoutMovement.objects.create(workout=cls.current, movement=cls.squat, template=cls.mlt, order=0)
+        MovementLog.objects.create(workout_movement=squat, sets=sets, timestamp=timezone.now())
+        WorkoutMovement.objects.create(workout=cls.current, movement=cls.curl, order=1)
+        WorkoutMovement.objects.create(workout=cls.current, movement=cls.bench, order=2)
+
+        template = WorkoutTemplate.objects.create(author=cls.user, name="Leg Day")
+        WorkoutTemplateMovement.objects.create(template=template, movement=cls.squat, movement_log_template=cls.mlt, order=0)
+        WorkoutTemplateMovement.objects.create(template=template, movement=cls.curl, order=1)
+        WorkoutTemplate.objects.create(author=cls.user, name="Empty")
+
+    def setUp(self):
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, url, fast):
+        with override_settings(FAST_READ_SERIALIZERS=fast, RESPONSE_CACHE_ALIAS=''):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content
+
+    def assertSameOutput(self, url):
+        self.assertEqual(self.get(url, fast=True), self.get(url, fast=False))
+
+    def test_workout_list(self):
+        self.assertSameOutput(reverse('workout-list'))
+        self.assertSameOutput(reverse('workout-list') + '?pagination=cursor')
+
+    def test_current_workout(self):
+        self.assertSameOutput(reverse('workout-current'))
+
+    def test_workout_templates(self):
+        self.assertSameOutput(reverse('workout-template-list'))
+
+    def test_time_zone(self):
+        with timezone.override(pytz.timezone('America/Los_Angeles')):
+            self.assertSameOutput(reverse('workout-current'))
+
+    def test_no_current_workout(self):
+        self.current.delete()
+        with override_settings(FAST_READ_SERIALIZERS=True):
+            response = self.client.get(reverse('workout-current'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_queries_do_not_grow_with_page(self):
+        with override_settings(FAST_READ_SERIALIZERS=True, RESPONSE_CACHE_ALIAS=''):
+            # Data version, count, page and its movements.
+            with self.assertNumQueries(4):
+                self.client.get(reverse('workout-list'))
+            with self.assertNumQueries(3):
+                self.client.get(reverse('workout-current'))
+
+    def test_writes_use_model_serializers(self):
+        with override_settings(FAST_READ_SERIALIZERS=True):
+            response = self.client.post(
+                reverse('workout-template-list'), {'name': "Push", 'movements': [{'movement': self.bench.id}]},
+                format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['name'], "Push")
+
+
+class SetValidationTests(APITestCase):
+
+    LOG_SETS = [
+        [{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': 120}],
+        [{'reps': 5, 'type': 'warmup'}, {'reps': 3, 'load': None, 'type': 'failure', 'rest_time': None}],
+        [{'reps': 5, 'load': 100, 'type': 'dropset', 'rest_time': 0, 'rpe': 8}],
+        [],
+        # Accepted by field validation only.
+        [{'reps': '5', 'load': '100.5', 'type': 'working'}],
+        [{'reps': 5.0, 'load': True, 'type': 'myoreps'}],
+        # Invalid.
+        [{'reps': 0, 'type': 'working'}],
+        [{'reps': 5, 'type': 'working'}, {'reps': 'five', 'load': 'heavy', 'type': 'cardio', 'rest_time': -1}],
+        [{'type': 'working'}],
+        [{'reps': True, 'type': 'working'}],
+        [{'reps': 2**31, 'type': 'working'}],
+        [{'reps': 5, 'type': 'working', 'rest_time': 2**31}],
+        [None],
+        ['5x100'],
+        {'reps': 5, 'type': 'working'},
+        'sets',
+    ]
+    TEMPLATE_SETS = [
+        [{'reps': '5', 'type': 'working', 'rest_time': 180}, {'reps': '8-10', 'type': 'working'}],
+        [{'reps': None, 'type': 'warmup', 'rest_time': None}, {'type': 'failure'}],
+        # Accepted by field validation only.
+        [{'reps': ' 5 ', 'type': 'working'}],
+        [{'reps': 5, 'type': 'working'}],
+        # Invalid.
+        [{'reps': '0', 'type': 'working'}],
+        [{'reps': '0-5', 'type': 'working'}, {'reps': '10-8', 'type': 'working'}],
+        [{'reps': '', 'type': 'working'}, {'reps': '5+', 'type': 'working'}, {'reps': '\u0665', 'type': 'working'}],
+        [{'reps': '5', 'type': 'working', 'rest_time': 'long'}],
+        [{'reps': '5', 'type': 'working', 'rest_time': 2**31}],
+        [{'reps': '5'}],
+        [[]],
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.movement = Movement.objects.create(name="Squat", author=cls.user)
+        cls.workout = Workout.objects.create(user=cls.user)
+
+    def validate(self, list_serializer_class, child, data):
+        serializer = list_serializer_class(child=child, data=data)
+        if serializer.is_valid():
+            return True, serializer.validated_data
+        return False, serializer.errors
+
+    def test_compiled_validation_matches_field_validation(self):
+        for child_class, cases in [(SetSerializer, self.LOG_SETS), (TemplateSetSerializer, self.TEMPLATE_SETS)]:
+            for sets in cases:
+                with self.subTest(child=child_class.__name__, sets=sets):
+                    self.assertEqual(
+                        self.validate(CompiledListSerializer, child_class(), sets),
+                        self.validate(ListSerializer, child_class(), sets),
+                    )
+
+    def test_many_uses_compiled_validation(self):
+        self.assertIsInstance(SetSerializer(many=True), CompiledListSerializer)
+        self.assertIsInstance(TemplateSetSerializer(many=True), CompiledListSerializer)
+        self.assertTrue(all(clean_sets(sets) is not None for sets in self.LOG_SETS[:4]))
+        self.assertTrue(all(clean_sets(sets) is None for sets in self.LOG_SETS[4:]))
+        self.assertTrue(all(clean_template_sets(sets) is not None for sets in self.TEMPLATE_SETS[:2]))
+        self.assertTrue(all(clean_template_sets(sets) is None for sets in self.TEMPLATE_SETS[2:]))
+
+    def test_validated_sets_satisfy_database_checks(self):
+        for order, sets in enumerate(self.LOG_SETS):
+            valid, data = self.validate(ListSerializer, SetSerializer(), sets)
+            if valid:
+                wm = WorkoutMovement.objects.create(workout=self.workout, movement=self.movement, order=order)
+                MovementLog.objects.create(workout_movement=wm, sets=data)
+        for sets in self.TEMPLATE_SETS:
+            valid, data = self.validate(ListSerializer, TemplateSetSerializer(), sets)
+            if valid:
+                MovementLogTemplate.objects.create(author=self.user, name="Template", sets=data)
+
+    def test_sets_round_trip_through_columns(self):
+        wm = WorkoutMovement.objects.create(workout=self.workout, movement=self.movement, order=0)
+        sets = [
+            {'reps': 5, 'load': 102.5, 'type': 'myoreps', 'rest_time': 90},
+            {'reps': 3, 'type': 'warmup'},
+        ]
+        log = MovementLog.objects.create(workout_movement=wm, sets=sets)
+        log = MovementLog.objects.get(pk=log.pk)
+        self.assertEqual(log.set_reps, [5, 3])
+        self.assertEqual(log.set_loads, [102.5, None])
+        self.assertEqual(log.set_types, [SET_TYPE_CHOICES.index('myoreps'), SET_TYPE_CHOICES.index('warmup')])
+        self.assertEqual(log.set_rest_times, [90, None])
+        self.assertEqual(log.sets, [
+            {'reps': 5, 'load': 102.5, 'type': 'myoreps', 'rest_time': 90},
+            {'reps': 3, 'load': None, 'type': 'warmup', 'rest_time': None},
+        ])
+
+    def test_database_rejects_malformed_sets(self):
+        wm = WorkoutMovement.objects.create(workout=self.workout, movement=self.movement, order=0)
+        malformed_log_columns = [
+            {'set_reps': [5, 3], 'set_loads': [100.0], 'set_types': [1, 1], 'set_rest_times': [None, None]},
+            {'set_reps': [0], 'set_loads': [None], 'set_types': [1], 'set_rest_times': [None]},
+            {'set_reps': [None], 'set_loads': [None], 'set_types': [1], 'set_rest_times': [None]},
+            {'set_reps': [5], 'set_loads': [None], 'set_types': [len(SET_TYPE_CHOICES)], 'set_rest_times': [None]},
+            {'set_reps': [5], 'set_loads': [None], 'set_types': [-1], 'set_rest_times': [None]},
+            {'set_reps': [5], 'set_loads': [None], 'set_types': [1], 'set_rest_times': [-30]},
+        ]
+        for columns in malformed_log_columns:
+            with self.subTest(columns=columns), self.assertRaises(IntegrityError), transaction.atomic():
+                MovementLog.objects.bulk_create([MovementLog(workout_movement=wm, **columns)])
+
+        malformed_template_sets = [
+            [{'reps': 5, 'type': 'working'}],
+            [{'reps': '5 reps', 'type': 'working'}],
+            [{'reps': '5', 'type': None}],
+            [{'reps': '5', 'type': 'working', 'rest_time': 1.5}],
+        ]
+        for sets in malformed_template_sets:
+            with self.subTest(sets=sets), self.assertRaises(IntegrityError), transaction.atomic():
+                MovementLogTemplate.objects.bulk_create([MovementLogTemplate(author=self.user, name="Bad", sets=sets)])
+
+
+class DetailScopingTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.alt_user = User.objects.create_user(email="alt@example.com", password="altpassword")
+        cls.movement = Movement.objects.create(name="Squat", author=cls.user)
+        cls.mlt = MovementLogTemplate.objects.create(
+            author=cls.user, name="Squat 5x5", movement=cls.movement,
+            sets=[{'reps': '5', 'type': 'working', 'rest_time': 180}])
+        cls.workout = Workout.objects.create(user=cls.user)
+        cls.wm = WorkoutMovement.objects.create(workout=cls.workout, movement=cls.movement, template=cls.mlt, order=0)
+        cls.log = MovementLog.objects.create(
+            workout_movement=cls.wm,
+            sets=[{'reps': 5, 'load': 100.0, 'type': 'working', 'rest_time': 120}],
+            timestamp=timezone.now())
+        cls.wt = WorkoutTemplate.objects.create(author=cls.user, name="Leg Day")
+        WorkoutTemplateMovement.objects.create(template=cls.wt, movement=cls.movement, movement_log_template=cls.mlt, order=0)
+
+        # (url, queries for the owner's GET)
+        cls.detail_routes = [
+            (reverse('movement-detail', kwargs={'id': cls.movement.id}), 1),
+            (reverse('movement-log-detail', kwargs={'id': cls.log.id}), 1),
+            (reverse('workout-movement-detail', kwargs={'id': cls.wm.id}), 1),
+            (reverse('movement-log-template-detail', kwargs={'id': cls.mlt.id}), 1),
+            # Data version, workout, workout movements.
+            (reverse('workout-detail', kwargs={'id': cls.workout.id}), 3),
+            (reverse('workout-template-detail', kwargs={'id': cls.wt.id}), 2),
+        ]
+
+    def setUp(self):
+        caches[settings.RESPONSE_CACHE_ALIAS].clear()
+
+    def tearDown(self):
+        self.client.force_authenticate(user=None)
+
+    def test_detail_query_counts(self):
+        self.client.force_authenticate(user=self.user)
+        for url, queries in self.detail_routes:
+            with self.subTest(url=url), self.assertNumQueries(queries):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_foreign_rows_not_found_in_one_query(self):
+        # Workout detail reads the data version for the response cache
+        # before the lookup.
+        self.client.force_authenticate(user=self.alt_user)
+        workout_url = reverse('workout-detail', kwargs={'id': self.workout.id})
+        for url, _ in self.detail_routes:
+            queries = 2 if url == workout_url else 1
+            with self.subTest(url=url), self.assertNumQueries(queries):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_end_workout_scoped_to_owner(self):
+        url = reverse('workout-end', kwargs={'id': self.workout.id})
+        self.client.force_authenticate(user=self.alt_user)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        # Lookup, update, data version bump.
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
 class MovementLogTemplateTests(APITestCase):
 
     @classmethod
@@ -780,7 +2206,7 @@ class MovementLogTemplateTests(APITestCase):
         alt_user = User.objects.create_user(email="alt3@example.com", password="altpassword")
         self.client.force_authenticate(user=alt_user)
         response = self.client.get(self.detail_url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_retrieve_nonexistent_template_fails(self):
         url = reverse('movement-log-template-detail', kwargs={'id': 123})
@@ -817,7 +2243,7 @@ class MovementLogTemplateTests(APITestCase):
         alt_user = User.objects.create_user(email="alt4@example.com", password="altpassword")
         self.client.force_authenticate(user=alt_user)
         response = self.client.delete(self.detail_url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     # Reps field validation
 
@@ -1084,7 +2510,7 @@ class WorkoutTemplateTests(APITestCase):
         alt_user = User.objects.create_user(email="alt7@example.com", password="altpassword")
         self.client.force_authenticate(user=alt_user)
         response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_retrieve_nonexistent_template_fails(self):
         url = reverse('workout-template-detail', kwargs={'id': 123})
@@ -1114,6 +2540,58 @@ class WorkoutTemplateTests(APITestCase):
         self.assertEqual(response.data['movements_details'][0]['movement'], self.movement2.id)
         self.assertEqual(response.data['movements_details'][0]['movement_log_template'], self.mlt2.id)
 
+    def test_update_template_movements_reconciles_movement_log_templates(self):
+        movement3 = Movement.objects.create(name="Row", author=self.user)
+        orphan = MovementLogTemplate.objects.create(
+            author=self.user, name="Row Template", movement=movement3,
+            sets=[{'reps': '10', 'type': 'working'}])
+        sets_mlt = MovementLogTemplate.objects.create(
+            author=self.user, name="Bench Template", movement=self.movement2,
+            sets=[{'reps': '5', 'type': 'working'}])
+        wt = WorkoutTemplate.objects.create(author=self.user, name="Reconcile")
+        WorkoutTemplateMovement.objects.create(template=wt, movement=self.movement1, movement_log_template=self.mlt1, order=0)
+        WorkoutTemplateMovement.objects.create(template=wt, movement=self.movement2, movement_log_template=sets_mlt, order=1)
+        WorkoutTemplateMovement.objects.create(template=wt, movement=movement3, movement_log_template=orphan, order=2)
+        other = WorkoutTemplate.objects.create(author=self.user, name="Shares Squat")
+        WorkoutTemplateMovement.objects.create(template=other, movement=self.movement1, movement_log_template=self.mlt1, order=0)
+
+        url = reverse('workout-template-detail', kwargs={'id': wt.id})
+        data = {'movements': [
+            {'movement': self.movement2.id, 'sets': [{'reps': '8-10', 'type': 'working'}]},
+            {'movement': self.movement1.id, 'movement_log_template': None},
+        ]}
+        response = self.client.patch(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        details = response.data['movements_details']
+        self.assertEqual([d['movement'] for d in details], [self.movement2.id, self.movement1.id])
+        self.assertEqual(details[0]['movement_log_template'], sets_mlt.id)
+        self.assertEqual(details[0]['movement_log_template_detail']['sets'][0]['reps'], '8-10')
+        self.assertIsNone(details[1]['movement_log_template'])
+        self.assertFalse(MovementLogTemplate.objects.filter(id=orphan.id).exists())
+        self.assertTrue(MovementLogTemplate.objects.filter(id=self.mlt1.id).exists())
+
+    def test_update_template_movements_query_count(self):
+        def update_with(movement_count):
+            movements = [
+                Movement.objects.create(name=f"Movement {movement_count}-{i}", author=self.user)
+                for i in range(movement_count)
+            ]
+            wt = WorkoutTemplate.objects.create(author=self.user, name=f"Large {movement_count}")
+            for order, movement in enumerate(movements):
+                WorkoutTemplateMovement.objects.create(template=wt, movement=movement, order=order)
+            url = reverse('workout-template-detail', kwargs={'id': wt.id})
+            data = {'movements': [
+                {'movement': movement.id, 'sets': [{'reps': '5', 'type': 'working'}]}
+                for movement in reversed(movements[1:])
+            ]}
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.patch(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data['movements_details']), movement_count - 1)
+            return [q['sql'] for q in queries.captured_queries if not q['sql'].startswith('SELECT')]
+
+        self.assertEqual(len(update_with(3)), len(update_with(10)))
+
     def test_update_template_name_duplicate_fails(self):
         WorkoutTemplate.objects.create(author=self.user, name="Existing")
         wt = WorkoutTemplate.objects.create(author=self.user, name="To Rename")
@@ -1156,7 +2634,7 @@ class WorkoutTemplateTests(APITestCase):
         alt_user = User.objects.create_user(email="alt8@example.com", password="altpassword")
         self.client.force_authenticate(user=alt_user)
         response = self.client.delete(url)
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     # ── Start workout from template ───────────────────────────────────────────
 
@@ -1214,3 +2692,191 @@ class WorkoutTemplateTests(APITestCase):
         details = response.data['movements_details']
         self.assertEqual(details[0]['id'], self.movement2.id)
         self.assertEqual(details[1]['id'], self.movement1.id)
+
+    def test_start_workout_from_template_query_count(self):
+        movements = [Movement.objects.create(name=f"Movement {i}", author=self.user) for i in range(12)]
+        wt = WorkoutTemplate.objects.create(author=self.user, name="Big Template")
+        for order, movement in enumerate(movements):
+            WorkoutTemplateMovement.objects.create(
+                template=wt, movement=movement, movement_log_template=self.mlt1, order=order)
+
+        # template lookup, template movements, savepoint, workout insert,
+        # data version bump, bulk insert, release savepoint, response movements
+        with self.assertNumQueries(8):
+            response = self.client.post(self.workout_list_url, {'template': wt.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertListEqual([d['id'] for d in response.data['movements_details']], [m.id for m in movements])
+        self.assertTrue(all(d['recorded_log'] is None for d in response.data['movements_details']))
+
+    def test_start_workout_from_template_reports_all_unowned_movements(self):
+        alt_user = User.objects.create_user(email="alt10@example.com", password="altpassword")
+        wt = WorkoutTemplate.objects.create(author=self.user, name="Mixed Template")
+        WorkoutTemplateMovement.objects.create(template=wt, movement=self.movement1, order=0)
+        for order, name in enumerate(["Deadlift", "Row"], start=1):
+            alt_movement = Movement.objects.create(name=name, author=alt_user)
+            WorkoutTemplateMovement.objects.create(template=wt, movement=alt_movement, order=order)
+
+        response = self.client.post(self.workout_list_url, {'template': wt.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['template']), 2)
+        self.assertFalse(Workout.objects.filter(user=self.user, end_timestamp__isnull=True).exists())
+
+    def test_create_workout_with_unowned_movements_fails(self):
+        alt_user = User.objects.create_user(email="alt11@example.com", password="altpassword")
+        alt_movement = Movement.objects.create(name="Deadlift", author=alt_user)
+        data = {'movements': [self.movement1.id, alt_movement.id, 999]}
+        response = self.client.post(self.workout_list_url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(response.data['movements']), 2)
+
+
+class GeneratedIdTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.movement = Movement.objects.create(name="Squat", author=cls.user)
+
+    def test_ids_are_time_ordered(self):
+        now_ns = (ID_EPOCH_MS + 1000 * ID_TICK_MS) * 1_000_000
+        generate = IdGenerator(clock=lambda: now_ns)
+        ids = [generate() for _ in range(5000)]
+        self.assertListEqual(ids, sorted(set(ids)))
+        self.assertEqual(ids[0] >> ID_TICK_SHIFT, 1000)
+        # Sequences that run out borrow the following ticks.
+        self.assertGreater(ids[-1] >> ID_TICK_SHIFT, 1000)
+
+        now_ns -= 5 * ID_TICK_MS * 1_000_000
+        self.assertGreater(generate(), ids[-1])
+        self.assertTrue(all(0 < i < 2 ** 53 for i in ids))
+
+    def test_nodes_draw_disjoint_ids(self):
+        now_ns = (ID_EPOCH_MS + 1000 * ID_TICK_MS) * 1_000_000
+        first, second = IdGenerator(clock=lambda: now_ns, node=1), IdGenerator(clock=lambda: now_ns, node=2)
+        ids = [generate() for _ in range(5000) for generate in (first, second)]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_insert_retries_taken_id(self):
+        movement = Movement(name="Bench Press", author=self.user)
+        movement.id = self.movement.id
+        movement.save()
+        self.assertNotEqual(movement.id, self.movement.id)
+        self.assertEqual(Movement.objects.get(pk=movement.id).name, "Bench Press")
+        self.assertEqual(Movement.objects.get(pk=self.movement.id).name, "Squat")
+
+    def test_insert_gives_up_on_taken_ids(self):
+        movement = Movement(name="Bench Press", author=self.user)
+        movement.id = self.movement.id
+        with mock.patch('lumberjacked.utils.generate_id', return_value=self.movement.id):
+            with self.assertRaises(IdCollisionError):
+                movement.save()
+
+    def test_private_insert_hooks_unchanged(self):
+        # GeneratedIdMixin overrides Model._do_insert() and calls QuerySet._insert().
+        self.assertListEqual(
+            list(inspect.signature(models.Model._do_insert).parameters),
+            ['self', 'manager', 'using', 'fields', 'returning_fields', 'raw'],
+        )
+        self.assertListEqual(
+            list(inspect.signature(models.QuerySet._insert).parameters),
+            ['self', 'objs', 'fields', 'returning_fields', 'raw', 'using', 'on_conflict',
+             'update_fields', 'unique_fields'],
+        )
+
+    def test_other_unique_conflicts_still_raise(self):
+        PersonalRecord.objects.create(
+            user=self.user, movement=self.movement, rep_count=5, load=100.0, estimated_1rm=116.7,
+            achieved_at=timezone.now())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PersonalRecord.objects.create(
+                user=self.user, movement=self.movement, rep_count=5, load=90.0, estimated_1rm=105.0,
+                achieved_at=timezone.now())
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PersonalRecord.objects.bulk_create([PersonalRecord(
+                user=self.user, movement=self.movement, rep_count=5, load=90.0, estimated_1rm=105.0,
+                achieved_at=timezone.now())])
+
+
+class DatabaseConnectionStatsTests(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="test@example.com", password="password")
+        cls.staff = User.objects.create_user(email="staff@example.com", password="password", is_staff=True)
+        cls.url = reverse('db-stats')
+
+    def tearDown(self):
+        self.client.force_authenticate(user=None)
+
+    def test_non_staff_forbidden(self):
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_staff_sees_connection_mode(self):
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['mode'], settings.DB_CONNECTION_MODE)
+        if settings.DB_CONNECTION_MODE != 'pool':
+            self.assertIsNone(response.data['pool'])
+
+
+class LoadTestingTests(APITestCase):
+
+    def seed(self, **options):
+        options = {'users': 2, 'workouts': 6, 'logs': 3, 'movements': 5, 'end_date': datetime.date(2024, 6, 1),
+                   **options}
+        call_command('seed_load_data', stdout=io.StringIO(), **options)
+
+    def history(self):
+        return list(
+            MovementLog.objects
+            .order_by('user__email', 'timestamp')
+            .values_list('user__email', 'movement__name', 'timestamp', *SET_COLUMNS)
+        )
+
+    def test_seed_creates_history_with_derived_data(self):
+        self.seed()
+        users = User.objects.filter(email__startswith='load-user-')
+        self.assertEqual(users.count(), 2)
+        self.assertEqual(Workout.objects.filter(user__in=users, end_timestamp__isnull=False).count(), 12)
+        self.assertEqual(MovementLog.objects.count(), 36)
+        self.assertTrue(all(log.sets for log in MovementLog.objects.all()))
+        self.assertTrue(PersonalRecord.objects.exists())
+        self.assertTrue(WeeklyVolume.objects.exists())
+        self.assertFalse(Movement.objects.filter(movement_logs__isnull=False, last_log__isnull=True).exists())
+
+        user = users.get(email='load-user-0@example.com')
+        self.assertTrue(user.check_password('password'))
+        self.client.force_authenticate(user=user)
+        response = self.client.get(reverse('workout-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 6)
+
+    def test_seed_is_deterministic_and_replaces_users(self):
+        self.seed()
+        history = self.history()
+        with tempfile.TemporaryDirectory() as directory:
+            tokens_file = os.path.join(directory, 'tokens.json')
+            self.seed(tokens_file=tokens_file)
+            with open(tokens_file) as stream:
+                tokens = json.load(stream)
+        self.assertListEqual(self.history(), history)
+        self.assertEqual(User.objects.count(), 2)
+        self.assertListEqual([entry['email'] for entry in tokens],
+                             ['load-user-0@example.com', 'load-user-1@example.com'])
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {tokens[0]['token']}")
+        self.assertEqual(self.client.get(reverse('workout-list')).status_code, status.HTTP_200_OK)
+
+        self.seed(seed=1)
+        self.assertNotEqual(self.history(), history)
+
+    @override_settings(MIDDLEWARE=['api.query_count.QueryCountMiddleware', *settings.MIDDLEWARE])
+    def test_query_count_header(self):
+        user = User.objects.create_user(email="test@example.com", password="password")
+        self.client.force_authenticate(user=user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('movement-log-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(int(response['X-Query-Count']), len(queries))
@@ -1,24 +1,34 @@
 from django.urls import path
 from rest_framework.urlpatterns import format_suffix_patterns
 
-from . import views
+from . import async_views, views
 
 
 urlpatterns = [
-    path('movements/', views.MovementList.as_view(), name='movement-list'),
+    path('movements/', async_views.AsyncMovementList.as_view(), name='movement-list'),
     path('movements/<int:id>/', views.MovementDetail.as_view(), name='movement-detail'),
+    path('movements/<int:id>/progression/', views.MovementProgression.as_view(), name='movement-progression'),
     path('movement-logs/', views.MovementLogList.as_view(), name='movement-log-list'),
     path('movement-logs/<int:id>/', views.MovementLogDetail.as_view(), name='movement-log-detail'),
-    path('workouts/', views.WorkoutList.as_view(), name='workout-list'),
+    path('workouts/', async_views.AsyncWorkoutList.as_view(), name='workout-list'),
     path('workouts/<int:id>/', views.WorkoutDetail.as_view(), name='workout-detail'),
     path('workouts/<int:id>/end/', views.WorkoutEnd.as_view(), name='workout-end'),
-    path('workouts/current/', views.WorkoutCurrent.as_view(), name='workout-current'),
+    path('workouts/<int:id>/finish/', views.WorkoutFinish.as_view(), name='workout-finish'),
+    path('workouts/current/', async_views.AsyncWorkoutCurrent.as_view(), name='workout-current'),
     path('workout-movements/', views.WorkoutMovementList.as_view(), name='workout-movement-list'),
     path('workout-movements/<int:id>/', views.WorkoutMovementDetail.as_view(), name='workout-movement-detail'),
     path('workout-templates/', views.WorkoutTemplateList.as_view(), name='workout-template-list'),
     path('workout-templates/<int:id>/', views.WorkoutTemplateDetail.as_view(), name='workout-template-detail'),
     path('movement-log-templates/', views.MovementLogTemplateList.as_view(), name='movement-log-template-list'),
     path('movement-log-templates/<int:id>/', views.MovementLogTemplateDetail.as_view(), name='movement-log-template-detail'),
+    path('personal-records/', views.PersonalRecordList.as_view(), name='personal-record-list'),
+    path('weekly-volume/', views.WeeklyVolumeList.as_view(), name='weekly-volume-list'),
+    path('export/', views.HistoryExport.as_view(), name='history-export'),
+    path('import/', views.HistoryImport.as_view(), name='history-import'),
+    path('sync/', views.Sync.as_view(), name='sync'),
+    path('batch/', views.Batch.as_view(), name='batch'),
+    path('db-stats/', views.DatabaseConnectionStats.as_view(), name='db-stats'),
+    path('cache-stats/', views.ResponseCacheStats.as_view(), name='cache-stats'),
 ]
 
 urlpatterns = format_suffix_patterns(urlpatterns)
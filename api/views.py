@@ -1,23 +1,50 @@
+import datetime
+import functools
+import io
+
+from django.conf import settings
+from django.db import connection
 from django.db.models import Prefetch
-from django.http import Http404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-from rest_framework import generics
+from django.utils.cache import patch_cache_control
+from rest_framework import generics, status
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.pagination import PageNumberPagination
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Movement, MovementLog, MovementLogTemplate, Workout, WorkoutMovement, WorkoutTemplate
+from .batch import run_batch
+from .etags import DataVersionETagMixin
+from . import fast_serializers
+from .export import CONTENT_TYPES, aiter_chunks, export_chunks
+from .importer import HistoryImporter, ImportFormatError
+from .models import (
+    Movement, MovementLog, MovementLogTemplate, PersonalRecord, VolumeRecord, WeeklyVolume,
+    Workout, WorkoutMovement, WorkoutTemplate,
+    movement_progression,
+)
+from .pagination import MovementLogHistoryPagination, WorkoutHistoryPagination
+from .response_cache import ResponseCacheMixin, stats as response_cache_stats
 from .permissions import (
     IsMovementOwner, IsMovementLogOwner, IsMovementLogTemplateOwner,
     IsWorkoutOwner, IsWorkoutMovementOwner, IsWorkoutTemplateOwner,
 )
+from .sync import changes_since
 from .serializers import (
     MovementSerializer, MovementLogSerializer,
+    MovementProgressionQuerySerializer, MovementProgressionSerializer,
+    MovementRecordsSerializer,
+    BatchSerializer,
+    HistoryExportQuerySerializer,
+    SyncQuerySerializer,
+    WeeklyVolumeQuerySerializer, WeeklyVolumeSerializer,
     MovementLogTemplateSerializer,
-    WorkoutSerializer, WorkoutMovementSerializer,
+    WorkoutSerializer, WorkoutFinishSerializer, WorkoutMovementSerializer,
     WorkoutTemplateSerializer,
     WorkoutWithLatestLogsSerializer, WorkoutWithRecordedLogsSerializer,
 )
@@ -28,11 +55,44 @@ _WORKOUT_MOVEMENTS_PREFETCH = Prefetch(
 )
 
 
+class _OwnerScopedMixin:
+    """
+    Scopes object lookups to the requesting user's rows in SQL, so a detail
+    request is a single indexed query and foreign rows 404 like missing ones.
+    """
+    def get_queryset(self):
+        return super().get_queryset().owned_by(self.request.user)
+
+
+class _FastReadMixin:
+    """
+    For list views: when settings.FAST_READ_SERIALIZERS is on, GET pages are
+    values(*fast_values) rows serialized by fast_serializer_class (see
+    api.fast_serializers) instead of model instances and DRF serializers.
+    """
+    fast_values = ()
+    fast_serializer_class = None
+
+    def uses_fast_read(self):
+        return settings.FAST_READ_SERIALIZERS and self.request.method == 'GET'
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.uses_fast_read():
+            queryset = queryset.prefetch_related(None).values(*self.fast_values)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.uses_fast_read():
+            return self.fast_serializer_class
+        return super().get_serializer_class()
+
+
 class _MovementPagination(PageNumberPagination):
     page_size = 1000
 
 
-class MovementList(generics.ListCreateAPIView):
+class MovementList(DataVersionETagMixin, generics.ListCreateAPIView):
     serializer_class = MovementSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = _MovementPagination
@@ -44,13 +104,176 @@ class MovementList(generics.ListCreateAPIView):
         serializer.save(author=self.request.user)
 
 
-class MovementDetail(generics.RetrieveUpdateDestroyAPIView):
+class MovementDetail(_OwnerScopedMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Movement.objects.all()
     lookup_field = 'id'
     serializer_class = MovementSerializer
     permission_classes = [IsAuthenticated, IsMovementOwner]
 
 
+class MovementProgression(_OwnerScopedMixin, generics.GenericAPIView):
+    """
+    Per-session strength trend of a movement. Filter with ?since= and
+    ?until= (timestamps, until exclusive) and one or more ?set_type= to
+    restrict which sets are aggregated, e.g. to exclude warmups.
+    """
+    queryset = Movement.objects.all()
+    lookup_field = 'id'
+    serializer_class = MovementProgressionSerializer
+    permission_classes = [IsAuthenticated, IsMovementOwner]
+
+    def get(self, request, *args, **kwargs):
+        movement = self.get_object()
+        query = MovementProgressionQuerySerializer(data={
+            **request.query_params.dict(),
+            'set_type': request.query_params.getlist('set_type'),
+        })
+        query.is_valid(raise_exception=True)
+        rows = movement_progression(
+            movement.id,
+            since=query.validated_data.get('since'),
+            until=query.validated_data.get('until'),
+            set_types=query.validated_data.get('set_type'),
+        )
+        return Response(self.get_serializer(rows, many=True).data)
+
+
+class PersonalRecordList(APIView):
+    """
+    Personal records of the authenticated user grouped by movement: the
+    heaviest load at each rep count, the best estimated 1RM among those and
+    the best session volume. Filter with ?movement=.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        records = PersonalRecord.objects.filter(user=request.user).order_by('movement', 'rep_count')
+        volumes = VolumeRecord.objects.filter(user=request.user)
+        if 'movement' in request.query_params:
+            records = records.filter(movement=request.query_params['movement'])
+            volumes = volumes.filter(movement=request.query_params['movement'])
+
+        records_by_movement = {}
+        for record in records:
+            records_by_movement.setdefault(record.movement_id, []).append(record)
+        volume_by_movement = {volume.movement_id: volume for volume in volumes}
+
+        movements = []
+        for movement_id in sorted(records_by_movement.keys() | volume_by_movement.keys()):
+            movement_records = records_by_movement.get(movement_id, [])
+            movements.append({
+                'movement': movement_id,
+                'best_estimated_1rm': max(movement_records, key=lambda record: record.estimated_1rm, default=None),
+                'best_volume': volume_by_movement.get(movement_id),
+                'records': movement_records,
+            })
+        return Response(MovementRecordsSerializer(movements, many=True).data)
+
+
+def _week_of(day):
+    return day - datetime.timedelta(days=day.weekday())
+
+
+class WeeklyVolumeList(generics.ListAPIView):
+    """
+    Weekly training volume per body part, newest week first, read from the
+    WeeklyVolume rollup. ?since= and ?until= are dates and select the ISO
+    weeks containing them and everything between; ?body_part= filters.
+    """
+    serializer_class = WeeklyVolumeSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        query = WeeklyVolumeQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        qs = WeeklyVolume.objects.filter(user=self.request.user)
+        if 'since' in query.validated_data:
+            qs = qs.filter(week__gte=_week_of(query.validated_data['since']))
+        if 'until' in query.validated_data:
+            qs = qs.filter(week__lte=_week_of(query.validated_data['until']))
+        if 'body_part' in self.request.query_params:
+            qs = qs.filter(body_part=self.request.query_params['body_part'])
+        return qs.order_by('-week', 'body_part')
+
+
+class HistoryExport(APIView):
+    """
+    Streams every workout, workout movement and movement log of the
+    authenticated user as CSV, or NDJSON with ?export_format=ndjson.
+    ?gzip=true compresses the stream.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        query = HistoryExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        export_format = query.validated_data['export_format']
+        compress = query.validated_data['gzip']
+
+        chunks = export_chunks(request.user, export_format, compress=compress)
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiter_chunks(chunks)
+        response = StreamingHttpResponse(
+            chunks,
+            content_type='application/gzip' if compress else CONTENT_TYPES[export_format],
+        )
+        filename = f"lumberjacked-history.{export_format}" + (".gz" if compress else "")
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class HistoryImport(APIView):
+    """
+    Imports training history from a CSV uploaded as the multipart field
+    'file' (see api.importer for the columns). Responds with what was
+    written and the rows that were rejected, as a 400 if rows were rejected
+    and nothing was written.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, format=None):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': "No file was submitted."})
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        try:
+            report = HistoryImporter(request.user).run(stream)
+        except ImportFormatError as exc:
+            raise ValidationError({'file': str(exc)})
+        if report.error_count and not report.workouts:
+            return Response(report.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict(), status=status.HTTP_201_CREATED)
+
+
+class Sync(APIView):
+    """
+    Delta sync: rows of the authenticated user created, updated or deleted
+    after ?since=<cursor>, or everything without one. Each response carries
+    the cursor for the next sync (see api.sync).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, format=None):
+        query = SyncQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(changes_since(request.user, query.validated_data.get('since')))
+
+
+class Batch(APIView):
+    """
+    Runs an ordered list of sub-requests against the other api routes in
+    one transaction, atomically or best effort, and responds with all of
+    their responses (see api.batch).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, format=None):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(run_batch(request, serializer.validated_data['requests'], serializer.validated_data['mode']))
+
+
 class WorkoutMovementList(generics.ListCreateAPIView):
     serializer_class = WorkoutMovementSerializer
     permission_classes = [IsAuthenticated]
@@ -75,8 +298,8 @@ class WorkoutMovementList(generics.ListCreateAPIView):
         serializer.save(order=next_order)
 
 
-class WorkoutMovementDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = WorkoutMovement.objects.select_related('movement', 'template')
+class WorkoutMovementDetail(_OwnerScopedMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = WorkoutMovement.objects.select_related('workout', 'movement', 'template')
     lookup_field = 'id'
     serializer_class = WorkoutMovementSerializer
     permission_classes = [IsAuthenticated, IsWorkoutMovementOwner]
@@ -92,37 +315,48 @@ class WorkoutMovementDetail(generics.RetrieveUpdateDestroyAPIView):
 class MovementLogList(generics.ListCreateAPIView):
     serializer_class = MovementLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MovementLogHistoryPagination
 
     def get_queryset(self):
-        qs = MovementLog.objects.filter(workout_movement__workout__user=self.request.user)
+        qs = (
+            MovementLog.objects
+            .filter(user=self.request.user)
+            .select_related('movement')
+        )
         if 'workout_movement' in self.request.query_params:
             qs = qs.filter(workout_movement=self.request.query_params['workout_movement'])
         if 'movement' in self.request.query_params:
-            qs = qs.filter(workout_movement__movement=self.request.query_params['movement'])
+            qs = qs.filter(movement=self.request.query_params['movement'])
         if 'workout' in self.request.query_params:
             qs = qs.filter(workout_movement__workout=self.request.query_params['workout'])
-        return qs.order_by('-timestamp')
+        return qs.order_by('-timestamp', '-id')
 
     def perform_create(self, serializer):
         return serializer.save(timestamp=timezone.now())
 
 
-class MovementLogDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = MovementLog.objects.all()
+class MovementLogDetail(_OwnerScopedMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = MovementLog.objects.select_related('movement')
     lookup_field = 'id'
     serializer_class = MovementLogSerializer
     permission_classes = [IsAuthenticated, IsMovementLogOwner]
 
 
-class WorkoutList(generics.ListCreateAPIView):
+class WorkoutList(DataVersionETagMixin, ResponseCacheMixin, _FastReadMixin, generics.ListCreateAPIView):
     serializer_class = WorkoutWithRecordedLogsSerializer
+    fast_serializer_class = fast_serializers.RecordedWorkoutsFastSerializer
+    fast_values = fast_serializers.WORKOUT_VALUES
     permission_classes = [IsAuthenticated]
+    pagination_class = WorkoutHistoryPagination
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, functools.partial(super().list, request, *args, **kwargs))
 
     def get_queryset(self):
         return (
             Workout.objects
             .filter(user=self.request.user)
-            .order_by('-start_timestamp')
+            .order_by('-start_timestamp', '-id')
             .prefetch_related(_WORKOUT_MOVEMENTS_PREFETCH)
         )
 
@@ -130,13 +364,21 @@ class WorkoutList(generics.ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class WorkoutDetail(generics.RetrieveUpdateDestroyAPIView):
+class WorkoutDetail(_OwnerScopedMixin, DataVersionETagMixin, ResponseCacheMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Workout.objects.prefetch_related(_WORKOUT_MOVEMENTS_PREFETCH)
     lookup_field = 'id'
     serializer_class = WorkoutWithRecordedLogsSerializer
     permission_classes = [IsAuthenticated, IsWorkoutOwner]
 
-    def get_queryset(self):
-        return Workout.objects.prefetch_related(_WORKOUT_MOVEMENTS_PREFETCH)
+    def retrieve(self, request, *args, **kwargs):
+        response = self.cached_response(request, functools.partial(super().retrieve, request, *args, **kwargs))
+        if response.data.get('end_timestamp') is not None:
+            # Finished workouts are rarely edited again; past max-age the
+            # ETag makes revalidating them cheap.
+            patch_cache_control(
+                response, private=True, max_age=settings.FINISHED_WORKOUT_MAX_AGE, must_revalidate=True,
+            )
+        return response
 
 
 class WorkoutEnd(APIView):
@@ -146,7 +388,7 @@ class WorkoutEnd(APIView):
     permission_classes = [IsAuthenticated, IsWorkoutOwner]
 
     def get_object(self, id):
-        workout = get_object_or_404(self.queryset, id=self.kwargs["id"])
+        workout = get_object_or_404(self.queryset.owned_by(self.request.user), id=self.kwargs["id"])
         self.check_object_permissions(self.request, workout)
         return workout
 
@@ -158,10 +400,34 @@ class WorkoutEnd(APIView):
         return Response(serializer.data)
 
 
-class WorkoutCurrent(APIView):
+class WorkoutFinish(_OwnerScopedMixin, generics.GenericAPIView):
+    """
+    Records every movement log of a workout and ends it in one request, so
+    a session is saved in one round trip. Responds with the finished workout
+    and its recorded logs.
+    """
+    queryset = Workout.objects.all()
+    lookup_field = 'id'
+    serializer_class = WorkoutFinishSerializer
+    permission_classes = [IsAuthenticated, IsWorkoutOwner]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object(), data=request.data)
+        serializer.is_valid(raise_exception=True)
+        workout = serializer.save()
+        return Response(WorkoutWithRecordedLogsSerializer(workout, context=self.get_serializer_context()).data)
+
+
+class WorkoutCurrent(DataVersionETagMixin, APIView):
     permission_classes = [IsAuthenticated, IsWorkoutOwner]
 
     def get(self, request, format=None):
+        if settings.FAST_READ_SERIALIZERS:
+            data = fast_serializers.current_workout(request.user)
+            if data is None:
+                raise Http404("Current workout does not exist.")
+            return Response(data)
+
         workout = (
             Workout.objects
             .filter(user=request.user, end_timestamp__isnull=True)
@@ -175,8 +441,10 @@ class WorkoutCurrent(APIView):
         return Response(workout_serializer.data)
 
 
-class WorkoutTemplateList(generics.ListCreateAPIView):
+class WorkoutTemplateList(DataVersionETagMixin, _FastReadMixin, generics.ListCreateAPIView):
     serializer_class = WorkoutTemplateSerializer
+    fast_serializer_class = fast_serializers.WorkoutTemplatesFastSerializer
+    fast_values = fast_serializers.WORKOUT_TEMPLATE_VALUES
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -186,14 +454,12 @@ class WorkoutTemplateList(generics.ListCreateAPIView):
         serializer.save(author=self.request.user)
 
 
-class WorkoutTemplateDetail(generics.RetrieveUpdateDestroyAPIView):
+class WorkoutTemplateDetail(_OwnerScopedMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = WorkoutTemplate.objects.all()
     lookup_field = 'id'
     serializer_class = WorkoutTemplateSerializer
     permission_classes = [IsAuthenticated, IsWorkoutTemplateOwner]
 
-    def get_queryset(self):
-        return WorkoutTemplate.objects.all()
-
 
 class MovementLogTemplateList(generics.ListCreateAPIView):
     serializer_class = MovementLogTemplateSerializer
@@ -209,8 +475,28 @@ class MovementLogTemplateList(generics.ListCreateAPIView):
         serializer.save(author=self.request.user)
 
 
-class MovementLogTemplateDetail(generics.RetrieveUpdateDestroyAPIView):
+class MovementLogTemplateDetail(_OwnerScopedMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = MovementLogTemplate.objects.all()
     lookup_field = 'id'
     serializer_class = MovementLogTemplateSerializer
     permission_classes = [IsAuthenticated, IsMovementLogTemplateOwner]
+
+
+class DatabaseConnectionStats(APIView):
+    """Connection mode and psycopg pool statistics, for monitoring."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        pool = getattr(connection, 'pool', None)
+        return Response({
+            'mode': settings.DB_CONNECTION_MODE,
+            'pool': pool.get_stats() if pool is not None else None,
+        })
+
+
+class ResponseCacheStats(APIView):
+    """Hit and miss counts of the response cache in this process, per view."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return Response(response_cache_stats.snapshot())
@@ -0,0 +1,100 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+
+class TokenCache:
+    """
+    Bounded, thread-safe LRU of token key -> (user, token) entries that expire
+    after a TTL. When settings.TOKEN_AUTH_CACHE['CACHE_ALIAS'] names a Django
+    cache, it is consulted on local misses so processes can share entries and
+    invalidations.
+
+    Local entries are only dropped explicitly in the process that observed the
+    revocation, so other processes may keep serving a revoked token for at
+    most TTL seconds unless a shared cache is configured.
+    """
+    def __init__(self, max_size=None, ttl=None, cache_alias=None):
+        options = getattr(settings, 'TOKEN_AUTH_CACHE', {})
+        self.max_size = max_size if max_size is not None else options.get('MAX_SIZE', 10000)
+        self.ttl = ttl if ttl is not None else options.get('TTL', 60)
+        self.cache_alias = cache_alias if cache_alias is not None else options.get('CACHE_ALIAS')
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias] if self.cache_alias else None
+
+    @staticmethod
+    def _shared_key(key):
+        # Never put raw tokens into a shared cache.
+        return 'authn:token:' + hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                user, token, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return copy.copy(user), token
+                del self._entries[key]
+
+        if self.shared is not None:
+            cached = self.shared.get(self._shared_key(key))
+            if cached is not None:
+                user, token = cached
+                self._store(key, user, token)
+                return copy.copy(user), token
+        return None
+
+    def set(self, key, user, token):
+        self._store(key, user, token)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(key), (user, token), self.ttl)
+
+    def _store(self, key, user, token):
+        if self.max_size <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (user, token, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that serves repeat requests from token_cache instead
+    of querying the token and user tables. Entries are invalidated by the
+    receivers in authn.signals when a token is deleted or its user is
+    deactivated or changes password.
+    """
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authn', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='timezone',
+            field=models.CharField(blank=True, max_length=63, verbose_name='time zone'),
+        ),
+    ]
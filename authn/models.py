@@ -1,15 +1,26 @@
+import zoneinfo
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from .managers import UserManager
-from lumberjacked.utils import generate_id
+from lumberjacked.utils import GeneratedIdMixin, generate_id
+
 
+def time_zone(name):
+    """The zone of a User.timezone value."""
+    return zoneinfo.ZoneInfo(name or settings.TIME_ZONE)
 
-class User(AbstractUser):
+
+class User(GeneratedIdMixin, AbstractUser):
     id = models.BigIntegerField(default = generate_id, primary_key=True, editable=False)
     username = None
     email = models.EmailField(_("email address"), unique=True)
+    # IANA zone used to bucket training history into local weeks.
+    # Empty means settings.TIME_ZONE.
+    timezone = models.CharField(_("time zone"), max_length=63, blank=True)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
@@ -18,3 +29,7 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.email
+
+    @property
+    def tzinfo(self):
+        return time_zone(self.timezone)
@@ -1,4 +1,6 @@
-from dj_rest_auth.serializers import LoginSerializer
+import zoneinfo
+
+from dj_rest_auth.serializers import LoginSerializer, UserDetailsSerializer
 from dj_rest_auth.registration.serializers import RegisterSerializer
 from rest_framework import serializers
 
@@ -8,3 +10,13 @@ class CustomLoginSerializer(LoginSerializer):
 
 class CustomRegisterSerializer(RegisterSerializer):
     username = None
+
+
+class CustomUserDetailsSerializer(UserDetailsSerializer):
+    class Meta(UserDetailsSerializer.Meta):
+        fields = (*UserDetailsSerializer.Meta.fields, 'timezone')
+
+    def validate_timezone(self, value):
+        if value and value not in zoneinfo.available_timezones():
+            raise serializers.ValidationError("Unknown time zone.")
+        return value
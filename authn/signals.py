@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import token_cache
+from .models import User
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    token_cache.delete(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_tokens(sender, instance, update_fields=None, **kwargs):
+    # AbstractBaseUser keeps the raw password in _password until the save
+    # that follows set_password() completes. Partial saves such as the
+    # last_login update on login leave cached users valid; full saves may
+    # have changed profile fields like the time zone.
+    if instance.is_active and getattr(instance, '_password', None) is None and update_fields is not None:
+        return
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        token_cache.delete(key)
@@ -1,5 +1,17 @@
+import time
+from unittest import mock
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from .authentication import TokenCache, token_cache
 
 
 class UserManagerTests(TestCase):
@@ -40,3 +52,76 @@ class UserManagerTests(TestCase):
         with self.assertRaises(ValueError):
             User.objects.create_superuser(
                 email="super@user.com", password="foo", is_superuser=False)
+
+
+class CachedTokenAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(email="normal@user.com", password="foo")
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.url = reverse('movement-list')
+
+    def token_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [q for q in queries.captured_queries if 'authtoken_token' in q['sql']]
+
+    def test_repeat_requests_skip_token_lookup(self):
+        self.assertEqual(len(self.token_queries()), 1)
+        self.assertEqual(len(self.token_queries()), 0)
+
+    def test_invalid_token_fails(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_is_revoked(self):
+        self.token_queries()
+        self.token.delete()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_revoked(self):
+        self.token_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_invalidates_cache(self):
+        self.token_queries()
+        self.user.set_password("bar")
+        self.user.save()
+        self.assertEqual(len(self.token_queries()), 1)
+
+    def test_entries_expire_and_are_bounded(self):
+        cache = TokenCache(max_size=2, ttl=60, cache_alias='')
+        for key in ('a', 'b', 'c'):
+            cache.set(key, self.user, self.token)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('c')[0], self.user)
+
+        with mock.patch('authn.authentication.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(cache.get('c'))
+
+
+class UserDetailsTests(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email="normal@user.com", password="foo")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('rest_user_details')
+
+    def test_update_timezone(self):
+        response = self.client.patch(self.url, {'timezone': 'Europe/Berlin'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['timezone'], 'Europe/Berlin')
+        self.user.refresh_from_db()
+        self.assertEqual(str(self.user.tzinfo), 'Europe/Berlin')
+
+    def test_unknown_timezone_fails(self):
+        response = self.client.patch(self.url, {'timezone': 'Mars/Olympus_Mons'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_default_timezone(self):
+        self.assertEqual(str(self.user.tzinfo), settings.TIME_ZONE)
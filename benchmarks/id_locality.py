@@ -0,0 +1,79 @@
+"""
+Compare inserting rows keyed by random 48 bit IDs with time-ordered ones.
+
+Against any database the settings point at, run
+
+    python benchmarks/id_locality.py --rows 1000000
+
+--rows rows are inserted, --batch-size at a time, into two temporary tables
+with a bigint primary key and a bigint column indexed like a foreign key:
+one keyed by random IDs, as generate_id() produced before, and one by
+lumberjacked.utils.IdGenerator. The foreign key column holds IDs of earlier
+rows of the same table. Insert time, the size of both indexes and rows per
+primary key index page are printed for each. Nothing outlives the connection.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lumberjacked.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from lumberjacked.utils import IdGenerator  # noqa: E402
+
+
+def random_ids():
+    system_random = random.SystemRandom()
+    return lambda: system_random.getrandbits(48)
+
+
+def insert(cursor, table, next_id, rows, batch_size):
+    cursor.execute(f"CREATE TEMPORARY TABLE {table} (id bigint PRIMARY KEY, parent_id bigint)")
+    cursor.execute(f"CREATE INDEX {table}_parent_idx ON {table} (parent_id)")
+    ids = []
+    started = time.perf_counter()
+    for start in range(0, rows, batch_size):
+        batch = []
+        for _ in range(min(batch_size, rows - start)):
+            row_id = next_id()
+            # Children mostly point at recent parents, as logs do at workouts.
+            parent_id = ids[-random.randint(1, min(len(ids), 100))] if ids else None
+            ids.append(row_id)
+            batch.append((row_id, parent_id))
+        cursor.executemany(f"INSERT INTO {table} (id, parent_id) VALUES (%s, %s)", batch)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'ids':<13} {'insert s':>9} {'pkey MB':>8} {'fk idx MB':>10} {'rows/pkey page':>15}")
+    with connection.cursor() as cursor:
+        for name, next_id in [('random', random_ids()), ('time_ordered', IdGenerator())]:
+            table = f'bench_ids_{name}'
+            elapsed = insert(cursor, table, next_id, args.rows, args.batch_size)
+            cursor.execute(
+                "SELECT pg_relation_size(%s::regclass), pg_relation_size(%s::regclass)",
+                [f'{table}_pkey', f'{table}_parent_idx'],
+            )
+            pkey_size, fk_size = cursor.fetchone()
+            rows_per_page = args.rows / (pkey_size / 8192)
+            print(
+                f"{name:<13} {elapsed:>9.2f} {pkey_size / 1024 / 1024:>8.1f} "
+                f"{fk_size / 1024 / 1024:>10.1f} {rows_per_page:>15.0f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""
+Replay a mix of mobile app sessions against a running server and report
+latency, throughput and query counts per endpoint.
+
+Seed users, start the server with query counting on and run the driver:
+
+    python manage.py seed_load_data --users 20 --workouts 200 --tokens-file tokens.json
+    QUERY_COUNT_HEADER=true uvicorn lumberjacked.asgi:application --workers 4
+    python benchmarks/load.py http://localhost:8000 --tokens tokens.json \\
+        --concurrency 16 --sessions 200 --output load-$(git rev-parse --short HEAD).json
+
+Each session belongs to one of the seeded users, picked by --seed, and does
+what the app does during a workout: load the movement list, start a workout,
+add movements, and for each one poll the current workout and log the sets,
+then scroll back through the workout history and end the workout.
+--concurrency sessions run at once.
+
+Per endpoint, the request count, 5xx count, p50/p95/p99 latency, requests
+per second over the whole run and the mean and maximum X-Query-Count (left
+empty unless the server sets QUERY_COUNT_HEADER) are printed and, with
+--output, written as JSON with the run's options and a count of each status
+code, so runs at different commits can be diffed. Polling the current
+workout before one is started answers 404, as it does for the app.
+"""
+import argparse
+import collections
+import json
+import random
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+QUERY_COUNT_HEADER = 'X-Query-Count'
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = collections.defaultdict(list)
+
+    def add(self, endpoint, latency, status, queries):
+        with self._lock:
+            self.samples[endpoint].append((latency, status, queries))
+
+
+class Client:
+    """A requests session for one user that records each call under an endpoint name."""
+    def __init__(self, base_url, token, recorder):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Token {token}'
+        # The app loads the movement list once and keeps it.
+        self.movements = None
+
+    def call(self, endpoint, method, url, **kwargs):
+        if url.startswith('/'):
+            url = self.base_url + url
+        start = time.perf_counter()
+        response = self.session.request(method, url, **kwargs)
+        latency = time.perf_counter() - start
+        queries = response.headers.get(QUERY_COUNT_HEADER)
+        self.recorder.add(endpoint, latency, response.status_code, int(queries) if queries is not None else None)
+        return response
+
+
+def synthetic_sets(rng):
+    load = rng.randrange(20, 140, 5)
+    reps = rng.choice([5, 8, 10, 12])
+    sets = [{'reps': 10, 'load': load / 2, 'type': 'warmup', 'rest_time': 60}]
+    sets += [
+        {'reps': reps, 'load': float(load), 'type': 'working', 'rest_time': rng.randrange(60, 241, 15)}
+        for _ in range(rng.randint(3, 4))
+    ]
+    return sets
+
+
+def session(client, rng, movements):
+    """One workout as the mobile app plays it."""
+    if client.movements is None:
+        response = client.call('GET movements', 'GET', '/api/movements/')
+        client.movements = [movement['id'] for movement in response.json()['results']] if response.ok else []
+    client.call('GET workouts/current', 'GET', '/api/workouts/current/')
+
+    response = client.call('POST workouts', 'POST', '/api/workouts/', json={})
+    if not response.ok:
+        return
+    workout_id = response.json()['id']
+    for movement_id in rng.sample(client.movements, min(movements, len(client.movements))):
+        response = client.call('POST workout-movements', 'POST', '/api/workout-movements/', json={
+            'workout': workout_id, 'movement': movement_id,
+        })
+        if not response.ok:
+            continue
+        # The app polls the current workout between sets.
+        for _ in range(rng.randint(1, 3)):
+            client.call('GET workouts/current', 'GET', '/api/workouts/current/')
+        client.call('POST movement-logs', 'POST', '/api/movement-logs/', json={
+            'workout_movement': response.json()['id'], 'sets': synthetic_sets(rng),
+        })
+
+    url = '/api/workouts/?pagination=cursor'
+    for _ in range(rng.randint(1, 3)):
+        response = client.call('GET workouts (history)', 'GET', url)
+        url = response.json().get('next') if response.ok else None
+        if not url:
+            break
+    client.call('GET workouts/<id>/end', 'GET', f'/api/workouts/{workout_id}/end/')
+
+
+def summarize(samples, elapsed):
+    report = {}
+    for endpoint, results in sorted(samples.items()):
+        latencies = sorted(latency * 1000 for latency, _, _ in results)
+        percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+        queries = [count for _, _, count in results if count is not None]
+        report[endpoint] = {
+            'requests': len(results),
+            'errors': sum(1 for _, status, _ in results if status >= 500),
+            'statuses': dict(sorted(collections.Counter(str(status) for _, status, _ in results).items())),
+            'p50_ms': round(percentiles[49], 2),
+            'p95_ms': round(percentiles[94], 2),
+            'p99_ms': round(percentiles[98], 2),
+            'rps': round(len(results) / elapsed, 2),
+            'mean_queries': round(statistics.fmean(queries), 2) if queries else None,
+            'max_queries': max(queries) if queries else None,
+        }
+    return report
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base_url')
+    parser.add_argument('--tokens', required=True, help='JSON file written by seed_load_data --tokens-file')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--movements', type=int, default=4, help='Movements logged per session')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--label', default=git_commit(), help='Recorded in the report; defaults to the git commit')
+    parser.add_argument('--output', help='Write the report here as JSON')
+    args = parser.parse_args()
+
+    with open(args.tokens) as stream:
+        tokens = [entry['token'] for entry in json.load(stream)]
+    recorder = Recorder()
+    clients = [Client(args.base_url, token, recorder) for token in tokens]
+    # Sessions of one user run one after another, like a single phone would.
+    locks = [threading.Lock() for _ in clients]
+    rng = random.Random(args.seed)
+    plan = [(rng.randrange(len(clients)), rng.getrandbits(32)) for _ in range(args.sessions)]
+
+    def run(item):
+        index, session_seed = item
+        with locks[index]:
+            session(clients[index], random.Random(session_seed), args.movements)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(run, plan))
+    elapsed = time.perf_counter() - started
+
+    report = summarize(recorder.samples, elapsed)
+    print(
+        f"{'endpoint':<26} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'req/s':>8} {'queries':>7}"
+    )
+    for endpoint, row in report.items():
+        queries = '' if row['mean_queries'] is None else f"{row['mean_queries']:.1f}"
+        print(
+            f"{endpoint:<26} {row['requests']:>8} {row['errors']:>6} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+            f"{row['p99_ms']:>8.1f} {row['rps']:>8.1f} {queries:>7}"
+        )
+    print(f"{args.sessions} sessions in {elapsed:.1f} s")
+
+    if args.output:
+        with open(args.output, 'w') as stream:
+            json.dump({
+                'label': args.label,
+                'base_url': args.base_url,
+                'users': len(clients),
+                'sessions': args.sessions,
+                'concurrency': args.concurrency,
+                'movements': args.movements,
+                'seed': args.seed,
+                'elapsed_s': round(elapsed, 2),
+                'endpoints': report,
+            }, stream, indent=2)
+
+
+if __name__ == '__main__':
+    main()
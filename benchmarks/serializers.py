@@ -0,0 +1,86 @@
+"""
+Compare the DRF serializers with the model-free fast read path.
+
+Against a database holding a user with a long history, run
+
+    python benchmarks/serializers.py --email user@example.com
+
+Pages of --page-size workouts are serialized --repeat times by
+WorkoutWithRecordedLogsSerializer (with the prefetches WorkoutList uses) and by
+api.fast_serializers, queries included; the median time per page of each and
+the speedup are printed.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lumberjacked.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db.models import Prefetch  # noqa: E402
+
+from api import fast_serializers  # noqa: E402
+from api.models import Workout, WorkoutMovement  # noqa: E402
+from api.serializers import WorkoutWithRecordedLogsSerializer  # noqa: E402
+from authn.models import User  # noqa: E402
+
+
+def drf_page(user, page_size):
+    workouts = (
+        Workout.objects
+        .filter(user=user)
+        .order_by('-start_timestamp', '-id')
+        .prefetch_related(Prefetch(
+            'workout_movements',
+            queryset=WorkoutMovement.objects.select_related('movement', 'movement_log').order_by('order'),
+        ))[:page_size]
+    )
+    return WorkoutWithRecordedLogsSerializer(workouts, many=True).data
+
+
+def fast_page(user, page_size):
+    workouts = (
+        Workout.objects
+        .filter(user=user)
+        .order_by('-start_timestamp', '-id')
+        .values(*fast_serializers.WORKOUT_VALUES)[:page_size]
+    )
+    return fast_serializers.RecordedWorkoutsFastSerializer(workouts, many=True).data
+
+
+def median_ms(build, user, page_size, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build(user, page_size)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--email', required=True, help='email of an existing user with workouts')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    user = User.objects.get(email=args.email)
+    if drf_page(user, args.page_size) != fast_page(user, args.page_size):
+        parser.error("fast path output differs from the DRF serializers")
+
+    drf = median_ms(drf_page, user, args.page_size, args.repeat)
+    fast = median_ms(fast_page, user, args.page_size, args.repeat)
+    print(f"{'path':<6} {'median ms':>10}")
+    print(f"{'drf':<6} {drf:>10.2f}")
+    print(f"{'fast':<6} {fast:>10.2f}")
+    print(f"speedup {drf / fast:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Compare the WSGI and ASGI serving paths under concurrent load.
+
+Start the same code base twice against the same database, with production
+servers and the same number of worker processes and connection mode, e.g.
+gunicorn (pip install gunicorn; it is not a dependency of the app) with
+gthread workers against uvicorn:
+
+    DB_CONNECTION_MODE=pool gunicorn lumberjacked.wsgi:application --bind 0.0.0.0:8000 \\
+        --workers 2 --worker-class gthread --threads 8
+    DB_CONNECTION_MODE=pool uvicorn lumberjacked.asgi:application --port 8001 --workers 2
+
+Use --worker-class sync for a baseline without threads. Then run
+
+    python benchmarks/serving.py --token <token> \\
+        wsgi=http://localhost:8000 asgi=http://localhost:8001
+
+Each target is hit with --requests GETs per endpoint from --concurrency
+threads; requests per second and p50/p99 latency are printed per target and
+endpoint.
+"""
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ENDPOINTS = ('/api/workouts/current/', '/api/workouts/', '/api/movements/')
+
+
+def run(base_url, path, token, total, concurrency):
+    session = requests.Session()
+    session.headers['Authorization'] = f'Token {token}'
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    def timed_get(_):
+        start = time.perf_counter()
+        response = session.get(base_url + path)
+        return time.perf_counter() - start, response.status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(timed_get, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, code in results if code >= 500)
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        'rps': total / elapsed,
+        'p50_ms': percentiles[49] * 1000,
+        'p99_ms': percentiles[98] * 1000,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('targets', nargs='+', help='name=base_url pairs to compare')
+    parser.add_argument('--token', required=True, help='API token of an existing user')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    args = parser.parse_args()
+
+    print(f"{'target':<8} {'endpoint':<24} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'5xx':>5}")
+    for target in args.targets:
+        name, base_url = target.split('=', 1)
+        for path in ENDPOINTS:
+            result = run(base_url.rstrip('/'), path, args.token, args.requests, args.concurrency)
+            print(f"{name:<8} {path:<24} {result['rps']:>9.1f} {result['p50_ms']:>9.1f} "
+                  f"{result['p99_ms']:>9.1f} {result['errors']:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Compare storing MovementLog sets as a JSON list with the parallel arrays.
+
+Against any database the settings point at, run
+
+    python benchmarks/set_storage.py --rows 200000
+
+--rows synthetic logs of 1 to --max-sets sets are written to two temporary
+tables, one with the former jsonb sets column and one with the set_* arrays
+MovementLog uses now. The total size of each table and the median time over
+--repeat runs of a per-log aggregate (top load, volume and working sets, as
+movement_progression computes them) are printed. Nothing outlives the
+connection.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lumberjacked.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from api.models import SET_TYPE_CHOICES, SET_TYPE_CODES  # noqa: E402
+
+SETUP = """
+    CREATE TEMPORARY TABLE bench_sets_source AS
+    SELECT g AS id, s AS n,
+           1 + floor(random() * 12)::integer AS reps,
+           CASE WHEN random() < 0.1 THEN NULL ELSE round((20 + random() * 200)::numeric, 1)::float8 END AS load,
+           floor(random() * %(types)s)::smallint AS type,
+           CASE WHEN random() < 0.3 THEN NULL ELSE 60 + floor(random() * 180)::integer END AS rest_time
+    FROM generate_series(1, %(rows)s) g
+    -- g * 0 ties the inner series to g, so each log draws its own set count.
+    CROSS JOIN LATERAL generate_series(1, 1 + floor(random() * %(max_sets)s)::integer + g * 0) s;
+
+    CREATE TEMPORARY TABLE bench_sets_json AS
+    SELECT id, jsonb_agg(jsonb_build_object(
+               'reps', reps, 'load', load, 'type', (%(names)s::text[])[type + 1], 'rest_time', rest_time
+           ) ORDER BY n) AS sets
+    FROM bench_sets_source GROUP BY id;
+
+    CREATE TEMPORARY TABLE bench_sets_arrays AS
+    SELECT id,
+           array_agg(reps ORDER BY n) AS set_reps,
+           array_agg(load ORDER BY n) AS set_loads,
+           array_agg(type ORDER BY n) AS set_types,
+           array_agg(rest_time ORDER BY n) AS set_rest_times
+    FROM bench_sets_source GROUP BY id;
+
+    DROP TABLE bench_sets_source;
+    VACUUM ANALYZE bench_sets_json;
+    VACUUM ANALYZE bench_sets_arrays;
+"""
+
+AGGREGATES = {
+    'json': """
+        SELECT t.id, MAX(s.load), COALESCE(SUM(s.reps * s.load), 0), COUNT(*) FILTER (WHERE s.type <> 'warmup')
+        FROM bench_sets_json t
+        CROSS JOIN LATERAL (
+            SELECT (value ->> 'reps')::integer AS reps,
+                   (value ->> 'load')::float8 AS load,
+                   value ->> 'type' AS type
+            FROM jsonb_array_elements(t.sets)
+        ) s
+        GROUP BY t.id
+    """,
+    'arrays': f"""
+        SELECT t.id, MAX(s.load), COALESCE(SUM(s.reps * s.load), 0),
+               COUNT(*) FILTER (WHERE s.type <> {SET_TYPE_CODES['warmup']})
+        FROM bench_sets_arrays t
+        CROSS JOIN LATERAL unnest(t.set_reps, t.set_loads, t.set_types) AS s(reps, load, type)
+        GROUP BY t.id
+    """,
+}
+
+
+def median_ms(cursor, sql, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        cursor.execute(sql)
+        cursor.fetchall()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--max-sets', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    with connection.cursor() as cursor:
+        # VACUUM cannot run inside a transaction block.
+        connection.set_autocommit(True)
+        for statement in filter(str.strip, SETUP.split(';')):
+            cursor.execute(statement, {
+                'rows': args.rows, 'max_sets': args.max_sets,
+                'types': len(SET_TYPE_CHOICES), 'names': SET_TYPE_CHOICES,
+            })
+
+        print(f"{'layout':<8} {'size MB':>9} {'median ms':>10}")
+        for layout, sql in AGGREGATES.items():
+            cursor.execute("SELECT pg_total_relation_size(%s::regclass)", [f'bench_sets_{layout}'])
+            size = cursor.fetchone()[0] / 1024 / 1024
+            print(f"{layout:<8} {size:>9.1f} {median_ms(cursor, sql, args.repeat):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
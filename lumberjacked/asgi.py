@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'lumberjacked.settings')
+# Read by the settings, which allow fewer connection modes under ASGI.
+os.environ['DJANGO_SERVER_INTERFACE'] = 'asgi'
 
 application = get_asgi_application()
@@ -2,6 +2,7 @@
 Django settings for lumberjacked project.
 """
 import os
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -52,6 +53,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Serves collected static files (admin, browsable API) from the app
+    # server, which has no proxy in front of it for them.
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -96,6 +100,46 @@ DATABASES = {
     }
 }
 
+# How connections to the database are managed:
+#   "request"    - open and close a connection for every request
+#   "persistent" - keep each worker's connection open for DB_CONN_MAX_AGE
+#                  seconds, checking its health before reuse
+#   "pool"       - share a psycopg3 connection pool between a process's threads
+#
+# Under ASGI (lumberjacked.asgi, as the Dockerfile serves it) Django runs the
+# synchronous work of every request on a thread of its own, so a persistent
+# connection would never be reused and would sit idle until DB_CONN_MAX_AGE
+# ran out, exhausting Postgres' connection slots under load. "persistent" is
+# refused there; use "pool" to reuse connections.
+DB_CONNECTION_MODE = os.getenv("DB_CONNECTION_MODE") or "request"
+SERVER_INTERFACE = os.getenv("DJANGO_SERVER_INTERFACE") or "wsgi"
+
+if DB_CONNECTION_MODE == "persistent" and SERVER_INTERFACE == "asgi":
+    raise ImproperlyConfigured(
+        "DB_CONNECTION_MODE 'persistent' does not reuse connections under ASGI; use 'pool' instead."
+    )
+elif DB_CONNECTION_MODE == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "600"))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+elif DB_CONNECTION_MODE == "pool":
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            # Seconds a request waits for a free connection before failing.
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            # Seconds before a connection is retired and replaced.
+            "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "1800")),
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+        },
+    }
+    # Check pooled connections before handing them out.
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+elif DB_CONNECTION_MODE != "request":
+    raise ImproperlyConfigured(
+        f"DB_CONNECTION_MODE must be 'request', 'persistent' or 'pool', not {DB_CONNECTION_MODE!r}."
+    )
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -131,6 +175,7 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -141,12 +186,63 @@ AUTH_USER_MODEL = "authn.User"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "authn.authentication.CachedTokenAuthentication",
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 100
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Serialized workout history responses (see api.response_cache). Any
+    # backend works; FileBasedCache or DatabaseCache (after `manage.py
+    # createcachetable`) share entries between a node's processes without
+    # an external cache service.
+    'responses': {
+        'BACKEND': os.getenv("RESPONSE_CACHE_BACKEND") or 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': os.getenv("RESPONSE_CACHE_LOCATION") or 'responses',
+        'TIMEOUT': int(os.getenv("RESPONSE_CACHE_TIMEOUT", "3600")),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000")),
+        },
+    },
+}
+
+# Cache alias used for response caching; empty disables it.
+RESPONSE_CACHE_ALIAS = os.getenv("RESPONSE_CACHE_ALIAS", "responses")
+
+# In-process token -> user cache used by CachedTokenAuthentication. A revoked
+# token may be served for up to TTL seconds by other processes unless
+# CACHE_ALIAS names a shared Django cache.
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': int(os.getenv("TOKEN_AUTH_CACHE_MAX_SIZE", "10000")),
+    'TTL': int(os.getenv("TOKEN_AUTH_CACHE_TTL", "60")),
+    'CACHE_ALIAS': os.getenv("TOKEN_AUTH_CACHE_ALIAS") or None,
+}
+
+# Serve workout and workout template lists from values() rows without
+# model instances or per-row DRF serializers (see api.fast_serializers).
+FAST_READ_SERIALIZERS = os.getenv("FAST_READ_SERIALIZERS", "").lower() in ['true', '1', 'y', 'yes']
+
+# Seconds clients may reuse a finished workout's detail response without
+# revalidating. Edits made elsewhere meanwhile go unseen, so keep it short.
+FINISHED_WORKOUT_MAX_AGE = int(os.getenv("FINISHED_WORKOUT_MAX_AGE", "60"))
+
+# Deletions are remembered for delta sync this long; clients that have not
+# synced for longer must start over without a cursor.
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "90"))
+
+# Report the number of SQL queries of every request in an X-Query-Count
+# response header (see api.query_count); meant for load tests only.
+QUERY_COUNT_HEADER = os.getenv("QUERY_COUNT_HEADER", "").lower() in ['true', '1', 'y', 'yes']
+if QUERY_COUNT_HEADER:
+    MIDDLEWARE.insert(0, 'api.query_count.QueryCountMiddleware')
+
+# Most sub-requests one POST /api/batch/ may carry.
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+
 AUTHENTICATION_BACKENDS = [
     # allauth specific authentication methods, such as login by e-mail
     'allauth.account.auth_backends.AuthenticationBackend',
@@ -190,6 +286,7 @@ SOCIALACCOUNT_PROVIDERS = {
 REST_AUTH = {
     'LOGIN_SERIALIZER': 'authn.serializers.CustomLoginSerializer',
     'REGISTER_SERIALIZER': 'authn.serializers.CustomRegisterSerializer',
+    'USER_DETAILS_SERIALIZER': 'authn.serializers.CustomUserDetailsSerializer',
 }
 
 EMAIL_BACKEND = os.getenv("EMAIL_BACKEND")